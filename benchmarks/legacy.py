@@ -0,0 +1,57 @@
+"""Karşılaştırma için eski uygulamalar
+
+Vektörel sürümlerin kazancını aynı veri üzerinde ölçebilmek için önceki
+satır bazlı uygulamalar burada değiştirilmeden tutulur.
+"""
+import pandas as pd
+from datetime import datetime
+
+def calculate_rfm_scores(customers_df):
+    """RFM skorlarını pd.qcut ile hesapla (tekrar eden sınırlarda hata verir)"""
+    today = datetime.now()
+    customers_df['son_satin_alma_tarihi'] = pd.to_datetime(customers_df['son_satin_alma_tarihi'])
+    customers_df['recency'] = (today - customers_df['son_satin_alma_tarihi']).dt.days
+    customers_df['R_score'] = pd.qcut(customers_df['recency'], q=5, labels=[5,4,3,2,1])
+    customers_df['F_score'] = pd.qcut(customers_df['toplam_satin_alma_sayisi'], q=5, labels=[1,2,3,4,5])
+    customers_df['M_score'] = pd.qcut(customers_df['toplam_harcama'], q=5, labels=[1,2,3,4,5])
+    return customers_df
+
+def segment_customers(customers_df):
+    """Müşterileri satır bazlı apply ile segmentlere ayır"""
+    def assign_segment(row):
+        r_score = int(row['R_score'])
+        f_score = int(row['F_score'])
+        m_score = int(row['M_score'])
+        if r_score >= 4 and f_score >= 4 and m_score >= 4:
+            return "VIP Müşteriler"
+        elif r_score >= 3 and f_score >= 3 and m_score >= 3:
+            return "Sadık Müşteriler"
+        elif r_score >= 3 and (f_score >= 3 or m_score >= 3):
+            return "Aktif Müşteriler"
+        elif r_score >= 2 and (f_score >= 2 or m_score >= 2):
+            return "Orta Seviye Müşteriler"
+        elif r_score >= 2:
+            return "Risk Altındaki Müşteriler"
+        else:
+            return "Kayıp Müşteriler"
+
+    def assign_recommendations(row):
+        segment = row['Segment']
+        if segment == "VIP Müşteriler":
+            return "🎯 VIP hizmet, özel kampanyalar, erken erişim"
+        elif segment == "Sadık Müşteriler":
+            return "💎 Sadakat programı, özel indirimler"
+        elif segment == "Aktif Müşteriler":
+            return "📈 Daha fazla ürün önerisi, kampanyalar"
+        elif segment == "Orta Seviye Müşteriler":
+            return "📊 Kişiselleştirilmiş öneriler, e-posta kampanyaları"
+        elif segment == "Risk Altındaki Müşteriler":
+            return "⚠️ Yeniden aktifleştirme kampanyaları"
+        elif segment == "Kayıp Müşteriler":
+            return "🚨 Geri kazanım kampanyaları, özel teklifler"
+        else:
+            return "📋 Genel kampanyalar"
+
+    customers_df['Segment'] = customers_df.apply(assign_segment, axis=1)
+    customers_df['Öneriler'] = customers_df.apply(assign_recommendations, axis=1)
+    return customers_df
@@ -0,0 +1,187 @@
+"""Stockly performans ölçümleri
+
+Sentetik veri üzerinde her sayfanın arkasındaki hesaplama fonksiyonlarını ölçer,
+sonuçları benchmarks/results/ altına kaydeder ve önceki sonuçla karşılaştırır.
+Ayrıca tip şemasının varlık başına bellek kazancını raporlar.
+
+Kullanım:
+    python benchmarks/run_benchmarks.py --scale small
+    python benchmarks/run_benchmarks.py --scale full --repeat 3 --fail-on-regression
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+from utils import generate_synthetic_data, build_sales_daily, build_sales_rollup, memory_report
+from core.segmentation import calculate_rfm_scores, segment_customers, segment_customers_chunked, refresh_segments
+from core.pricing import get_pricing_recommendations
+from core.forecast import forecast_stock_depletion
+from core.sales import build_sales_history, sales_analytics, build_sales_history_index, query_sales_history, build_rollup_index, rollup_analytics
+from core.stock import build_stock_report
+from core.reports import build_pnl
+from core.clustering import fit_cluster_model, predict_clusters
+from core.replenishment import build_supplier_index, select_best_supplier, plan_replenishment, inventory_policy
+import legacy
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# Veri ölçekleri; "full" üretim ölçeğidir
+SCALES = {
+    "small": dict(n_products=500, n_customers=5_000, n_suppliers=20, n_sales=100_000),
+    "medium": dict(n_products=2_000, n_customers=20_000, n_suppliers=50, n_sales=500_000),
+    "full": dict(n_products=10_000, n_customers=100_000, n_suppliers=200, n_sales=2_000_000),
+}
+
+# Önceki sonuca göre bu oranın üstündeki yavaşlamalar gerileme sayılır
+REGRESSION_RATIO = 1.2
+
+def build_benchmarks(data):
+    """Ölçülecek fonksiyonları (ad -> parametresiz çağrı) döndür"""
+    products = data["products"]
+    sales = data["sales"]
+    customers = data["customers"]
+    daily = build_sales_daily(sales, products)
+    history_index = build_sales_history_index(products, sales)
+    rollup_index = build_rollup_index(build_sales_rollup(daily, products))
+    # Parçalı segmentasyon müşterileri 10 parçada işler
+    chunk = max(len(customers) // 10, 1)
+    customer_chunks = lambda: (customers.iloc[i:i + chunk] for i in range(0, len(customers), chunk))
+    cluster_model = fit_cluster_model(customer_chunks)
+    # Anlık görüntüden sonra müşterilerin %1'i değişmiş gibi artımlı segmentasyon
+    _, snapshot, _, edges, _ = refresh_segments(customers, pd.DataFrame(columns=["musteri_id"]), None)
+    changed_customers = customers.copy()
+    changed_customers.loc[changed_customers.index[::100], "toplam_harcama"] += 100.0
+    suppliers = data["suppliers"]
+    supplier_index = build_supplier_index(suppliers)
+    # Sentetik veride sipariş yok; toplu yenileme açık sipariş olmadan planlanır
+    orders = pd.DataFrame(columns=["urun_adi", "durum"])
+    return {
+        "build_sales_daily": lambda: build_sales_daily(sales, products),
+        "calculate_rfm_scores": lambda: calculate_rfm_scores(customers.copy()),
+        "segment_customers": lambda: segment_customers(calculate_rfm_scores(customers.copy())),
+        "segment_customers_chunked": lambda: list(segment_customers_chunked(customer_chunks)),
+        "segment_customers_legacy": lambda: legacy.segment_customers(legacy.calculate_rfm_scores(customers.copy())),
+        "refresh_segments": lambda: refresh_segments(changed_customers, snapshot, edges),
+        "fit_cluster_model": lambda: fit_cluster_model(customer_chunks),
+        "build_supplier_index": lambda: build_supplier_index(suppliers),
+        "select_best_supplier": lambda: [select_best_supplier(supplier_index, k) for k in products["kategori"]],
+        "plan_replenishment": lambda: plan_replenishment(products, orders, supplier_index, "2024-01-01"),
+        "inventory_policy": lambda: inventory_policy(products, daily, supplier_index),
+        "predict_clusters": lambda: predict_clusters(cluster_model, customers),
+        "get_pricing_recommendations": lambda: get_pricing_recommendations(products, daily),
+        "forecast_stock_depletion": lambda: forecast_stock_depletion(products, daily),
+        "build_sales_history": lambda: build_sales_history(products, sales),
+        "build_sales_history_index": lambda: build_sales_history_index(products, sales),
+        "query_sales_history": lambda: query_sales_history(history_index, baslangic=sales["tarih"].iloc[0], sayfa=3),
+        "sales_analytics": lambda: sales_analytics(products, daily),
+        "build_sales_rollup": lambda: build_sales_rollup(daily, products),
+        "rollup_analytics": lambda: rollup_analytics(rollup_index, products),
+        "build_stock_report": lambda: build_stock_report(products),
+        "build_pnl": lambda: build_pnl(daily, products, "D", "urun"),
+    }
+
+def time_call(func, repeat):
+    """Fonksiyonu repeat kez çalıştırıp süreleri (saniye) döndür"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def run(scale, repeat, seed=42):
+    data = generate_synthetic_data(seed=seed, **SCALES[scale])
+    results = {}
+    for name, func in build_benchmarks(data).items():
+        try:
+            timings = time_call(func, repeat)
+            results[name] = {"min": min(timings), "median": statistics.median(timings)}
+        except Exception as e:
+            # Ölçek büyüdüğünde hata veren fonksiyonlar da sonuçta görünsün
+            results[name] = {"hata": f"{type(e).__name__}: {e}"}
+        print(f"{name:32s} {_format(results[name])}", flush=True)
+    memory = memory_report(data)
+    print("\nBellek (tip şeması öncesi -> sonrası):")
+    for row in memory.itertuples(index=False):
+        print(f"{row.varlik:32s} {row.once_bayt / 2**20:10.2f} -> {row.sonra_bayt / 2**20:10.2f} MB  (-%{row.tasarruf_orani * 100:.0f})")
+    return {
+        "scale": scale,
+        "sizes": {name: len(df) for name, df in data.items()},
+        "repeat": repeat,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "results": results,
+        "memory": memory.to_dict(orient="records"),
+    }
+
+def _format(result):
+    if "hata" in result:
+        return f"HATA  {result['hata']}"
+    return f"{result['median'] * 1000:10.1f} ms (min {result['min'] * 1000:.1f} ms)"
+
+def save(report):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = report["timestamp"].replace(":", "").replace("-", "")
+    path = os.path.join(RESULTS_DIR, f"{report['scale']}_{stamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+def latest_result(scale, exclude=None):
+    """Aynı ölçekteki en son kayıtlı sonucu bul"""
+    paths = sorted(p for p in glob.glob(os.path.join(RESULTS_DIR, f"{scale}_*.json")) if p != exclude)
+    return paths[-1] if paths else None
+
+def compare(report, baseline_path):
+    """Sonuçları önceki bir kayıtla karşılaştır, gerileyen ölçümleri döndür"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nKarşılaştırma: {os.path.relpath(baseline_path, ROOT)}")
+    regressions = []
+    for name, result in report["results"].items():
+        old = baseline["results"].get(name)
+        if not old or "median" not in old or "median" not in result:
+            continue
+        ratio = result["median"] / old["median"] if old["median"] > 0 else float("inf")
+        flag = "  <-- GERİLEME" if ratio > REGRESSION_RATIO else ""
+        print(f"{name:32s} {old['median'] * 1000:10.1f} -> {result['median'] * 1000:10.1f} ms  x{ratio:.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Stockly performans ölçümleri")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", help="Karşılaştırılacak sonuç dosyası (varsayılan: aynı ölçekteki son sonuç)")
+    parser.add_argument("--no-save", action="store_true", help="Sonucu kaydetme")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Gerileme varsa 1 ile çık")
+    args = parser.parse_args()
+
+    print(f"Ölçek: {args.scale} {SCALES[args.scale]}")
+    report = run(args.scale, args.repeat, args.seed)
+    path = None if args.no_save else save(report)
+    baseline = args.baseline or latest_result(args.scale, exclude=path)
+    regressions = compare(report, baseline) if baseline else []
+    if path:
+        print(f"\nSonuç kaydedildi: {os.path.relpath(path, ROOT)}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
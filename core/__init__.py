@@ -0,0 +1 @@
+# Hesaplama çekirdeği: Streamlit'ten bağımsız, saf veri fonksiyonları
@@ -0,0 +1,146 @@
+import os
+import threading
+from datetime import datetime
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+from core.segmentation import rfm_values, assign_segments, SEGMENT_RECOMMENDATIONS
+
+# Parçalar bu boyutta mini gruplara bölünerek partial_fit'e verilir
+CLUSTER_BATCH_SIZE = 4096
+
+# Yüklenen model: yol -> (dosya imzası, model)
+_model_cache = {}
+_model_lock = threading.Lock()
+
+def _numeric_features(customers_df, today):
+    """Recency, frequency, log(harcama) ve yaş sütunlarından sayısal özellik matrisi"""
+    recency, frequency, monetary = rfm_values(customers_df, today)
+    yas = pd.to_numeric(customers_df['yas'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    return np.column_stack([recency, frequency, np.log1p(np.clip(monetary, 0, None)), yas])
+
+def _one_hot(values, categories):
+    """Kategorik sütunu verilen kategori listesine göre 0/1 matrisine çevir (bilinmeyenler 0)"""
+    codes = pd.Categorical(values.astype(object).astype(str).where(values.notna()), categories=categories).codes
+    matrix = np.zeros((len(codes), len(categories)))
+    known = codes >= 0
+    matrix[np.flatnonzero(known), codes[known]] = 1.0
+    return matrix
+
+def cluster_features(customers_df, model):
+    """Müşterileri modelin ölçekleyicisi ve kategorileriyle özellik matrisine çevir
+
+    Recency modelin eğitim tarihine göre hesaplanır; ölçekleyici ve küme merkezleri o
+    tarihteki dağılımla öğrenildiği için tahmin günü kullanılırsa tüm müşteriler
+    zamanla daha eski görünür ve kümeler kayar.
+    """
+    today = pd.Timestamp(model['egitim_tarihi'])
+    numeric = model['scaler'].transform(_numeric_features(customers_df, today))
+    # Eksik sayısal değerler ortalamaya (ölçeklenmiş 0) çekilir
+    numeric = np.nan_to_num(numeric, nan=0.0)
+    return np.hstack([
+        numeric,
+        _one_hot(customers_df['bolge'], model['bolgeler']),
+        _one_hot(customers_df['cinsiyet'], model['cinsiyetler']),
+    ])
+
+def fit_cluster_model(read_chunks, n_clusters=5, epochs=3, random_state=42, today=None):
+    """Müşteri parçaları üzerinde ölçekleyici ve MiniBatchKMeans modelini akışla eğit
+
+    read_chunks her çağrıda müşteri parçalarını baştan üreten fonksiyondur. İlk
+    geçişte ölçekleyici ve bölge/cinsiyet kategorileri öğrenilir, sonraki epochs
+    geçişte parçalar mini gruplar halinde partial_fit'e verilir; müşteri tablosu
+    hiçbir zaman tamamen belleğe alınmaz.
+    """
+    today = (pd.Timestamp(today) if today is not None else pd.Timestamp(datetime.now())).normalize()
+    scaler = StandardScaler()
+    bolgeler, cinsiyetler = set(), set()
+    musteri_sayisi = 0
+    for chunk in read_chunks():
+        if chunk.empty:
+            continue
+        scaler.partial_fit(_numeric_features(chunk, today))
+        bolgeler.update(chunk['bolge'].dropna().astype(str).unique())
+        cinsiyetler.update(chunk['cinsiyet'].dropna().astype(str).unique())
+        musteri_sayisi += len(chunk)
+    if musteri_sayisi < n_clusters:
+        raise ValueError(f"Kümeleme için en az {n_clusters} müşteri gerekir")
+
+    model = {'scaler': scaler, 'bolgeler': sorted(bolgeler), 'cinsiyetler': sorted(cinsiyetler),
+             'egitim_tarihi': today.strftime('%Y-%m-%d')}
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state, batch_size=CLUSTER_BATCH_SIZE, n_init=3)
+    for _ in range(epochs):
+        pending = None
+        for chunk in read_chunks():
+            if chunk.empty:
+                continue
+            features = cluster_features(chunk, model)
+            # İlk partial_fit en az küme sayısı kadar satır ister; küçük parçalar biriktirilir
+            if pending is not None:
+                features = np.vstack([pending, features])
+                pending = None
+            if not hasattr(kmeans, 'cluster_centers_') and len(features) < n_clusters:
+                pending = features
+                continue
+            for start in range(0, len(features), CLUSTER_BATCH_SIZE):
+                kmeans.partial_fit(features[start:start + CLUSTER_BATCH_SIZE])
+
+    # Küme numaraları değere göre sıralanır: 1 en yeni, en sık ve en çok harcayan küme
+    centers = kmeans.cluster_centers_
+    deger = -centers[:, 0] + centers[:, 1] + centers[:, 2]
+    sira = np.empty(n_clusters, dtype='int64')
+    sira[np.argsort(-deger)] = np.arange(1, n_clusters + 1)
+
+    model.update({
+        'kmeans': kmeans,
+        'sira': sira,
+        'musteri_sayisi': musteri_sayisi,
+    })
+    return model
+
+def predict_clusters(model, customers_df):
+    """Müşterilerin küme numaralarını (1..k, değere göre sıralı) tahmin et"""
+    if customers_df.empty:
+        return np.array([], dtype='int64')
+    return model['sira'][model['kmeans'].predict(cluster_features(customers_df, model))]
+
+def label_clusters(customers_df, clusters):
+    """Kümeleri, küme içi medyan R, F, M skorlarına karşılık gelen kural segmentiyle adlandır
+
+    customers_df RFM skorlarını içermelidir; Küme, Segment ve Öneriler sütunları eklenir.
+    """
+    customers_df = customers_df.copy()
+    customers_df['Küme'] = clusters
+    medyan = customers_df.groupby('Küme')[['R_score', 'F_score', 'M_score']].median().round()
+    kural = pd.Series(assign_segments(medyan['R_score'], medyan['F_score'], medyan['M_score']), index=medyan.index)
+    adlar = pd.Series([f"Küme {kume} · {segment}" for kume, segment in kural.items()], index=kural.index)
+    customers_df['Segment'] = customers_df['Küme'].map(adlar)
+    customers_df['Öneriler'] = customers_df['Küme'].map(kural.map(SEGMENT_RECOMMENDATIONS))
+    return customers_df
+
+def save_cluster_model(model, path):
+    """Eğitilmiş modeli geçici dosya üzerinden atomik olarak kaydet"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def load_cluster_model(path):
+    """Kayıtlı modeli yükle (yoksa None); dosya değişmedikçe bellekteki kopya kullanılır"""
+    if not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    signature = (st.st_mtime_ns, st.st_size)
+    with _model_lock:
+        hit = _model_cache.get(path)
+    if hit is not None and hit[0] == signature:
+        return hit[1]
+    model = joblib.load(path)
+    with _model_lock:
+        _model_cache[path] = (signature, model)
+    return model
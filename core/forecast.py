@@ -0,0 +1,51 @@
+import pandas as pd
+import numpy as np
+
+# Tahmin durumları (gösterim sırasıyla)
+FORECAST_STATUSES = ['🔴 Acil', '🟡 Dikkat', '🟢 Normal', '🟢 Güvenli', '🟡 Veri Yok']
+
+def forecast_stock_depletion(products_df, sales_df, window_days=30, as_of=None):
+    """Tüm ürünler için günlük ortalama satış, tahmini tükenme günü ve durumu tek geçişte hesapla
+    
+    sales_df satış defteri ya da ürün×gün satış özeti olabilir (urun_id, tarih, adet).
+    window_days=None tüm satış geçmişini kullanır. as_of verilmezse pencere
+    defterdeki son satış gününde biter.
+    """
+    forecast = pd.DataFrame({
+        'urun_id': products_df['id'].to_numpy(),
+        'urun': products_df['isim'].astype(str).to_numpy(),
+        'kategori': products_df['kategori'].astype(str).to_numpy(),
+        'kalan_stok': products_df['stok'].to_numpy(),
+        'minimum_stok': products_df['minimum_stok'].to_numpy(),
+    })
+    
+    avg_daily = np.zeros(len(forecast))
+    if not sales_df.empty and not forecast.empty:
+        tarih = pd.to_datetime(sales_df['tarih']).dt.normalize()
+        end_date = tarih.max() if as_of is None else pd.Timestamp(as_of).normalize()
+        if window_days is None:
+            start_date = tarih.min()
+        else:
+            start_date = end_date - pd.Timedelta(days=window_days - 1)
+        days = max((end_date - start_date).days + 1, 1)
+        
+        # Pencere içindeki satışlar tek bir groupby ile ürün bazında toplanır
+        in_window = (tarih >= start_date) & (tarih <= end_date)
+        totals = sales_df.loc[in_window].groupby('urun_id')['adet'].sum()
+        avg_daily = forecast['urun_id'].map(totals).fillna(0).to_numpy(dtype=float) / days
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_left = np.floor(forecast['kalan_stok'].to_numpy(dtype=float) / avg_daily)
+    has_forecast = avg_daily > 0
+    
+    forecast['gunluk_ortalama'] = np.round(avg_daily, 2)
+    forecast['tahmini_gun'] = pd.array(np.where(has_forecast, days_left, 0).astype(np.int64), dtype='Int64')
+    forecast.loc[~has_forecast, 'tahmini_gun'] = pd.NA
+    
+    durum = np.select(
+        [~has_forecast, days_left <= 7, days_left <= 14, days_left <= 30],
+        ['🟡 Veri Yok', '🔴 Acil', '🟡 Dikkat', '🟢 Normal'],
+        default='🟢 Güvenli'
+    )
+    forecast['durum'] = pd.Categorical(durum, categories=FORECAST_STATUSES)
+    return forecast
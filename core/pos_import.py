@@ -0,0 +1,106 @@
+import time
+import pandas as pd
+from utils import load_data, record_sales_stream, get_today, InsufficientStockError
+
+# POS dışa aktarımında beklenen sütunlar; ürün urun_id veya urun (isim) ile belirtilir,
+# müşteri kimliği isteğe bağlıdır
+POS_ID_COLUMN = "urun_id"
+POS_NAME_COLUMN = "urun"
+POS_CUSTOMER_COLUMN = "musteri_id"
+POS_CHUNK_SIZE = 50_000
+
+def _normalize_names(names):
+    # Türkçe büyük/küçük harf farkları (I/ı, İ/i) eşleşmeyi bozmasın
+    return names.astype(str).str.strip().str.replace("İ", "i").str.casefold().str.replace("ı", "i")
+
+def build_product_index(products_df):
+    """Ürün isimlerinden (küçük harf, boşluksuz) ürün kimliklerine eşleme tablosu oluştur"""
+    products = products_df.drop_duplicates("id")
+    return pd.Series(products["id"].to_numpy(), index=_normalize_names(products["isim"])).groupby(level=0).first()
+
+def map_pos_chunk(chunk, products_df, name_index):
+    """POS satırlarını ürün kimliklerine eşle ve geçersiz satırları ayıkla
+
+    (satış satırları, reddedilen satır sayısı) döndürür. Fiyatı olmayan satırlar
+    ürünün satış fiyatını, tarihi olmayanlar bugünün tarihini alır.
+    """
+    urun_id = pd.Series(pd.NA, index=chunk.index, dtype="Float64")
+    if POS_ID_COLUMN in chunk.columns:
+        urun_id = pd.to_numeric(chunk[POS_ID_COLUMN], errors="coerce").astype("Float64")
+        urun_id = urun_id.where(urun_id.isin(products_df["id"]))
+    if POS_NAME_COLUMN in chunk.columns:
+        by_name = _normalize_names(chunk[POS_NAME_COLUMN]).map(name_index).astype("Float64")
+        urun_id = urun_id.fillna(by_name)
+
+    adet = pd.to_numeric(chunk["adet"], errors="coerce")
+    prices = products_df.drop_duplicates("id").set_index("id")["satis_fiyati"]
+    fiyat = pd.to_numeric(chunk["fiyat"], errors="coerce") if "fiyat" in chunk.columns else pd.Series(float("nan"), index=chunk.index)
+    fiyat = fiyat.fillna(urun_id.map(prices).astype(float))
+    if "tarih" in chunk.columns:
+        tarih = pd.to_datetime(chunk["tarih"], errors="coerce").dt.strftime("%Y-%m-%d").fillna(get_today())
+    else:
+        tarih = pd.Series(get_today(), index=chunk.index)
+
+    if POS_CUSTOMER_COLUMN in chunk.columns:
+        musteri_id = pd.to_numeric(chunk[POS_CUSTOMER_COLUMN], errors="coerce").astype("Int64")
+    else:
+        musteri_id = pd.Series(pd.NA, index=chunk.index, dtype="Int64")
+
+    # Kesirli adetler tam sayıya kırpılmaz, geçersiz sayılır
+    valid = urun_id.notna().to_numpy() & (adet > 0).to_numpy() & adet.eq(adet.round()).to_numpy() & fiyat.notna().to_numpy()
+    lines = pd.DataFrame({
+        "urun_id": urun_id[valid].astype("int64").to_numpy(),
+        "tarih": tarih[valid].to_numpy(),
+        "adet": adet[valid].astype("int64").to_numpy(),
+        "fiyat": fiyat[valid].to_numpy(),
+        "musteri_id": musteri_id[valid].array,
+    })
+    return lines, int((~valid).sum())
+
+def _read_chunks(source, chunksize):
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return pd.read_csv(source, chunksize=chunksize)
+
+def import_pos_sales(source, chunksize=POS_CHUNK_SIZE):
+    """POS satış dosyasını parça parça oku, stoğu doğrula ve satışları toplu kaydet
+
+    İlk geçişte sadece ürün başına toplam adetler tutulur ve stok tek seferde
+    doğrulanır; ikinci geçişte satırlar parça parça eklenir ve stok düşüşleri tek
+    yazımda uygulanır. Bellek kullanımı dosya boyutundan bağımsızdır. Stok yetersizse
+    InsufficientStockError fırlatılır ve hiçbir şey yazılmaz.
+    """
+    started = time.perf_counter()
+    products_df = load_data()
+    name_index = build_product_index(products_df)
+
+    # 1. geçiş: eşleme ve ürün başına toplam adet
+    totals = pd.Series(dtype="int64")
+    satir = reddedilen = 0
+    for chunk in _read_chunks(source, chunksize):
+        lines, rejected = map_pos_chunk(chunk, products_df, name_index)
+        satir += len(chunk)
+        reddedilen += rejected
+        totals = totals.add(lines.groupby("urun_id")["adet"].sum(), fill_value=0)
+
+    totals = totals.astype("int64").rename_axis("id").rename("adet").reset_index()
+    stock = totals["id"].map(products_df.drop_duplicates("id").set_index("id")["stok"])
+    short = totals.loc[(totals["adet"] > stock).to_numpy(), "id"]
+    if not short.empty:
+        names = products_df.drop_duplicates("id").set_index("id").loc[short, "isim"]
+        raise InsufficientStockError(f"Stokta yeterli ürün yok: {', '.join(map(str, names))}")
+
+    # 2. geçiş: satırları parça parça ekle, stok düşüşlerini tek seferde yaz
+    chunks = (map_pos_chunk(chunk, products_df, name_index)[0] for chunk in _read_chunks(source, chunksize))
+    kaydedilen = record_sales_stream(chunks, totals) if not totals.empty else 0
+
+    sure = time.perf_counter() - started
+    return {
+        "satir": satir,
+        "kaydedilen": kaydedilen,
+        "reddedilen": reddedilen,
+        "urun_sayisi": len(totals),
+        "toplam_adet": int(totals["adet"].sum()) if not totals.empty else 0,
+        "sure_sn": sure,
+        "satir_per_sn": satir / sure if sure > 0 else 0.0,
+    }
@@ -0,0 +1,169 @@
+import pandas as pd
+import numpy as np
+from datetime import datetime
+from utils import load_data, load_sales_daily
+
+def calculate_demand_factors(products_df, sales_df, days=30):
+    """Tüm ürünlerin son 30 günlük satış hızından talep faktörlerini tek geçişte hesapla
+    
+    sales_df satış defteri ya da ürün×gün satış özeti olabilir (urun_id, tarih, adet).
+    """
+    if sales_df.empty or products_df.empty:
+        return np.ones(len(products_df))  # Satış verisi yoksa nötr faktör
+    
+    # Son 30 günlük satışları filtrele (tarih sütunu bir kez çözümlenir)
+    end_date = pd.Timestamp(datetime.now().date())
+    start_date = end_date - pd.Timedelta(days=days)
+    tarih = pd.to_datetime(sales_df['tarih']).dt.normalize()
+    recent_sales = sales_df[(tarih >= start_date) & (tarih <= end_date)]
+    
+    # Ürün başına toplam satış tek bir groupby ile
+    total_sales = recent_sales.groupby('urun_id')['adet'].sum()
+    avg_daily_sales = products_df['id'].map(total_sales).fillna(0).to_numpy(dtype=float) / days
+    
+    # Talep faktörü hesaplama (0.8 - 1.5 arası - daha dengeli)
+    return np.select(
+        [avg_daily_sales == 0, avg_daily_sales <= 1, avg_daily_sales <= 3, avg_daily_sales <= 5],
+        [1.0, 0.9, 1.0, 1.2],  # Satış yok / düşük / normal / yüksek talep
+        default=1.4            # Çok yüksek talep - büyük artış
+    )
+
+def calculate_demand_factor(product_id, days=30):
+    """Ürünün son 30 günlük satış hızını hesapla"""
+    return float(calculate_demand_factors(pd.DataFrame({'id': [product_id]}), load_sales_daily(), days)[0])
+
+def calculate_stock_factors(current_stock, minimum_stock):
+    """Stok seviyelerine göre fiyat faktörlerini dizi olarak hesapla"""
+    current_stock = np.asarray(current_stock, dtype=float)
+    minimum_stock = np.asarray(minimum_stock, dtype=float)
+    return np.select(
+        [
+            current_stock <= minimum_stock * 0.5,  # Çok düşük stok - fiyat artışı
+            current_stock <= minimum_stock,        # Düşük stok - hafif artış
+            current_stock <= minimum_stock * 2,    # Normal stok - nötr
+            current_stock <= minimum_stock * 5,    # Yüksek stok - çok hafif indirim
+        ],
+        [1.2, 1.1, 1.0, 0.95],
+        default=0.9  # Çok yüksek stok - hafif indirim
+    )
+
+def calculate_stock_factor(current_stock, minimum_stock):
+    """Stok seviyesine göre fiyat faktörü hesapla"""
+    return float(calculate_stock_factors([current_stock], [minimum_stock])[0])
+
+# Tekstil sektörü mevsimsellik faktörleri (daha dengeli)
+SEASONAL_FACTORS = {
+    1: 0.95,  # Ocak - Kış sezonu sonu
+    2: 0.9,   # Şubat - Sezon sonu indirimleri
+    3: 1.05,  # Mart - İlkbahar başlangıcı
+    4: 1.1,   # Nisan - İlkbahar sezonu
+    5: 1.05,  # Mayıs - İlkbahar devam
+    6: 1.0,   # Haziran - Yaz başlangıcı
+    7: 1.1,   # Temmuz - Yaz sezonu
+    8: 1.05,  # Ağustos - Yaz devam
+    9: 1.15,  # Eylül - Sonbahar başlangıcı
+    10: 1.1,  # Ekim - Sonbahar sezonu
+    11: 1.05, # Kasım - Kış başlangıcı
+    12: 1.0   # Aralık - Kış sezonu
+}
+
+# Müşteri segmentine göre fiyat faktörleri
+SEGMENT_FACTORS = {
+    'Premium': 1.1,      # %10 yüksek fiyat
+    'Orta': 1.0,         # Normal fiyat
+    'Ekonomik': 0.95,    # %5 indirim
+    'Yeni': 0.97         # %3 indirim
+}
+
+def calculate_seasonal_factor():
+    """Mevsimsel faktör hesapla (tekstil için)"""
+    return SEASONAL_FACTORS.get(datetime.now().month, 1.0)
+
+def calculate_customer_segment_factor(customer_segment):
+    """Müşteri segmentine göre fiyat faktörü"""
+    return SEGMENT_FACTORS.get(customer_segment, 1.0)
+
+def calculate_customer_segment_factors(customer_segments, size):
+    """Tek bir segment veya ürün başına segment dizisi için faktörleri hesapla"""
+    if isinstance(customer_segments, str):
+        return np.full(size, calculate_customer_segment_factor(customer_segments))
+    return pd.Series(list(customer_segments)).map(SEGMENT_FACTORS).fillna(1.0).to_numpy(dtype=float)
+
+def calculate_ai_prices(products_df, sales_df, customer_segment='Orta', base_prices=None):
+    """Tüm katalog için AI destekli fiyatları dizi işlemleriyle hesapla"""
+    if base_prices is None:
+        base_prices = products_df['satis_fiyati']
+    base_prices = np.asarray(base_prices, dtype=float)
+    
+    # Temel faktörler
+    demand_factor = calculate_demand_factors(products_df, sales_df)
+    stock_factor = calculate_stock_factors(products_df['stok'], products_df['minimum_stok'])
+    seasonal_factor = calculate_seasonal_factor()
+    customer_factor = calculate_customer_segment_factors(customer_segment, len(products_df))
+    
+    # AI fiyat hesaplama
+    ai_prices = base_prices * demand_factor * stock_factor * seasonal_factor * customer_factor
+    
+    # Kar marjı kontrolü (minimum %20, maksimum %50)
+    cost_prices = products_df['alis_fiyati'].to_numpy(dtype=float)
+    min_prices = cost_prices * 1.2  # %20 kar marjı
+    max_prices = cost_prices * 1.5  # %50 kar marjı
+    
+    # Minimum fiyat koruması - mevcut fiyatın %90'ından düşük olamaz
+    min_prices = np.maximum(min_prices, base_prices * 0.9)
+    
+    ai_prices = np.maximum(min_prices, np.minimum(ai_prices, max_prices))
+    
+    return np.round(ai_prices, 2)
+
+def calculate_ai_price(product_id, base_price, customer_segment='Orta'):
+    """AI destekli fiyat hesaplama"""
+    products_df = load_data()
+    product = products_df[products_df['id'] == product_id]
+    
+    if product.empty:
+        return base_price
+    
+    return float(calculate_ai_prices(product, load_sales_daily(), customer_segment, base_prices=[base_price])[0])
+
+def get_pricing_recommendations(products_df=None, sales_df=None):
+    """Tüm ürünler için fiyat önerileri oluştur"""
+    if products_df is None:
+        products_df = load_data()
+    if sales_df is None:
+        sales_df = load_sales_daily()  # Ürün×gün özeti, ham satış satırlarından çok daha küçük
+    
+    if products_df.empty:
+        return pd.DataFrame()
+    
+    current_prices = products_df['satis_fiyati'].to_numpy(dtype=float)
+    cost_prices = products_df['alis_fiyati'].to_numpy(dtype=float)
+    ai_prices = calculate_ai_prices(products_df, sales_df)
+    
+    price_changes = ai_prices - current_prices
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_change_percents = np.where(current_prices > 0, price_changes / current_prices * 100, 0)
+        current_margins = np.where(cost_prices > 0, (current_prices - cost_prices) / cost_prices * 100, 0)
+        suggested_margins = np.where(cost_prices > 0, (ai_prices - cost_prices) / cost_prices * 100, 0)
+    
+    return pd.DataFrame({
+        'id': products_df['id'].to_numpy(),
+        'urun_adi': products_df['isim'].to_numpy(),
+        'kategori': products_df['kategori'].to_numpy(),
+        'mevcut_fiyat': current_prices,
+        'onerilen_fiyat': ai_prices,
+        'fiyat_degisimi': price_changes,
+        'fiyat_degisimi_yuzde': price_change_percents,
+        'stok': products_df['stok'].to_numpy(),
+        'minimum_stok': products_df['minimum_stok'].to_numpy(),
+        'alis_fiyati': cost_prices,
+        'kar_marji_mevcut': current_margins,
+        'kar_marji_onerilen': suggested_margins
+    })
+
+def apply_price_changes(products_df, recommendations_df):
+    """Önerilen fiyatları ürün tablosuna tek seferde uygula"""
+    products_df = products_df.copy()
+    new_prices = recommendations_df.set_index('id')['onerilen_fiyat']
+    products_df['satis_fiyati'] = products_df['id'].map(new_prices).fillna(products_df['satis_fiyati'])
+    return products_df
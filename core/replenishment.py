@@ -0,0 +1,243 @@
+from datetime import date, timedelta
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from utils import cached_derived, load_suppliers, allocate_ids, insert_rows, update_rows
+
+def suggest_order_quantity(stok, minimum_stok):
+    """Önerilen sipariş miktarı: eksik miktarın 2 katı"""
+    return (minimum_stok - stok) * 2
+
+# Tedarikçi kategori listelerindeki ayraçlar
+CATEGORY_SEPARATORS = r"[,;/|]"
+
+def normalize_categories(values):
+    """Kategori metinlerini karşılaştırılabilir biçime getir (Türkçe büyük/küçük harf, boşluk)"""
+    return (values.astype(str).str.strip().str.replace(r"\s+", " ", regex=True)
+            .str.replace("İ", "i").str.casefold().str.replace("ı", "i"))
+
+def _category_key(kategori):
+    # Tek bir kategori için normalize_categories ile aynı dönüşüm (sözlük erişimi için)
+    return " ".join(str(kategori).split()).replace("İ", "i").casefold().replace("ı", "i")
+
+def build_supplier_index(suppliers_df):
+    """Normalize kategori adlarından aktif tedarikçi kimliklerine ters indeks oluştur
+
+    Her kategorinin tedarikçileri performans puanına göre (yüksekten düşüğe) önceden
+    sıralıdır; böylece en iyi tedarikçi tek bir sözlük erişimiyle bulunur.
+    """
+    aktif = suppliers_df[suppliers_df['aktif_durum'].fillna(False).astype(bool)]
+    aktif = aktif.sort_values(['performans_puani', 'id'], ascending=[False, True], kind='mergesort')
+    tokens = normalize_categories(aktif['urun_kategorileri'].fillna('')).str.split(CATEGORY_SEPARATORS, regex=True)
+    pairs = pd.DataFrame({'id': aktif['id'].to_numpy(), 'kategori': tokens.to_numpy()}).explode('kategori')
+    pairs['kategori'] = pairs['kategori'].str.strip()
+    pairs = pairs[pairs['kategori'].fillna('') != ''].drop_duplicates()
+    return {
+        # explode satır sırasını koruduğu için her grup puana göre sıralı kalır
+        'kategoriler': {kategori: ids.to_numpy() for kategori, ids in pairs.groupby('kategori', sort=False)['id']},
+        'tumu': aktif['id'].to_numpy(),
+        'tedarikciler': aktif.set_index('id'),
+        'satirlar': dict(zip(aktif['id'].to_numpy(), aktif.to_dict('records'))),
+    }
+
+def get_supplier_index():
+    """Tedarikçi ters indeksini tedarikçi verileri değişene kadar önbellekten döndür"""
+    return cached_derived("supplier_index", ["suppliers"], lambda: build_supplier_index(load_suppliers()))
+
+def find_category_suppliers(index, kategori):
+    """Ürün kategorisini sağlayan aktif tedarikçileri puana göre sıralı döndür"""
+    ids = index['kategoriler'].get(_category_key(kategori))
+    if ids is None:
+        return index['tedarikciler'].iloc[0:0].reset_index()
+    return index['tedarikciler'].loc[ids].reset_index()
+
+def select_best_supplier(index, kategori):
+    """Kategorideki en yüksek puanlı aktif tedarikçiyi, yoksa genel en iyisini seç
+    
+    (tedarikçi satırı sözlüğü, kategori eşleşmesi bulundu mu) döndürür; aktif
+    tedarikçi yoksa tedarikçi satırı None olur.
+    """
+    ids = index['kategoriler'].get(_category_key(kategori))
+    if ids is not None:
+        return index['satirlar'][ids[0]], True
+    # Kategori eşleşmesi yoksa tüm aktif tedarikçiler arasından en iyisini seç
+    if len(index['tumu']):
+        return index['satirlar'][index['tumu'][0]], False
+    return None, False
+
+def build_auto_order(urun, supplier, order_id, siparis_tarihi):
+    """Düşük stoklu ürün için otomatik sipariş satırı (tek satırlık satın alma siparişi) oluştur"""
+    miktar = suggest_order_quantity(urun['stok'], urun['minimum_stok'])
+    teslimat_tarihi = date.fromisoformat(siparis_tarihi) + timedelta(days=int(supplier['teslimat_suresi']))
+    return {
+        "id": order_id, "tedarikci_id": supplier['id'], "urun_adi": urun['isim'],
+        "miktar": miktar, "birim_fiyat": urun['alis_fiyati'],
+        "toplam_fiyat": miktar * urun['alis_fiyati'],
+        "siparis_tarihi": siparis_tarihi, "teslimat_tarihi": teslimat_tarihi.isoformat(),
+        "durum": "Beklemede", "notlar": f"Otomatik sipariş - {urun['kategori']} kategorisi - Düşük stok uyarısı",
+        "siparis_no": order_id,
+    }
+
+# Henüz teslim alınmamış siparişlerin durumları; bu ürünler toplu yenilemede varsayılan olarak atlanır
+OPEN_ORDER_STATES = ("Beklemede", "Onaylandı", "Yolda")
+
+def plan_replenishment(products_df, orders_df, index, siparis_tarihi, acik_siparisleri_dahil=False, politika=None):
+    """Tüm düşük stoklu ürünler için sipariş satırlarını tek seferde hesapla
+
+    Her ürün kategorisindeki en iyi aktif tedarikçiye atanır. politika verilirse
+    (inventory_policy çıktısı) sipariş miktarı EOQ ile eksik miktarın büyüğüdür.
+    (plan, atlanan) döndürür: plan kaydedilecek sipariş satırlarıdır, atlanan ise
+    sipariş verilmeyen ürünler ve nedenleridir. Kimlik ve sipariş numaraları kayıt
+    sırasında verilir.
+    """
+    low = products_df[products_df['stok'] <= products_df['minimum_stok']].drop_duplicates('id')
+    if politika is None:
+        miktar = suggest_order_quantity(low['stok'], low['minimum_stok'])
+    else:
+        eoq = low['id'].map(politika.set_index('id')['eoq']).fillna(0)
+        miktar = np.maximum(eoq, low['minimum_stok'] - low['stok'])
+    low = low.assign(miktar=miktar.astype('int64'))
+    neden = pd.Series(None, index=low.index, dtype=object)
+    neden[low['miktar'] <= 0] = "Stok minimum seviyede, eksik yok"
+    if not acik_siparisleri_dahil and not orders_df.empty:
+        acik = orders_df.loc[orders_df['durum'].astype(object).isin(OPEN_ORDER_STATES), 'urun_adi']
+        neden[neden.isna() & low['isim'].isin(acik)] = "Açık siparişi var"
+
+    # Tedarikçi seçimi tekil kategoriler üzerinden yapılır
+    kategoriler = low['kategori'].astype(object)
+    secim = {kategori: select_best_supplier(index, kategori) for kategori in kategoriler.unique()}
+    tedarikci = kategoriler.map(lambda kategori: secim[kategori][0])
+    neden[neden.isna() & tedarikci.isna()] = "Aktif tedarikçi yok"
+
+    atlanan = pd.DataFrame({'urun_adi': low['isim'], 'neden': neden})[neden.notna()].reset_index(drop=True)
+    low, tedarikci = low[neden.isna()], tedarikci[neden.isna()]
+    tedarikci_id = tedarikci.map(lambda t: t['id']).astype('int64')
+    teslimat_suresi = pd.to_timedelta(tedarikci.map(lambda t: t['teslimat_suresi']).fillna(0).astype('int64'), unit='D')
+    plan = pd.DataFrame({
+        'tedarikci_id': tedarikci_id,
+        'tedarikci_adi': tedarikci.map(lambda t: t['tedarikci_adi']),
+        'kategori_eslesti': low['kategori'].astype(object).map(lambda kategori: secim[kategori][1]),
+        'urun_adi': low['isim'],
+        'miktar': low['miktar'],
+        'birim_fiyat': low['alis_fiyati'],
+        'toplam_fiyat': low['miktar'] * low['alis_fiyati'],
+        'siparis_tarihi': siparis_tarihi,
+        'teslimat_tarihi': (pd.Timestamp(siparis_tarihi) + teslimat_suresi).dt.strftime('%Y-%m-%d'),
+        'durum': "Beklemede",
+        'notlar': "Toplu yenileme - " + low['kategori'].astype(str) + " kategorisi - Düşük stok uyarısı",
+    })
+    return plan.sort_values(['tedarikci_id', 'urun_adi'], kind='mergesort').reset_index(drop=True), atlanan
+
+def replenishment_summary(plan):
+    """Planı tedarikçi başına bir satın alma siparişi olarak özetle"""
+    return plan.groupby(['tedarikci_id', 'tedarikci_adi'], as_index=False, sort=False).agg(
+        satir=('urun_adi', 'count'),
+        toplam_adet=('miktar', 'sum'),
+        toplam_tutar=('toplam_fiyat', 'sum'),
+        teslimat_tarihi=('teslimat_tarihi', 'first'),
+    )
+
+def commit_replenishment(plan):
+    """Planı tedarikçi başına bir satın alma siparişi olarak tek yazımda kaydet
+
+    Kimlikler tek blok olarak ayrılır; her siparişin numarası ilk satırının kimliğidir.
+    Kaydedilen sipariş satırlarını döndürür.
+    """
+    if plan.empty:
+        return plan
+    orders = plan.assign(id=allocate_ids("orders", len(plan)))
+    orders['siparis_no'] = orders.groupby('tedarikci_id')['id'].transform('min')
+    orders = orders[['id', 'tedarikci_id', 'urun_adi', 'miktar', 'birim_fiyat', 'toplam_fiyat',
+                     'siparis_tarihi', 'teslimat_tarihi', 'durum', 'notlar', 'siparis_no']]
+    insert_rows("orders", orders)
+    return orders
+
+# Stok politikası varsayılanları: hizmet düzeyi, sipariş başına sabit maliyet (₺),
+# yıllık elde tutma maliyeti (alış fiyatının oranı) ve tedarikçisi olmayan ürünlerin teslim süresi
+DEFAULT_SERVICE_LEVEL = 0.95
+DEFAULT_ORDER_COST = 250.0
+DEFAULT_HOLDING_RATE = 0.25
+DEFAULT_LEAD_TIME_DAYS = 7
+POLICY_WINDOW_DAYS = 90
+
+def demand_statistics(product_ids, daily_df, window_days=POLICY_WINDOW_DAYS, as_of=None):
+    """Ürünlerin pencere içindeki günlük talep ortalaması ve standart sapması
+
+    Satış olmayan günler sıfır talep sayılır; toplam ve kareler toplamı tek bir
+    groupby ile alınır. (ortalama, std, satış var mı) dizilerini döndürür.
+    """
+    n = len(product_ids)
+    if daily_df.empty or n == 0:
+        return np.zeros(n), np.zeros(n), np.zeros(n, dtype=bool)
+    tarih = pd.to_datetime(daily_df['tarih']).dt.normalize()
+    end_date = tarih.max() if as_of is None else pd.Timestamp(as_of).normalize()
+    start_date = end_date - pd.Timedelta(days=window_days - 1)
+    in_window = ((tarih >= start_date) & (tarih <= end_date)).to_numpy()
+
+    adet = daily_df['adet'].to_numpy(dtype=float)[in_window]
+    sums = pd.DataFrame({'urun_id': daily_df['urun_id'].to_numpy()[in_window], 'adet': adet, 'kare': adet * adet})
+    sums = sums.groupby('urun_id')[['adet', 'kare']].sum().reindex(product_ids).fillna(0)
+    toplam, kare = sums['adet'].to_numpy(), sums['kare'].to_numpy()
+    ortalama = toplam / window_days
+    varyans = np.clip(kare - window_days * ortalama ** 2, 0, None) / max(window_days - 1, 1)
+    return ortalama, np.sqrt(varyans), toplam > 0
+
+def inventory_policy(products_df, daily_df, index, hizmet_seviyesi=DEFAULT_SERVICE_LEVEL,
+                     siparis_maliyeti=DEFAULT_ORDER_COST, elde_tutma_orani=DEFAULT_HOLDING_RATE,
+                     window_days=POLICY_WINDOW_DAYS, as_of=None):
+    """Tüm ürünler için güvenlik stoğu, yeniden sipariş noktası ve EOQ'yu dizi işlemleriyle hesapla
+
+    Talep ortalaması ve değişkenliği ürün×gün satış özetinden, teslim süresi ürün
+    kategorisindeki en iyi aktif tedarikçiden alınır. Önerilen minimum stok yeniden
+    sipariş noktasıdır; penceresinde satışı olmayan ürünlerin mevcut minimumu korunur.
+    """
+    products = products_df.drop_duplicates('id')
+    ortalama, std, talep_var = demand_statistics(products['id'].to_numpy(), daily_df, window_days, as_of)
+
+    # Teslim süresi tekil kategoriler üzerinden seçilen tedarikçiden gelir
+    kategoriler = products['kategori'].astype(object)
+    secim = {kategori: select_best_supplier(index, kategori)[0] for kategori in kategoriler.unique()}
+    tedarikci = kategoriler.map(lambda kategori: secim[kategori])
+    teslimat = pd.to_numeric(tedarikci.map(lambda t: t['teslimat_suresi'] if t is not None else None), errors='coerce')
+    teslimat = teslimat.fillna(DEFAULT_LEAD_TIME_DAYS).to_numpy(dtype=float)
+
+    z = NormalDist().inv_cdf(hizmet_seviyesi)
+    guvenlik = z * std * np.sqrt(teslimat)
+    rop = ortalama * teslimat + guvenlik
+    # EOQ = sqrt(2·D·S / H); yıllık talep D, sipariş maliyeti S, birim yıllık elde tutma maliyeti H
+    elde_tutma = products['alis_fiyati'].to_numpy(dtype=float) * elde_tutma_orani
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eoq = np.where(elde_tutma > 0, np.sqrt(2 * ortalama * 365 * siparis_maliyeti / elde_tutma), 0.0)
+
+    mevcut = products['minimum_stok'].to_numpy()
+    return pd.DataFrame({
+        'id': products['id'].to_numpy(),
+        'isim': products['isim'].astype(str).to_numpy(),
+        'kategori': kategoriler.astype(str).to_numpy(),
+        'stok': products['stok'].to_numpy(),
+        'minimum_stok': mevcut,
+        'tedarikci_adi': tedarikci.map(lambda t: t['tedarikci_adi'] if t is not None else None).to_numpy(),
+        'teslimat_suresi': teslimat.astype('int64'),
+        'gunluk_talep': np.round(ortalama, 2),
+        'talep_std': np.round(std, 2),
+        'guvenlik_stogu': np.ceil(guvenlik).astype('int64'),
+        'yeniden_siparis_noktasi': np.ceil(rop).astype('int64'),
+        'eoq': np.ceil(eoq).astype('int64'),
+        'onerilen_minimum_stok': np.where(talep_var, np.ceil(rop), mevcut).astype('int64'),
+        'versiyon': products['versiyon'].to_numpy() if 'versiyon' in products.columns else 0,
+    })
+
+def apply_inventory_policy(politika):
+    """Değişen önerilen minimum stokları tek yazımda ürünlere geri yaz; güncellenen satır sayısını döndür
+
+    Okunduğu andaki versiyonlar gönderilir; ürün bu arada değiştiyse ConcurrentUpdateError fırlatılır.
+    """
+    degisen = politika[politika['onerilen_minimum_stok'] != politika['minimum_stok']]
+    if degisen.empty:
+        return 0
+    update_rows("products", pd.DataFrame({
+        'id': degisen['id'].to_numpy(),
+        'minimum_stok': degisen['onerilen_minimum_stok'].to_numpy(),
+        'versiyon': degisen['versiyon'].to_numpy(),
+    }))
+    return len(degisen)
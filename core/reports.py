@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from utils import cached_derived, load_data, load_sales_daily
+
+# Rapor sıklıkları: D günlük, W haftalık (pazartesi başlangıçlı), M aylık
+PNL_FREQUENCIES = ("D", "W", "M")
+
+def period_start(tarih, siklik):
+    """Tarihlerin ait olduğu dönemin başlangıcını hesapla (tekil günler üzerinden)"""
+    codes, days = pd.factorize(pd.to_datetime(tarih).dt.normalize())
+    days = pd.DatetimeIndex(days)
+    if siklik == "W":
+        days = days - pd.to_timedelta(days.weekday, unit="D")
+    elif siklik == "M":
+        days = days - pd.to_timedelta(days.day - 1, unit="D")
+    return pd.Series(days.to_numpy()[codes], index=tarih.index)
+
+def build_pnl(daily_df, products_df, siklik="M", seviye="urun"):
+    """Ürün×gün satış özetinden dönemlik gerçekleşen ciro, satılan malın maliyeti ve marjı hesapla
+
+    seviye "urun" ise ürün, "kategori" ise kategori bazında gruplanır.
+    """
+    products = products_df.drop_duplicates('id').set_index('id')
+    frame = pd.DataFrame({
+        'donem': period_start(daily_df['tarih'], siklik),
+        'urun_id': daily_df['urun_id'],
+        'adet': daily_df['adet'].astype('int64'),
+        'ciro': daily_df['ciro'],
+        'maliyet': daily_df['maliyet'],
+    })
+    if seviye == "kategori":
+        frame['kategori'] = frame['urun_id'].map(products['kategori'].astype(object)).fillna("Diğer")
+        keys = ['donem', 'kategori']
+    else:
+        keys = ['donem', 'urun_id']
+    report = frame.groupby(keys, as_index=False)[['adet', 'ciro', 'maliyet']].sum()
+    if seviye != "kategori":
+        report.insert(2, 'urun', report['urun_id'].map(products['isim']).fillna(report['urun_id'].astype(str)))
+    report['brut_kar'] = report['ciro'] - report['maliyet']
+    report['marj'] = np.where(report['ciro'] > 0, report['brut_kar'] / report['ciro'].where(report['ciro'] > 0, 1) * 100, 0.0)
+    return report
+
+def get_pnl_report(siklik="M", seviye="urun"):
+    """Depodaki ürün×gün satış özetinden dönemlik kar/zarar raporu (önbellekli)
+
+    Rapor sales_daily ve products tablolarının imzasıyla önbelleğe alınır; isabette
+    geçmiş satırlar taranmaz. Geriye dönük bir satış ya da ürün adı/kategorisi
+    değişikliği imzayı değiştirdiğinden rapor yeniden hesaplanır.
+    """
+    return cached_derived(f"pnl_report_{siklik}_{seviye}", ["sales_daily", "products"],
+                          lambda: build_pnl(load_sales_daily(), load_data(), siklik, seviye))
+
+def pnl_totals(report):
+    """Rapor satırlarını dönem toplamlarına indir"""
+    totals = report.groupby('donem', as_index=False)[['adet', 'ciro', 'maliyet', 'brut_kar']].sum()
+    totals['marj'] = np.where(totals['ciro'] > 0, totals['brut_kar'] / totals['ciro'].where(totals['ciro'] > 0, 1) * 100, 0.0)
+    return totals
@@ -0,0 +1,276 @@
+import numpy as np
+import pandas as pd
+from utils import cached_derived, load_data, load_sales, load_sales_rollup, ROLLUP_CELL
+
+def build_sales_history(df, sales_df, kategori_filter="Tümü", tarih_sirasi="En Yeni", siralama="Tarih"):
+    """Satışları ürün bilgileriyle birleştirip filtrele, sırala ve tutar/kar sütunlarını ekle"""
+    # Veri birleştirme
+    merged = sales_df.merge(df, left_on="urun_id", right_on="id", suffixes=("_satis", "_urun"))
+    
+    # Filtreleme uygula
+    if kategori_filter != "Tümü":
+        merged = merged[merged['kategori'] == kategori_filter]
+    
+    # Sıralama uygula
+    if tarih_sirasi == "En Yeni":
+        merged = merged.sort_values(by="tarih", ascending=False)
+    else:
+        merged = merged.sort_values(by="tarih", ascending=True)
+    
+    if siralama == "Tutar":
+        merged = merged.sort_values(by="fiyat", ascending=False)
+    elif siralama == "Adet":
+        merged = merged.sort_values(by="adet", ascending=False)
+    elif siralama == "Ürün":
+        merged = merged.sort_values(by="isim")
+    
+    # Görüntülenecek sütunlar
+    display_columns = ["tarih", "isim", "kategori", "adet", "fiyat", "alis_fiyati"]
+    display_df = merged[display_columns].copy()
+    
+    # Toplam tutar ve kar hesaplama
+    display_df['toplam_tutar'] = display_df['adet'] * display_df['fiyat']
+    display_df['kar_tutari'] = display_df['adet'] * (display_df['fiyat'] - display_df['alis_fiyati'])
+    display_df['kar_yuzdesi'] = ((display_df['fiyat'] - display_df['alis_fiyati']) / display_df['alis_fiyati'] * 100)
+    
+    # Sütun isimlerini düzenle
+    display_df.columns = ['Tarih', 'Ürün', 'Kategori', 'Adet', 'Satış Fiyatı (₺)', 'Alış Fiyatı (₺)', 
+                        'Toplam Tutar (₺)', 'Kar Tutarı (₺)', 'Kar Yüzdesi (%)']
+    return display_df
+
+def sales_analytics(df, daily_df, top_n=10):
+    """Ürün×gün satış özetinden kategori/ürün toplamlarını ve kar göstergelerini hesapla"""
+    # Özet zaten ürün×gün bazında; önce ürün bazında toplayıp ürün bilgisiyle birleştir
+    urun_ozet = daily_df.groupby('urun_id', as_index=False)[['adet', 'ciro', 'maliyet']].sum()
+    merged = urun_ozet.merge(df[['id', 'isim', 'kategori']], left_on="urun_id", right_on="id")
+    merged['kar_tutari'] = merged['ciro'] - merged['maliyet']
+    
+    kategori_satislari = merged.groupby('kategori', as_index=False, observed=True)[['adet', 'ciro']].sum()
+    kategori_satislari.columns = ['Kategori', 'Toplam Adet', 'Toplam Tutar']
+    
+    urun_satislari = merged.groupby('isim', as_index=False)[['adet', 'ciro']].sum()
+    urun_satislari.columns = ['Ürün', 'Toplam Adet', 'Toplam Tutar']
+    urun_satislari = urun_satislari.sort_values('Toplam Adet', ascending=False).head(top_n)
+    
+    toplam_kar = merged['kar_tutari'].sum()
+    toplam_maliyet = merged['maliyet'].sum()
+    return {
+        'kategori_satislari': kategori_satislari,
+        'urun_satislari': urun_satislari,
+        'toplam_kar': toplam_kar,
+        'ortalama_kar_yuzdesi': (toplam_kar / toplam_maliyet * 100) if toplam_maliyet > 0 else 0,
+        'en_karli_urun': merged.loc[merged['kar_tutari'].idxmax(), 'isim'] if not merged.empty else "-",
+    }
+
+def build_basket(basket_df, df):
+    """Sepet satırlarını ürün bilgileriyle birleştirip tutar, kar ve stok yeterliliğini hesapla
+
+    Aynı ürün birden fazla satırda olabilir; stok kontrolü ürünün sepetteki toplam adedine göre yapılır.
+    """
+    basket = basket_df.merge(df[['id', 'isim', 'stok', 'alis_fiyati']], left_on='urun_id', right_on='id', how='left')
+    basket['toplam_tutar'] = basket['adet'] * basket['fiyat']
+    basket['kar_tutari'] = basket['adet'] * (basket['fiyat'] - basket['alis_fiyati'])
+    sepetteki_adet = basket.groupby('urun_id')['adet'].transform('sum')
+    basket['stok_yeterli'] = basket['stok'].notna() & (sepetteki_adet <= basket['stok'])
+    return basket.drop(columns='id')
+
+# Satış geçmişi tablosunun sütun başlıkları
+HISTORY_COLUMNS = ['Tarih', 'Ürün', 'Kategori', 'Adet', 'Satış Fiyatı (₺)', 'Alış Fiyatı (₺)',
+                   'Toplam Tutar (₺)', 'Kar Tutarı (₺)', 'Kar Yüzdesi (%)']
+
+def build_sales_history_index(df, sales_df):
+    """Satış geçmişi sorguları için tarih sıralı tablo, kategori indeksleri ve önek toplamları hazırla
+
+    Birleştirme ve türetilmiş sütunlar bir kez hesaplanır; her kategori için satırların
+    tarih sıralı konumları ile tutar, kar ve kar yüzdesinin önek toplamları tutulur.
+    """
+    merged = sales_df[['id', 'urun_id', 'tarih', 'adet', 'fiyat']].merge(
+        df[['id', 'isim', 'kategori', 'alis_fiyati']].drop_duplicates('id'),
+        left_on='urun_id', right_on='id', suffixes=('', '_urun'))
+    merged['tarih'] = pd.to_datetime(merged['tarih'])
+    merged = merged.sort_values(['tarih', 'id'], kind='mergesort').reset_index(drop=True)
+    
+    adet = merged['adet'].to_numpy(dtype=float)
+    fiyat = merged['fiyat'].to_numpy(dtype=float)
+    alis = merged['alis_fiyati'].to_numpy(dtype=float)
+    toplam = adet * fiyat
+    kar = adet * (fiyat - alis)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        yuzde = np.where(alis > 0, (fiyat - alis) / alis * 100, np.nan)
+    tablo = pd.DataFrame({
+        'tarih': merged['tarih'], 'isim': merged['isim'], 'kategori': merged['kategori'],
+        'adet': merged['adet'], 'fiyat': fiyat, 'alis_fiyati': alis,
+        'toplam_tutar': toplam, 'kar_tutari': kar, 'kar_yuzdesi': yuzde,
+    })
+    
+    tarih = merged['tarih'].to_numpy()
+    gecerli = ~np.isnan(yuzde)
+    gruplar = {"Tümü": np.arange(len(merged))}
+    if not merged.empty:
+        gruplar.update({str(k): v for k, v in merged.groupby('kategori', observed=True).indices.items()})
+    
+    def group_index(konumlar):
+        def onek(values):
+            return np.concatenate([[0.0], np.cumsum(values[konumlar])])
+        return {
+            'konumlar': konumlar,
+            'tarih': tarih[konumlar],
+            'toplam_tutar': onek(toplam),
+            'kar_tutari': onek(kar),
+            'kar_yuzdesi': onek(np.where(gecerli, yuzde, 0.0)),
+            'kar_yuzdesi_adet': onek(gecerli.astype(float)),
+            'siralar': {},
+        }
+    
+    return {
+        'tablo': tablo,
+        'gruplar': {ad: group_index(konumlar) for ad, konumlar in gruplar.items()},
+        # Sıralama anahtarları (küçükten büyüğe); Tutar ve Adet büyükten küçüğe istendiği için negatif
+        'anahtarlar': {
+            'Tutar': -fiyat,
+            'Adet': -adet,
+            'Ürün': pd.factorize(merged['isim'], sort=True)[0],
+        },
+    }
+
+def _sorted_ranks(index, grup, siralama, tarih_sirasi):
+    """Grubun satırlarını (grup içi tarih sırası numarasıyla) anahtara göre sırala; sonuç önbelleğe alınır"""
+    key = (siralama, tarih_sirasi)
+    if key not in grup['siralar']:
+        sira = np.arange(len(grup['konumlar']))
+        ikincil = -sira if tarih_sirasi == "En Yeni" else sira
+        birincil = index['anahtarlar'][siralama][grup['konumlar']]
+        grup['siralar'][key] = np.lexsort((ikincil, birincil))
+    return grup['siralar'][key]
+
+def query_sales_history(index, kategori_filter="Tümü", baslangic=None, bitis=None,
+                        tarih_sirasi="En Yeni", siralama="Tarih", sayfa=1, sayfa_boyutu=50):
+    """Satış geçmişinden sadece istenen sayfayı ve filtrelenmiş özet toplamları döndür
+
+    Tarih aralığı ikili aramayla, toplamlar önek toplamlarıyla bulunur; tarih sıralı
+    sorguların maliyeti geçmişin boyutuna değil sayfa boyutuna bağlıdır.
+    """
+    grup = index['gruplar'].get(str(kategori_filter))
+    if grup is None:
+        grup = {'konumlar': np.arange(0), 'tarih': np.array([], dtype='datetime64[ns]')}
+        lo = hi = 0
+    else:
+        tarihler = grup['tarih']
+        lo = np.searchsorted(tarihler, np.datetime64(pd.Timestamp(baslangic)), 'left') if baslangic is not None else 0
+        hi = (np.searchsorted(tarihler, np.datetime64(pd.Timestamp(bitis) + pd.Timedelta(days=1)), 'left')
+              if bitis is not None else len(tarihler))
+        hi = max(hi, lo)
+    
+    adet = hi - lo
+    baslangic_no = (max(int(sayfa), 1) - 1) * sayfa_boyutu
+    if siralama == "Tarih" or adet == 0:
+        if tarih_sirasi == "En Yeni":
+            secilen = np.arange(hi - 1 - baslangic_no, max(hi - 1 - baslangic_no - sayfa_boyutu, lo - 1), -1)
+        else:
+            secilen = np.arange(lo + baslangic_no, min(lo + baslangic_no + sayfa_boyutu, hi))
+    else:
+        sira = _sorted_ranks(index, grup, siralama, tarih_sirasi)
+        if lo > 0 or hi < len(grup['konumlar']):
+            sira = sira[(sira >= lo) & (sira < hi)]
+        secilen = sira[baslangic_no:baslangic_no + sayfa_boyutu]
+    
+    sayfa_df = index['tablo'].iloc[grup['konumlar'][secilen]].reset_index(drop=True)
+    sayfa_df.columns = HISTORY_COLUMNS
+    
+    def toplam(col):
+        return float(grup[col][hi] - grup[col][lo]) if adet else 0.0
+    yuzde_adet = toplam('kar_yuzdesi_adet')
+    return {
+        'sayfa': sayfa_df,
+        'toplam_satis': int(adet),
+        'sayfa_sayisi': max((adet - 1) // sayfa_boyutu + 1, 1),
+        'toplam_tutar': toplam('toplam_tutar'),
+        'toplam_kar': toplam('kar_tutari'),
+        'ortalama_kar_yuzdesi': toplam('kar_yuzdesi') / yuzde_adet if yuzde_adet else 0.0,
+    }
+
+def get_sales_history_index():
+    """Satış geçmişi indeksini satış ve ürün verileri değişene kadar önbellekten döndür"""
+    return cached_derived("sales_history_index", ["sales", "products"],
+                          lambda: build_sales_history_index(load_data(), load_sales()))
+
+def build_rollup_index(cube):
+    """Özet küpünü (seviye, dönem türü, dönem) hücrelerine ayır
+
+    Her hücre sıra numarasına göre dizilidir ve kategori/ürün kimliğiyle indekslenir;
+    böylece tek bir değerin okunması ve ilk N ürünün alınması hücre boyutundan bağımsızdır.
+    """
+    index = {}
+    for (seviye, donem_turu, donem), hucre in cube.groupby(ROLLUP_CELL, observed=True, sort=False):
+        anahtar = 'kategori' if seviye == 'kategori' else 'urun_id'
+        index[(seviye, donem_turu, donem)] = hucre.sort_values('sira').set_index(anahtar, drop=False)
+    return index
+
+def get_rollup_index():
+    """Özet küpü indeksini küp değişene kadar önbellekten döndür"""
+    return cached_derived("sales_rollup_index", ["sales_rollup"], lambda: build_rollup_index(load_sales_rollup()))
+
+def rollup_periods(index, donem_turu):
+    """Küpte bulunan dönemleri yeniden eskiye sıralı döndür"""
+    return sorted({donem for seviye, turu, donem in index if seviye == 'kategori' and turu == donem_turu}, reverse=True)
+
+def rollup_cell(index, seviye, donem_turu, donem, anahtar):
+    """Tek bir küp hücresini (adet, ciro, maliyet, kar) döndür; yoksa None"""
+    hucre = index.get((seviye, donem_turu, donem))
+    if hucre is None or anahtar not in hucre.index:
+        return None
+    return hucre.loc[anahtar, ['adet', 'ciro', 'maliyet', 'kar']]
+
+def top_products(index, df, n=10, donem_turu="tumu", donem="tumu"):
+    """Dönemin en çok satan n ürünü (hücre önceden sıralı olduğu için sadece ilk n satır okunur)"""
+    hucre = index.get(('urun', donem_turu, donem))
+    if hucre is None:
+        return pd.DataFrame(columns=['Ürün', 'Toplam Adet', 'Toplam Tutar'])
+    ilk = hucre.head(n)
+    isimler = df.drop_duplicates('id').set_index('id')['isim']
+    return pd.DataFrame({
+        'Ürün': ilk['urun_id'].map(isimler).fillna(ilk['urun_id'].astype(str)).to_numpy(),
+        'Toplam Adet': ilk['adet'].to_numpy(),
+        'Toplam Tutar': ilk['ciro'].to_numpy(),
+    })
+
+def category_totals(index, donem_turu="tumu", donem="tumu"):
+    """Dönemin kategori toplamları"""
+    hucre = index.get(('kategori', donem_turu, donem))
+    if hucre is None:
+        return pd.DataFrame(columns=['Kategori', 'Toplam Adet', 'Toplam Tutar', 'Toplam Kar'])
+    return pd.DataFrame({
+        'Kategori': hucre['kategori'].astype(str).to_numpy(),
+        'Toplam Adet': hucre['adet'].to_numpy(),
+        'Toplam Tutar': hucre['ciro'].to_numpy(),
+        'Toplam Kar': hucre['kar'].to_numpy(),
+    })
+
+def rollup_analytics(index, df, donem_turu="tumu", donem="tumu", top_n=10):
+    """sales_analytics ile aynı göstergeleri özet küpünden hesapla"""
+    kategoriler = index.get(('kategori', donem_turu, donem))
+    urunler = index.get(('urun', donem_turu, donem))
+    toplam_kar = float(kategoriler['kar'].sum()) if kategoriler is not None else 0.0
+    toplam_maliyet = float(kategoriler['maliyet'].sum()) if kategoriler is not None else 0.0
+    en_karli = "-"
+    if urunler is not None and not urunler.empty:
+        en_karli_id = urunler['kar'].idxmax()
+        en_karli = df.drop_duplicates('id').set_index('id')['isim'].get(en_karli_id, str(en_karli_id))
+    return {
+        'kategori_satislari': category_totals(index, donem_turu, donem)[['Kategori', 'Toplam Adet', 'Toplam Tutar']],
+        'urun_satislari': top_products(index, df, top_n, donem_turu, donem),
+        'toplam_kar': toplam_kar,
+        'ortalama_kar_yuzdesi': (toplam_kar / toplam_maliyet * 100) if toplam_maliyet > 0 else 0,
+        'en_karli_urun': en_karli,
+    }
+
+def daily_category_revenue(index):
+    """Kategori bazında günlük ciro serisi (küpün kategori×gün hücrelerinden)"""
+    gunler = [hucre for (seviye, turu, _), hucre in index.items() if seviye == 'kategori' and turu == 'gun']
+    if not gunler:
+        return pd.DataFrame(columns=['tarih', 'kategori', 'ciro'])
+    seri = pd.concat(gunler, ignore_index=True)[['donem', 'kategori', 'ciro']]
+    seri = seri.rename(columns={'donem': 'tarih'})
+    seri['tarih'] = pd.to_datetime(seri['tarih'])
+    seri['kategori'] = seri['kategori'].astype(str)
+    return seri.sort_values('tarih')
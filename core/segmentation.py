@@ -0,0 +1,298 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from utils import (cached_derived, load_customers, load_customer_rfm, load_customer_segments,
+                   latest_segment_snapshot, save_segment_snapshot)
+
+def apply_ledger_rfm(customers_df, rfm_df):
+    """Satış defterinden türetilen RFM değerlerini müşteri tablosuna uygula
+
+    Müşteri tablosundaki değerler, satışlar müşteri kimliği taşımadan önceki geçmişin
+    açılış bakiyesi sayılır: alış sayısı ve harcama toplanır, son alış tarihi ikisinin
+    en yenisidir.
+    """
+    customers_df = customers_df.copy()
+    rfm = rfm_df.drop_duplicates('musteri_id').set_index('musteri_id')
+    son_defter = pd.Series(pd.to_datetime(rfm['son_satin_alma_tarihi']).reindex(customers_df['id']).to_numpy(), index=customers_df.index)
+    son_kayit = pd.to_datetime(customers_df['son_satin_alma_tarihi'])
+    customers_df['son_satin_alma_tarihi'] = son_kayit.where(son_kayit.notna() & ~(son_defter > son_kayit), son_defter)
+    customers_df['toplam_satin_alma_sayisi'] = (customers_df['toplam_satin_alma_sayisi'].fillna(0).astype('int64')
+                                                + rfm['toplam_satin_alma_sayisi'].reindex(customers_df['id']).fillna(0).to_numpy(dtype='int64'))
+    customers_df['toplam_harcama'] = customers_df['toplam_harcama'].fillna(0) + rfm['toplam_harcama'].reindex(customers_df['id']).fillna(0).to_numpy(dtype=float)
+    return customers_df
+
+# Segment kuralları sırayla denenir; ilk sağlanan kural segmenti belirler
+SEGMENTS = [
+    "VIP Müşteriler",
+    "Sadık Müşteriler",
+    "Aktif Müşteriler",
+    "Orta Seviye Müşteriler",
+    "Risk Altındaki Müşteriler",
+]
+DEFAULT_SEGMENT = "Kayıp Müşteriler"
+
+SEGMENT_RECOMMENDATIONS = {
+    "VIP Müşteriler": "🎯 VIP hizmet, özel kampanyalar, erken erişim",
+    "Sadık Müşteriler": "💎 Sadakat programı, özel indirimler",
+    "Aktif Müşteriler": "📈 Daha fazla ürün önerisi, kampanyalar",
+    "Orta Seviye Müşteriler": "📊 Kişiselleştirilmiş öneriler, e-posta kampanyaları",
+    "Risk Altındaki Müşteriler": "⚠️ Yeniden aktifleştirme kampanyaları",
+    "Kayıp Müşteriler": "🚨 Geri kazanım kampanyaları, özel teklifler",
+}
+DEFAULT_RECOMMENDATION = "📋 Genel kampanyalar"
+
+# Parçalı skorlamada bir seferde işlenen müşteri sayısı
+SEGMENT_CHUNK_SIZE = 250_000
+
+# Beşlik dilim sınırları anlık görüntüdekinden bu orandan fazla kayarsa tüm müşteriler
+# yeniden dilimlenir; kayma, sınırların eski aralığına (ilk-son sınır farkı) oranlanır
+SEGMENT_DRIFT_THRESHOLD = 0.10
+
+# Anlık görüntüde saklanan, değişiklik denetiminde karşılaştırılan girdi sütunları
+SNAPSHOT_INPUTS = ['son_satin_alma_tarihi', 'toplam_satin_alma_sayisi', 'toplam_harcama']
+SNAPSHOT_SCORES = ['R_score', 'F_score', 'M_score']
+
+def _today(today):
+    return pd.Timestamp(today) if today is not None else pd.Timestamp(datetime.now())
+
+def _recency_days(customers_df, today):
+    # Recency hesaplama (son alışverişten bu yana geçen gün)
+    return (today - pd.to_datetime(customers_df['son_satin_alma_tarihi'])).dt.days
+
+def rfm_values(customers_df, today, recency=None):
+    """Müşterilerin recency (gün), frequency ve monetary değerlerini dizi olarak döndür"""
+    recency = _recency_days(customers_df, today) if recency is None else recency
+    recency = recency.to_numpy(dtype=float, na_value=np.nan)
+    frequency = pd.to_numeric(customers_df['toplam_satin_alma_sayisi'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    monetary = pd.to_numeric(customers_df['toplam_harcama'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    return recency, frequency, monetary
+
+def _date_days(values):
+    # Tarihleri gün sayısına çevir
+    return ((pd.to_datetime(values).dt.normalize() - pd.Timestamp(0)) / pd.Timedelta(days=1)).to_numpy(dtype=float, na_value=np.nan)
+
+def _rank_values(customers_df):
+    """Sıralamada kullanılan R, F, M değer dizileri
+
+    R için son alış gününün eksisi kullanılır: recency ile aynı sırayı verir ama
+    bugünün tarihine bağlı değildir, bu yüzden skorlar ve sınırlar günden güne kaymaz.
+    """
+    return (
+        -_date_days(customers_df['son_satin_alma_tarihi']),
+        pd.to_numeric(customers_df['toplam_satin_alma_sayisi'], errors='coerce').to_numpy(dtype=float, na_value=np.nan),
+        pd.to_numeric(customers_df['toplam_harcama'], errors='coerce').to_numpy(dtype=float, na_value=np.nan),
+    )
+
+def build_rfm_reference(chunks):
+    """Tüm müşterilerin sıralı R, F, M değerlerini (beşlik dilimler için referans) oluştur
+
+    chunks müşteri çerçeveleri üreten yinelenebilir nesnedir; sadece üç sayısal
+    dizi bellekte tutulur.
+    """
+    parts = ([], [], [])
+    for chunk in chunks:
+        for part, values in zip(parts, _rank_values(chunk)):
+            part.append(values[~np.isnan(values)])
+    return tuple(np.sort(np.concatenate(part)) if part else np.array([], dtype=float) for part in parts)
+
+def rank_edges(reference):
+    """Sıralı referanstan rank_quintiles ile aynı skoru veren dört dilim sınırını çıkar
+
+    s. sınır referansın ⌊s·n/5⌋. en küçük elemanıdır (o sıra 0 ise -inf); bir değerin
+    skoru 1 + kendisinden küçük sınır sayısıdır. Boş referansta sınır yoktur.
+    """
+    n = len(reference)
+    if n == 0:
+        return np.array([], dtype=float)
+    ranks = np.arange(1, 5) * n // 5
+    return np.where(ranks > 0, np.asarray(reference, dtype=float)[np.maximum(ranks - 1, 0)], -np.inf)
+
+def rank_with_edges(values, edges):
+    """Değerleri rank_edges ile çıkarılmış sınırlara göre 1-5 arası skora çevir"""
+    values = np.asarray(values, dtype=float)
+    if len(edges) == 0:
+        return np.ones(len(values), dtype='int8')
+    scores = 1 + np.searchsorted(np.asarray(edges, dtype=float), values, side='left')
+    return np.where(np.isnan(values), 1, scores).astype('int8')
+
+def rank_quintiles(values, reference):
+    """Değerleri referanstaki sıra yüzdeliğiyle 1-5 arası skora çevir
+
+    Skor ⌈5·(k+1)/n⌉'dir: k referansta değerden küçük eleman sayısı, n referansın
+    boyutu. Eşit değerler aynı (en küçük) sırayı ve aynı skoru alır, bu yüzden tekrar
+    eden değerlerde pd.qcut gibi hata oluşmaz. Dilim sınırları qcut'ınkinden farklıdır:
+    1..7 için skorlar [1, 2, 3, 3, 4, 5, 5], qcut'ta [1, 1, 2, 3, 4, 5, 5] olur.
+    Eksik değerler ve boş referans en düşük skoru (1) alır.
+    """
+    return rank_with_edges(values, rank_edges(reference))
+
+def _scores_with_edges(customers_df, edges):
+    """R, F, M skorlarını dilim sınırlarına göre hesapla"""
+    r, f, m = _rank_values(customers_df)
+    # Recency: Düşük gün = Yüksek skor; skor eksi tarihin sırasından çevrilir
+    return {
+        'R_score': np.where(np.isnan(r), 1, 6 - rank_with_edges(r, edges['R'])).astype('int8'),
+        'F_score': rank_with_edges(f, edges['F']),
+        'M_score': rank_with_edges(m, edges['M']),
+    }
+
+def reference_edges(reference):
+    """R, F, M referanslarının dilim sınırları (anlık görüntüde saklanır)"""
+    return dict(zip(('R', 'F', 'M'), (rank_edges(part) for part in reference)))
+
+def score_rfm(customers_df, reference, today):
+    """Referans dağılıma göre R, F, M skorlarını hesapla"""
+    customers_df = customers_df.copy()
+    customers_df['recency'] = _recency_days(customers_df, today)
+    for col, scores in _scores_with_edges(customers_df, reference_edges(reference)).items():
+        customers_df[col] = scores
+    return customers_df
+
+def calculate_rfm_scores(customers_df, today=None):
+    """RFM skorlarını hesapla (1-5 arası, sıra tabanlı beşlik dilimler)"""
+    return score_rfm(customers_df, build_rfm_reference([customers_df]), _today(today))
+
+def assign_segments(r_score, f_score, m_score):
+    """R, F, M skor dizilerinden segment adlarını kurallarla vektörel olarak belirle"""
+    r_score, f_score, m_score = (np.asarray(x) for x in (r_score, f_score, m_score))
+    conditions = [
+        (r_score >= 4) & (f_score >= 4) & (m_score >= 4),
+        (r_score >= 3) & (f_score >= 3) & (m_score >= 3),
+        (r_score >= 3) & ((f_score >= 3) | (m_score >= 3)),
+        (r_score >= 2) & ((f_score >= 2) | (m_score >= 2)),
+        r_score >= 2,
+    ]
+    return np.select(conditions, SEGMENTS, default=DEFAULT_SEGMENT)
+
+def segment_customers(customers_df):
+    """Müşterileri segmentlere ayır"""
+    customers_df = customers_df.copy()
+    customers_df['Segment'] = assign_segments(customers_df['R_score'], customers_df['F_score'], customers_df['M_score'])
+    customers_df['Öneriler'] = customers_df['Segment'].map(SEGMENT_RECOMMENDATIONS).fillna(DEFAULT_RECOMMENDATION)
+    return customers_df
+
+def segment_customers_chunked(read_chunks, today=None):
+    """Çok büyük müşteri tablolarını sınırlı bellekle parça parça skorla ve segmentle
+
+    read_chunks her çağrıda müşteri parçalarını baştan üreten fonksiyondur (ör.
+    pd.read_csv(..., chunksize=SEGMENT_CHUNK_SIZE)). İlk geçişte sadece sıralı R, F, M
+    değerleri toplanır; ikinci geçişte her parça tüm müşterilere göre skorlanıp
+    döndürülür. Sonuç calculate_rfm_scores + segment_customers ile aynıdır.
+    """
+    today = _today(today)
+    reference = build_rfm_reference(read_chunks())
+    for chunk in read_chunks():
+        yield segment_customers(score_rfm(chunk, reference, today))
+
+def quintile_edges(customers_df):
+    """Müşterilerin R, F, M dilim sınırlarını anlık görüntüde saklanacak biçimde hesapla"""
+    return _edges_to_json(reference_edges(build_rfm_reference([customers_df])))
+
+def _edges_to_json(edges):
+    # JSON'da sonsuz değer olmadığı için alt sınırı olmayan dilim None olarak saklanır
+    return {name: [None if np.isinf(e) else float(e) for e in values] for name, values in edges.items()}
+
+def _edges_from_json(edges):
+    return {name: np.array([-np.inf if e is None else e for e in edges.get(name, [])], dtype=float) for name in ('R', 'F', 'M')}
+
+def edge_drift(old, new):
+    """İki sınır kümesi arasındaki en büyük göreli kayma (karşılaştırılamazsa sonsuz)"""
+    old, new = _edges_from_json(old), _edges_from_json(new)
+    drift = 0.0
+    for name in ('R', 'F', 'M'):
+        old_edges, new_edges = old[name], new[name]
+        if len(old_edges) != len(new_edges):
+            return float('inf')
+        if not len(old_edges):
+            continue
+        same = old_edges == new_edges
+        if not np.isfinite(old_edges[~same]).all() or not np.isfinite(new_edges[~same]).all():
+            return float('inf')
+        finite = old_edges[np.isfinite(old_edges)]
+        spread = finite[-1] - finite[0] if len(finite) else 0.0
+        spread = spread if spread > 0 else max(abs(finite[-1]) if len(finite) else 0.0, 1.0)
+        diff = np.abs(new_edges[~same] - old_edges[~same])
+        if len(diff):
+            drift = max(drift, float(np.max(diff)) / spread)
+    return drift
+
+def score_with_edges(customers_df, edges):
+    """Anlık görüntüde saklanan dilim sınırlarına göre R, F, M skorlarını hesapla
+
+    Sınırlar rank_edges ile çıkarıldığı için sonuç, müşterileri sınırların alındığı
+    referansla rank_quintiles üzerinden skorlamakla (tam hesaplamayla) aynıdır.
+    """
+    return _scores_with_edges(customers_df, _edges_from_json(edges))
+
+def refresh_segments(customers_df, snapshot_df, edges, threshold=SEGMENT_DRIFT_THRESHOLD, today=None):
+    """Müşterileri son anlık görüntüye göre segmentle; sadece değişen müşteriler yeniden skorlanır
+
+    Sınırlar eşiği aşacak kadar kaymışsa ya da anlık görüntü yoksa tüm müşteriler
+    yeniden dilimlenir. (segmentli müşteriler, yeniden skorlanan anlık görüntü satırları,
+    silinen müşteri kimlikleri, sınırlar, tam mı) döndürür.
+    """
+    today = _today(today)
+    new_edges = quintile_edges(customers_df)
+    tam = snapshot_df.empty or edges is None or edge_drift(edges, new_edges) > threshold
+    if tam:
+        scored = segment_customers(calculate_rfm_scores(customers_df, today))
+        changed = np.ones(len(scored), dtype=bool)
+        edges = new_edges
+    else:
+        snapshot = snapshot_df.drop_duplicates('musteri_id').set_index('musteri_id').reindex(customers_df['id'])
+        eski_tarih = _date_days(snapshot['son_satin_alma_tarihi'])
+        yeni_tarih = _date_days(customers_df['son_satin_alma_tarihi'])
+        changed = ~(snapshot.index.isin(snapshot_df['musteri_id'])
+                    & ((eski_tarih == yeni_tarih) | (np.isnan(eski_tarih) & np.isnan(yeni_tarih))))
+        for col in SNAPSHOT_INPUTS[1:]:
+            eski = snapshot[col].to_numpy(dtype=float, na_value=np.nan)
+            yeni = pd.to_numeric(customers_df[col], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            changed |= ~(np.isclose(eski, yeni) | (np.isnan(eski) & np.isnan(yeni)))
+        scored = customers_df.copy()
+        scored['recency'] = _recency_days(scored, today)
+        yeni_skorlar = score_with_edges(customers_df[changed], edges)
+        for col in SNAPSHOT_SCORES:
+            values = snapshot[col].to_numpy(dtype=float, na_value=np.nan, copy=True)
+            values[changed] = yeni_skorlar[col]
+            scored[col] = values.astype('int8')
+        # Segmentler kategori kodlarıyla birleştirilir; öneri eşlemesi sadece segment adları üzerinden yapılır
+        categories = SEGMENTS + [DEFAULT_SEGMENT]
+        codes = pd.Categorical(snapshot['Segment'], categories=categories).codes.copy()
+        yeni_segment = assign_segments(*(scored[col].to_numpy()[changed] for col in SNAPSHOT_SCORES))
+        codes[changed] = pd.Categorical(yeni_segment, categories=categories).codes
+        scored['Segment'] = pd.Categorical.from_codes(codes, categories=categories)
+        scored['Öneriler'] = scored['Segment'].map(SEGMENT_RECOMMENDATIONS).astype(object).fillna(DEFAULT_RECOMMENDATION)
+
+    removed = snapshot_df.loc[~snapshot_df['musteri_id'].isin(customers_df['id']), 'musteri_id'].tolist()
+    rows = scored.loc[changed, ['id'] + SNAPSHOT_INPUTS + SNAPSHOT_SCORES + ['Segment']].rename(columns={'id': 'musteri_id'})
+    rows['son_satin_alma_tarihi'] = pd.to_datetime(rows['son_satin_alma_tarihi']).dt.strftime('%Y-%m-%d')
+    return scored, rows, removed, edges, tam
+
+def get_customer_segments(threshold=SEGMENT_DRIFT_THRESHOLD):
+    """Defterden güncellenmiş müşterileri son anlık görüntüyle segmentle ve değişiklikleri kaydet
+
+    Sonuç müşteri ve RFM tabloları değişene kadar önbellekten döner; sayfa sadece
+    yeniden çizildiğinde hiçbir şey yeniden skorlanmaz. Skorlar tarih sıralarına bağlı
+    olduğu için gün değişince değişmez, sadece recency sütunu güncellenir.
+    """
+    def build():
+        customers = apply_ledger_rfm(load_customers(), load_customer_rfm())
+        snapshot = latest_segment_snapshot()
+        scored, rows, removed, edges, tam = refresh_segments(customers, load_customer_segments(),
+                                                             snapshot['sinirlar'] if snapshot else None, threshold)
+        if tam or len(rows) or len(removed):
+            save_segment_snapshot(rows, removed, edges, tam)
+        return scored
+    scored = cached_derived("customer_segments", ["customers", "customer_rfm"], build)
+    return scored.assign(recency=_recency_days(scored, _today(None)))
+
+def analyze_regions(customers_df):
+    """Bölge bazında müşteri sayısı, ortalama harcama ve satın alma sayısı"""
+    region_analysis = customers_df.groupby('bolge', observed=True).agg({
+        'musteri_adi': 'count',
+        'toplam_harcama': 'mean',
+        'toplam_satin_alma_sayisi': 'mean'
+    }).round(2)
+    
+    region_analysis.columns = ['Müşteri Sayısı', 'Ortalama Harcama', 'Ortalama Satın Alma']
+    return region_analysis
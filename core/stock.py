@@ -0,0 +1,44 @@
+import numpy as np
+
+def stock_status(df):
+    """Her ürün için stok durumu etiketini dizi işlemiyle hesapla"""
+    return np.where(df['stok'] <= df['minimum_stok'], '🔴 DÜŞÜK STOK', '🟢 Normal')
+
+def build_stock_report(df):
+    """Stok değerleme toplamlarını ve ürün bazında kar/zarar tablosunu hesapla"""
+    df = df.copy()
+    # Kar oranı hesapla
+    df["toplam_alis"] = df["stok"] * df["alis_fiyati"]
+    df["toplam_satis"] = df["stok"] * df["satis_fiyati"]
+    df["potansiyel_kar"] = df["toplam_satis"] - df["toplam_alis"]
+    alis = df["alis_fiyati"].where(df["alis_fiyati"] != 0)
+    df["kar_orani"] = ((df["satis_fiyati"] - alis) / alis * 100).fillna(0)
+    
+    # Toplamlar
+    ozet = {
+        "toplam_stok": df["stok"].sum(),
+        "toplam_alis": df["toplam_alis"].sum(),
+        "toplam_satis": df["toplam_satis"].sum(),
+        "toplam_kar": df["potansiyel_kar"].sum(),
+    }
+    return ozet, df
+
+def diff_frames(original, edited, key='id'):
+    """Düzenlenmiş tabloyu orijinaliyle karşılaştırıp değişen satırları bul
+    
+    (eklenen satırlar, güncellenen satırlar, silinen anahtarlar) döndürür. Sadece
+    değeri değişen satırlar güncellenmiş sayılır.
+    """
+    value_cols = [c for c in edited.columns if c in original.columns and c != key]
+    
+    is_new = edited[key].isna() | ~edited[key].isin(original[key])
+    inserted = edited[is_new]
+    kept = edited[~is_new]
+    deleted_ids = original.loc[~original[key].isin(edited[key]), key].tolist()
+    
+    before = original.drop_duplicates(key).set_index(key).loc[kept[key], value_cols]
+    after = kept.set_index(key)[value_cols]
+    same = (before == after) | (before.isna() & after.isna())
+    updated = after[~same.all(axis=1).to_numpy()].reset_index()
+    
+    return inserted, updated, deleted_ids
@@ -0,0 +1,21 @@
+def supplier_stats(suppliers_df):
+    """Tedarikçi sayısı, ortalama performans ve ortalama teslimat süresi"""
+    return {
+        'toplam_tedarikci': len(suppliers_df),
+        'ortalama_performans': suppliers_df['performans_puani'].mean(),
+        'ortalama_teslimat': suppliers_df['teslimat_suresi'].mean(),
+    }
+
+def supplier_summary(suppliers_df):
+    """Tedarikçi özet tablosu"""
+    summary_df = suppliers_df[['tedarikci_adi', 'urun_kategorileri', 'performans_puani', 'teslimat_suresi', 'aktif_durum']].copy()
+    summary_df.columns = ['Tedarikçi Adı', 'Kategoriler', 'Performans', 'Teslimat (Gün)', 'Durum']
+    summary_df['Durum'] = summary_df['Durum'].map({True: '✅ Aktif', False: '❌ Pasif'})
+    return summary_df
+
+def orders_with_suppliers(orders_df, suppliers_df):
+    """Siparişleri tedarikçi adlarıyla birleştirip gösterim tablosu oluştur"""
+    merged_df = orders_df.merge(suppliers_df[['id', 'tedarikci_adi']], left_on='tedarikci_id', right_on='id', suffixes=('', '_tedarikci'))
+    display_df = merged_df[['siparis_no', 'tedarikci_adi', 'urun_adi', 'miktar', 'birim_fiyat', 'toplam_fiyat', 'siparis_tarihi', 'teslimat_tarihi', 'durum', 'notlar']].copy()
+    display_df.columns = ['Sipariş No', 'Tedarikçi', 'Ürün', 'Miktar', 'Birim Fiyat (₺)', 'Toplam (₺)', 'Sipariş Tarihi', 'Teslimat Tarihi', 'Durum', 'Notlar']
+    return display_df
@@ -1,7 +1,7 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
-from utils import load_data, load_sales
+from utils import load_data, load_sales_daily
+from core.forecast import FORECAST_STATUSES, forecast_stock_depletion
 from modules.ai_pricing import show_ai_pricing
 
 def show_ai_predictions():
@@ -25,111 +25,65 @@ def show_stock_prediction_tab():
     st.markdown("Mevcut satış verilerine göre ürünlerin ne zaman tükeneceğini tahmin eder.")
     
     df = load_data()
-    sales_df = load_sales()
+    sales_df = load_sales_daily()
     
     if df.empty or sales_df.empty:
         st.info("Tahmin için ürün ve satış verisi gerekli.")
         return
     
-    # Her ürün için basit tahmin
-    predictions = []
-    for _, urun in df.iterrows():
-        urun_sales = sales_df[sales_df['urun_id'] == urun['id']]
-        
-        if urun_sales.empty:
-            predictions.append({
-                'urun': urun['isim'],
-                'kategori': urun['kategori'],
-                'kalan_stok': urun['stok'],
-                'minimum_stok': urun['minimum_stok'],
-                'gunluk_ortalama': 0,
-                'tahmini_gun': 'Tahmin yapılamaz',
-                'durum': '🟡 Veri Yok'
-            })
-        else:
-            # Son 30 günün ortalaması
-            daily_sales = urun_sales.groupby('tarih')['adet'].sum()
-            avg_daily = daily_sales.mean()
-            
-            if avg_daily > 0:
-                tahmini_gun = int(urun['stok'] / avg_daily)
-                
-                # Durum belirleme
-                if tahmini_gun <= 7:
-                    durum = '🔴 Acil'
-                elif tahmini_gun <= 14:
-                    durum = '🟡 Dikkat'
-                elif tahmini_gun <= 30:
-                    durum = '🟢 Normal'
-                else:
-                    durum = '🟢 Güvenli'
-                
-                predictions.append({
-                    'urun': urun['isim'],
-                    'kategori': urun['kategori'],
-                    'kalan_stok': urun['stok'],
-                    'minimum_stok': urun['minimum_stok'],
-                    'gunluk_ortalama': round(avg_daily, 2),
-                    'tahmini_gun': tahmini_gun,
-                    'durum': durum
-                })
-            else:
-                predictions.append({
-                    'urun': urun['isim'],
-                    'kategori': urun['kategori'],
-                    'kalan_stok': urun['stok'],
-                    'minimum_stok': urun['minimum_stok'],
-                    'gunluk_ortalama': 0,
-                    'tahmini_gun': 'Tahmin yapılamaz',
-                    'durum': '🟡 Veri Yok'
-                })
+    # Tahmin penceresi (son N günün ortalaması)
+    pencere = st.selectbox("Tahmin Penceresi", ["Son 30 Gün", "Son 7 Gün", "Son 14 Gün", "Son 60 Gün", "Son 90 Gün", "Tüm Geçmiş"])
+    window_days = None if pencere == "Tüm Geçmiş" else int(pencere.split()[1])
+    
+    # Tüm ürünler için tek geçişte tahmin
+    predictions = forecast_stock_depletion(df, sales_df, window_days=window_days)
     
     # Tahmin tablosu
-    if predictions:
+    if not predictions.empty:
         # Filtreleme seçenekleri
         col1, col2 = st.columns(2)
         
         with col1:
-            kategoriler = ["Tümü"] + list(set([p['kategori'] for p in predictions]))
+            kategoriler = ["Tümü"] + predictions['kategori'].unique().tolist()
             kategori_filter = st.selectbox("Kategori Filtresi", kategoriler)
         
         with col2:
-            durum_filter = st.selectbox("Durum Filtresi", ["Tümü", "🔴 Acil", "🟡 Dikkat", "🟢 Normal", "🟢 Güvenli", "🟡 Veri Yok"])
+            durum_filter = st.selectbox("Durum Filtresi", ["Tümü"] + FORECAST_STATUSES)
         
         # Filtreleme uygula
         filtered_predictions = predictions
         if kategori_filter != "Tümü":
-            filtered_predictions = [p for p in filtered_predictions if p['kategori'] == kategori_filter]
+            filtered_predictions = filtered_predictions[filtered_predictions['kategori'] == kategori_filter]
         
         if durum_filter != "Tümü":
-            filtered_predictions = [p for p in filtered_predictions if p['durum'] == durum_filter]
+            filtered_predictions = filtered_predictions[filtered_predictions['durum'] == durum_filter]
         
         # Özet istatistikler
+        durum_sayilari = predictions['durum'].value_counts()
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            acil_urunler = len([p for p in predictions if p['durum'] == '🔴 Acil'])
-            st.metric("Acil Ürünler", acil_urunler)
+            st.metric("Acil Ürünler", int(durum_sayilari['🔴 Acil']))
         
         with col2:
-            dikkat_urunler = len([p for p in predictions if p['durum'] == '🟡 Dikkat'])
-            st.metric("Dikkat Gereken", dikkat_urunler)
+            st.metric("Dikkat Gereken", int(durum_sayilari['🟡 Dikkat']))
         
         with col3:
-            normal_urunler = len([p for p in predictions if p['durum'] == '🟢 Normal'])
-            st.metric("Normal", normal_urunler)
+            st.metric("Normal", int(durum_sayilari['🟢 Normal']))
         
         with col4:
-            toplam_urun = len(predictions)
-            st.metric("Toplam Ürün", toplam_urun)
+            st.metric("Toplam Ürün", len(predictions))
         
         st.markdown("---")
         
         # Tahmin tablosu
         st.write("### 📊 Stok Tükenme Tahmini")
-        tahmin_df = pd.DataFrame(filtered_predictions)
         
-        if not tahmin_df.empty:
+        if not filtered_predictions.empty:
+            tahmin_df = filtered_predictions.drop(columns=['urun_id']).copy()
+            tahmin_df['tahmini_gun'] = tahmin_df['tahmini_gun'].astype('string').fillna('Tahmin yapılamaz')
+            tahmin_df['durum'] = tahmin_df['durum'].astype(str)
+            
             # Sütun isimlerini düzenle
             tahmin_df.columns = ['Ürün', 'Kategori', 'Kalan Stok', 'Min. Stok', 'Günlük Ortalama', 'Tahmini Gün', 'Durum']
             
@@ -146,32 +100,24 @@ def show_stock_prediction_tab():
                 else:
                     return 'background-color: #f5f5f5'
             
-            st.dataframe(tahmin_df.style.applymap(color_status, subset=['Durum']), 
+            st.dataframe(tahmin_df.style.map(color_status, subset=['Durum']), 
                         use_container_width=True, height=400)
             
             # Bar Chart: X=Ürün adı, Y=Tahmini kaç gün sonra stok tükenecek
             st.write("### 📈 Tahmini Stok Tükenme Süresi")
-            valid_preds = [p for p in filtered_predictions if isinstance(p['tahmini_gun'], int)]
+            valid_preds = filtered_predictions[filtered_predictions['tahmini_gun'].notna()]
             
-            if valid_preds:
+            if not valid_preds.empty:
                 fig = go.Figure()
                 
                 # Renk kodlaması
-                colors = []
-                for p in valid_preds:
-                    if p['durum'] == '🔴 Acil':
-                        colors.append('red')
-                    elif p['durum'] == '🟡 Dikkat':
-                        colors.append('orange')
-                    elif p['durum'] == '🟢 Normal':
-                        colors.append('green')
-                    else:
-                        colors.append('lightgreen')
+                status_colors = {'🔴 Acil': 'red', '🟡 Dikkat': 'orange', '🟢 Normal': 'green'}
+                colors = valid_preds['durum'].astype(str).map(status_colors).fillna('lightgreen').tolist()
                 
                 fig.add_trace(go.Bar(
-                    x=[p['urun'] for p in valid_preds],
-                    y=[p['tahmini_gun'] for p in valid_preds],
-                    text=[f"{p['tahmini_gun']} gün" for p in valid_preds],
+                    x=valid_preds['urun'].tolist(),
+                    y=valid_preds['tahmini_gun'].astype(int).tolist(),
+                    text=[f"{gun} gün" for gun in valid_preds['tahmini_gun']],
                     textposition='auto',
                     marker_color=colors,
                 ))
@@ -193,11 +139,11 @@ def show_stock_prediction_tab():
                 - 🟡 **Dikkat:** 8-14 gün arası
                 - 🟢 **Normal:** 15-30 gün arası
                 - 🟢 **Güvenli:** 30 günden fazla
-                - 🟡 **Veri Yok:** Satış verisi bulunamadı
+                - 🟡 **Veri Yok:** Seçilen pencerede satış verisi bulunamadı
                 """)
             else:
                 st.info("Tahmin yapılabilen ürün bulunamadı.")
         else:
             st.info("Seçilen filtrelere uygun ürün bulunamadı.")
     else:
-        st.info("Tahmin verisi bulunamadı.") 
\ No newline at end of file
+        st.info("Tahmin verisi bulunamadı.")
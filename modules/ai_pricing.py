@@ -1,158 +1,6 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-from utils import load_data, load_sales, load_customers, save_data, get_today
-
-def calculate_demand_factor(product_id, days=30):
-    """Ürünün son 30 günlük satış hızını hesapla"""
-    sales_df = load_sales()
-    products_df = load_data()
-    
-    if sales_df.empty:
-        return 1.0  # Satış verisi yoksa nötr faktör
-    
-    # Son 30 günlük satışları filtrele
-    end_date = datetime.now().date()
-    start_date = end_date - timedelta(days=days)
-    
-    product_sales = sales_df[
-        (sales_df['urun_id'] == product_id) & 
-        (pd.to_datetime(sales_df['tarih']).dt.date >= start_date) &
-        (pd.to_datetime(sales_df['tarih']).dt.date <= end_date)
-    ]
-    
-    if product_sales.empty:
-        return 1.0  # Satış yoksa nötr faktör (0.5 yerine 1.0)
-    
-    total_sales = product_sales['adet'].sum()
-    avg_daily_sales = total_sales / days
-    
-    # Talep faktörü hesaplama (0.8 - 1.5 arası - daha dengeli)
-    if avg_daily_sales == 0:
-        return 1.0  # Satış yoksa nötr faktör
-    elif avg_daily_sales <= 1:
-        return 0.9  # Düşük talep - hafif düşüş
-    elif avg_daily_sales <= 3:
-        return 1.0  # Normal talep - nötr
-    elif avg_daily_sales <= 5:
-        return 1.2  # Yüksek talep - artış
-    else:
-        return 1.4  # Çok yüksek talep - büyük artış
-
-def calculate_stock_factor(current_stock, minimum_stock):
-    """Stok seviyesine göre fiyat faktörü hesapla"""
-    if current_stock <= minimum_stock * 0.5:
-        return 1.2  # Çok düşük stok - fiyat artışı
-    elif current_stock <= minimum_stock:
-        return 1.1  # Düşük stok - hafif artış
-    elif current_stock <= minimum_stock * 2:
-        return 1.0  # Normal stok - nötr
-    elif current_stock <= minimum_stock * 5:
-        return 0.95  # Yüksek stok - çok hafif indirim
-    else:
-        return 0.9  # Çok yüksek stok - hafif indirim
-
-def calculate_seasonal_factor():
-    """Mevsimsel faktör hesapla (tekstil için)"""
-    current_month = datetime.now().month
-    
-    # Tekstil sektörü mevsimsellik faktörleri (daha dengeli)
-    seasonal_factors = {
-        1: 0.95,  # Ocak - Kış sezonu sonu
-        2: 0.9,   # Şubat - Sezon sonu indirimleri
-        3: 1.05,  # Mart - İlkbahar başlangıcı
-        4: 1.1,   # Nisan - İlkbahar sezonu
-        5: 1.05,  # Mayıs - İlkbahar devam
-        6: 1.0,   # Haziran - Yaz başlangıcı
-        7: 1.1,   # Temmuz - Yaz sezonu
-        8: 1.05,  # Ağustos - Yaz devam
-        9: 1.15,  # Eylül - Sonbahar başlangıcı
-        10: 1.1,  # Ekim - Sonbahar sezonu
-        11: 1.05, # Kasım - Kış başlangıcı
-        12: 1.0   # Aralık - Kış sezonu
-    }
-    
-    return seasonal_factors.get(current_month, 1.0)
-
-def calculate_customer_segment_factor(customer_segment):
-    """Müşteri segmentine göre fiyat faktörü"""
-    segment_factors = {
-        'Premium': 1.1,      # %10 yüksek fiyat
-        'Orta': 1.0,         # Normal fiyat
-        'Ekonomik': 0.95,    # %5 indirim
-        'Yeni': 0.97         # %3 indirim
-    }
-    
-    return segment_factors.get(customer_segment, 1.0)
-
-def calculate_ai_price(product_id, base_price, customer_segment='Orta'):
-    """AI destekli fiyat hesaplama"""
-    
-    # Temel faktörler
-    demand_factor = calculate_demand_factor(product_id)
-    seasonal_factor = calculate_seasonal_factor()
-    customer_factor = calculate_customer_segment_factor(customer_segment)
-    
-    # Ürün bilgilerini al
-    products_df = load_data()
-    product = products_df[products_df['id'] == product_id]
-    
-    if product.empty:
-        return base_price
-    
-    current_stock = product.iloc[0]['stok']
-    minimum_stock = product.iloc[0]['minimum_stok']
-    
-    # Stok faktörü
-    stock_factor = calculate_stock_factor(current_stock, minimum_stock)
-    
-    # AI fiyat hesaplama
-    ai_price = base_price * demand_factor * stock_factor * seasonal_factor * customer_factor
-    
-    # Kar marjı kontrolü (minimum %20, maksimum %50)
-    cost_price = product.iloc[0]['alis_fiyati']
-    min_price = cost_price * 1.2  # %20 kar marjı
-    max_price = cost_price * 1.5  # %50 kar marjı
-    
-    # Minimum fiyat koruması - mevcut fiyatın %90'ından düşük olamaz
-    min_price_protection = base_price * 0.9
-    min_price = max(min_price, min_price_protection)
-    
-    ai_price = max(min_price, min(ai_price, max_price))
-    
-    return round(ai_price, 2)
-
-def get_pricing_recommendations():
-    """Tüm ürünler için fiyat önerileri oluştur"""
-    products_df = load_data()
-    recommendations = []
-    
-    for _, product in products_df.iterrows():
-        current_price = product['satis_fiyati']
-        ai_price = calculate_ai_price(product['id'], current_price)
-        
-        price_change = ai_price - current_price
-        price_change_percent = (price_change / current_price * 100) if current_price > 0 else 0
-        
-        recommendation = {
-            'id': product['id'],
-            'urun_adi': product['isim'],
-            'kategori': product['kategori'],
-            'mevcut_fiyat': current_price,
-            'onerilen_fiyat': ai_price,
-            'fiyat_degisimi': price_change,
-            'fiyat_degisimi_yuzde': price_change_percent,
-            'stok': product['stok'],
-            'minimum_stok': product['minimum_stok'],
-            'alis_fiyati': product['alis_fiyati'],
-            'kar_marji_mevcut': ((current_price - product['alis_fiyati']) / product['alis_fiyati'] * 100) if product['alis_fiyati'] > 0 else 0,
-            'kar_marji_onerilen': ((ai_price - product['alis_fiyati']) / product['alis_fiyati'] * 100) if product['alis_fiyati'] > 0 else 0
-        }
-        
-        recommendations.append(recommendation)
-    
-    return pd.DataFrame(recommendations)
+from utils import update_rows
+from core.pricing import get_pricing_recommendations
 
 def show_ai_pricing():
     st.header("🤖 Stockly AI Fiyatlandırma")
@@ -238,7 +86,7 @@ def show_ai_pricing():
                 else:
                     return ''
             
-            st.dataframe(display_df.style.applymap(color_price_change, subset=['Değişim (%)']), 
+            st.dataframe(display_df.style.map(color_price_change, subset=['Değişim (%)']), 
                         use_container_width=True, height=400)
             
             # Toplu güncelleme seçenekleri
@@ -303,17 +151,9 @@ def show_ai_pricing():
 
 def apply_recommendations(recommendations_df):
     """Seçilen önerileri uygula"""
-    products_df = load_data()
-    
-    for _, rec in recommendations_df.iterrows():
-        product_id = rec['id']
-        new_price = rec['onerilen_fiyat']
-        
-        # Ürün fiyatını güncelle
-        products_df.loc[products_df['id'] == product_id, 'satis_fiyati'] = new_price
-    
     # Değişiklikleri kaydet
-    save_data(products_df)
+    # Sadece fiyatı değişen ürünler güncellenir, stok gibi alanlar ezilmez
+    update_rows("products", recommendations_df[['id', 'onerilen_fiyat']].rename(columns={'onerilen_fiyat': 'satis_fiyati'}))
     st.success(f"✅ {len(recommendations_df)} ürünün fiyatı güncellendi!")
     st.rerun()
 
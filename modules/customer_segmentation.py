@@ -1,71 +1,8 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-from utils import load_customers, save_customers
-
-def calculate_rfm_scores(customers_df):
-    """RFM skorlarını hesapla"""
-    today = datetime.now()
-    
-    # Recency hesaplama (son alışverişten bu yana geçen gün)
-    customers_df['son_satin_alma_tarihi'] = pd.to_datetime(customers_df['son_satin_alma_tarihi'])
-    customers_df['recency'] = (today - customers_df['son_satin_alma_tarihi']).dt.days
-    
-    # RFM skorları (1-5 arası)
-    # Recency: Düşük gün = Yüksek skor
-    customers_df['R_score'] = pd.qcut(customers_df['recency'], q=5, labels=[5,4,3,2,1])
-    
-    # Frequency: Yüksek sayı = Yüksek skor
-    customers_df['F_score'] = pd.qcut(customers_df['toplam_satin_alma_sayisi'], q=5, labels=[1,2,3,4,5])
-    
-    # Monetary: Yüksek harcama = Yüksek skor
-    customers_df['M_score'] = pd.qcut(customers_df['toplam_harcama'], q=5, labels=[1,2,3,4,5])
-    
-    return customers_df
-
-def segment_customers(customers_df):
-    """Müşterileri segmentlere ayır"""
-    def assign_segment(row):
-        r_score = int(row['R_score'])
-        f_score = int(row['F_score'])
-        m_score = int(row['M_score'])
-        
-        # Segmentasyon kuralları
-        if r_score >= 4 and f_score >= 4 and m_score >= 4:
-            return "VIP Müşteriler"
-        elif r_score >= 3 and f_score >= 3 and m_score >= 3:
-            return "Sadık Müşteriler"
-        elif r_score >= 3 and (f_score >= 3 or m_score >= 3):
-            return "Aktif Müşteriler"
-        elif r_score >= 2 and (f_score >= 2 or m_score >= 2):
-            return "Orta Seviye Müşteriler"
-        elif r_score >= 2:
-            return "Risk Altındaki Müşteriler"
-        else:
-            return "Kayıp Müşteriler"
-    
-    def assign_recommendations(row):
-        segment = row['Segment']
-        if segment == "VIP Müşteriler":
-            return "🎯 VIP hizmet, özel kampanyalar, erken erişim"
-        elif segment == "Sadık Müşteriler":
-            return "💎 Sadakat programı, özel indirimler"
-        elif segment == "Aktif Müşteriler":
-            return "📈 Daha fazla ürün önerisi, kampanyalar"
-        elif segment == "Orta Seviye Müşteriler":
-            return "📊 Kişiselleştirilmiş öneriler, e-posta kampanyaları"
-        elif segment == "Risk Altındaki Müşteriler":
-            return "⚠️ Yeniden aktifleştirme kampanyaları"
-        elif segment == "Kayıp Müşteriler":
-            return "🚨 Geri kazanım kampanyaları, özel teklifler"
-        else:
-            return "📋 Genel kampanyalar"
-    
-    customers_df['Segment'] = customers_df.apply(assign_segment, axis=1)
-    customers_df['Öneriler'] = customers_df.apply(assign_recommendations, axis=1)
-    return customers_df
+from utils import load_customer_rfm, latest_segment_snapshot, iter_chunks, SEGMENT_MODEL_PATH
+from core.segmentation import apply_ledger_rfm, get_customer_segments, analyze_regions, SEGMENT_CHUNK_SIZE
+from core.clustering import fit_cluster_model, predict_clusters, label_clusters, save_cluster_model, load_cluster_model
 
 def show_customer_segmentation():
     """Müşteri segmentasyonu sayfasını göster"""
@@ -73,16 +10,24 @@ def show_customer_segmentation():
     st.markdown("Müşterilerinizi analiz edin ve segmentlere ayırın.")
     st.markdown("---")
     
-    # Müşteri verilerini yükle
-    customers_df = load_customers()
+    # Müşteriler satış defterinden güncellenir ve son anlık görüntüye göre segmentlenir;
+    # sadece değişen müşteriler yeniden skorlanır
+    customers_df = get_customer_segments()
     
     if customers_df.empty:
         st.info("Müşteri verisi bulunamadı. Önce müşteri verilerini ekleyin.")
         return
     
-    # RFM analizi yap
-    customers_df = calculate_rfm_scores(customers_df)
-    customers_df = segment_customers(customers_df)
+    snapshot = latest_segment_snapshot()
+    if snapshot:
+        tur = "tam yeniden dilimleme" if snapshot['tur'] == "tam" else f"{snapshot['yeniden_skorlanan']} müşteri yeniden skorlandı"
+        st.caption(f"Segment anlık görüntüsü: {snapshot['zaman']} ({tur})")
+    
+    yontem = st.radio("Segmentasyon Yöntemi", ["Kural Tabanlı (RFM)", "Kümeleme (MiniBatchKMeans)"], horizontal=True)
+    if yontem == "Kümeleme (MiniBatchKMeans)":
+        customers_df = show_cluster_segmentation(customers_df)
+        if customers_df is None:
+            return
     
     # Müşteri listesi - Büyük tablo
     st.write("### Müşteri Listesi ve Segment Analizi")
@@ -114,6 +59,7 @@ def show_customer_segmentation():
     # Segment dağılımı
     st.write("### Segment Dağılımı")
     segment_counts = customers_df['Segment'].value_counts()
+    segment_counts = segment_counts[segment_counts > 0]
     
     col1, col2 = st.columns(2)
     
@@ -174,6 +120,7 @@ def show_customer_segmentation():
             with col3:
                 # Cinsiyet dağılımı
                 gender_counts = segment_data['cinsiyet'].value_counts()
+                gender_counts = gender_counts[gender_counts > 0]
                 st.write("**Cinsiyet Dağılımı:**")
                 for gender, count in gender_counts.items():
                     st.write(f"- {gender}: {count}")
@@ -192,16 +139,12 @@ def show_customer_segmentation():
                 st.error("⚠️ Yeniden aktifleştirme kampanyaları")
             elif segment == "Kayıp Müşteriler":
                 st.error("🚨 Geri kazanım kampanyaları, özel teklifler")
+            else:
+                st.info(segment_data['Öneriler'].iloc[0])
     
     # Bölge bazında analiz
     st.write("### Bölge Bazında Analiz")
-    region_analysis = customers_df.groupby('bolge').agg({
-        'musteri_adi': 'count',
-        'toplam_harcama': 'mean',
-        'toplam_satin_alma_sayisi': 'mean'
-    }).round(2)
-    
-    region_analysis.columns = ['Müşteri Sayısı', 'Ortalama Harcama', 'Ortalama Satın Alma']
+    region_analysis = analyze_regions(customers_df)
     
     col1, col2 = st.columns(2)
     
@@ -241,4 +184,35 @@ def show_customer_segmentation():
     
     # Bölge analiz tablosu
     st.write("### Bölge Analiz Tablosu")
-    st.dataframe(region_analysis, use_container_width=True) 
\ No newline at end of file
+    st.dataframe(region_analysis, use_container_width=True)
+
+def show_cluster_segmentation(customers_df):
+    """Kayıtlı kümeleme modeliyle müşterileri segmentle; model yoksa eğitim seçeneği göster"""
+    model = load_cluster_model(SEGMENT_MODEL_PATH)
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        kume_sayisi = st.slider("Küme Sayısı", min_value=3, max_value=8, value=len(model['sira']) if model else 5)
+    with col2:
+        egit = st.button("🔄 Modeli Eğit", type="primary" if model is None else "secondary")
+    
+    if egit:
+        # Müşteri tablosu parça parça okunur; model bir kez eğitilip kaydedilir
+        rfm_df = load_customer_rfm()
+        read_chunks = lambda: (apply_ledger_rfm(chunk, rfm_df) for chunk in iter_chunks("customers", SEGMENT_CHUNK_SIZE))
+        try:
+            with st.spinner("Kümeleme modeli eğitiliyor..."):
+                model = fit_cluster_model(read_chunks, n_clusters=kume_sayisi)
+                save_cluster_model(model, SEGMENT_MODEL_PATH)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            return None
+        st.success(f"✅ Model {model['musteri_sayisi']} müşteriyle eğitildi.")
+    
+    if model is None:
+        st.info("Henüz eğitilmiş bir kümeleme modeli yok. Küme sayısını seçip modeli eğitin.")
+        return None
+    
+    st.caption(f"Model {model['egitim_tarihi']} tarihinde {model['musteri_sayisi']} müşteriyle eğitildi; "
+               f"{len(model['sira'])} küme. Küme 1 en değerli kümedir.")
+    return label_clusters(customers_df, predict_clusters(model, customers_df))
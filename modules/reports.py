@@ -1,7 +1,8 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from utils import load_data
+from utils import load_data, load_sales_daily
+from core.stock import build_stock_report
+from core.reports import get_pnl_report, pnl_totals
 
 def show_reports():
     """Raporlar sayfasını göster"""
@@ -13,25 +14,12 @@ def show_reports():
     if df.empty:
         st.info("Raporlamak için ürün yok.")
     else:
-        # Toplamlar
-        toplam_stok = df["stok"].sum()
-        toplam_alis = (df["stok"] * df["alis_fiyati"]).sum()
-        toplam_satis = (df["stok"] * df["satis_fiyati"]).sum()
-        toplam_kar = toplam_satis - toplam_alis
-
-        st.metric("Toplam Stok", toplam_stok)
-        st.metric("Toplam Alış Maliyeti", f"{toplam_alis:.2f} ₺")
-        st.metric("Toplam Satış Potansiyeli", f"{toplam_satis:.2f} ₺")
-        st.metric("Toplam Potansiyel Kar", f"{toplam_kar:.2f} ₺")
-
-        # Kar oranı hesapla
-        df["toplam_alis"] = df["stok"] * df["alis_fiyati"]
-        df["toplam_satis"] = df["stok"] * df["satis_fiyati"]
-        df["potansiyel_kar"] = df["toplam_satis"] - df["toplam_alis"]
-        df["kar_orani"] = df.apply(
-            lambda row: ((row["satis_fiyati"] - row["alis_fiyati"]) / row["alis_fiyati"] * 100) if row["alis_fiyati"] != 0 else 0,
-            axis=1
-        )
+        ozet, df = build_stock_report(df)
+
+        st.metric("Toplam Stok", ozet["toplam_stok"])
+        st.metric("Toplam Alış Maliyeti", f"{ozet['toplam_alis']:.2f} ₺")
+        st.metric("Toplam Satış Potansiyeli", f"{ozet['toplam_satis']:.2f} ₺")
+        st.metric("Toplam Potansiyel Kar", f"{ozet['toplam_kar']:.2f} ₺")
         
         st.write("### Ürün Bazında Kar/Zarar")
         st.dataframe(df[["isim", "stok", "alis_fiyati", "satis_fiyati", "toplam_alis", "toplam_satis", "potansiyel_kar", "kar_orani"]])
@@ -56,4 +44,37 @@ def show_reports():
             color_discrete_sequence=px.colors.qualitative.Set2
         )
         fig3.update_layout(yaxis_title="Kar Oranı (%)", xaxis_title="Ürün")
-        st.plotly_chart(fig3, use_container_width=True) 
\ No newline at end of file
+        st.plotly_chart(fig3, use_container_width=True)
+
+        st.markdown("---")
+        show_pnl_report()
+
+def show_pnl_report():
+    """Satış defterinden gerçekleşen dönemlik kar/zarar raporu"""
+    st.write("### Gerçekleşen Kar/Zarar")
+    daily_df = load_sales_daily()
+    if daily_df.empty:
+        st.info("Kar/zarar raporu için satış verisi yok.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        sikliklar = {"Günlük": "D", "Haftalık": "W", "Aylık": "M"}
+        siklik = sikliklar[st.selectbox("Dönem", list(sikliklar), index=2)]
+    with col2:
+        seviyeler = {"Ürün": "urun", "Kategori": "kategori"}
+        seviye = seviyeler[st.selectbox("Kırılım", list(seviyeler), index=1)]
+
+    rapor = get_pnl_report(siklik, seviye)
+    toplamlar = pnl_totals(rapor)
+
+    fig = px.bar(toplamlar, x="donem", y=["ciro", "maliyet", "brut_kar"], barmode="group",
+                 title="Dönemlik Ciro, Satılan Malın Maliyeti ve Brüt Kar")
+    fig.update_layout(xaxis_title="Dönem", yaxis_title="₺", legend_title="")
+    st.plotly_chart(fig, use_container_width=True)
+
+    etiket = "urun" if seviye == "urun" else "kategori"
+    tablo = rapor.sort_values(["donem", "ciro"], ascending=[False, False])[["donem", etiket, "adet", "ciro", "maliyet", "brut_kar", "marj"]]
+    tablo.columns = ["Dönem", "Ürün" if seviye == "urun" else "Kategori", "Adet", "Ciro (₺)", "Maliyet (₺)", "Brüt Kar (₺)", "Marj (%)"]
+    st.dataframe(tablo, use_container_width=True, hide_index=True,
+                 column_config={"Dönem": st.column_config.DateColumn("Dönem", format="YYYY-MM-DD")}) 
\ No newline at end of file
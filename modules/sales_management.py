@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
-from utils import load_data, save_data, load_sales, save_sales, get_today
+import plotly.express as px
+from utils import load_data, load_customers, record_sales, InsufficientStockError, ConcurrentUpdateError
+from core.sales import build_basket, get_sales_history_index, query_sales_history, get_rollup_index, rollup_periods, rollup_analytics, daily_category_revenue
+from core.pos_import import import_pos_sales, POS_CHUNK_SIZE
 
 def show_sales_management():
     """Satış yönetimi sayfasını göster"""
@@ -9,21 +12,23 @@ def show_sales_management():
     st.markdown("---")
     
     df = load_data()
-    sales_df = load_sales()
     
     # Tab menüsü
-    tab1, tab2, tab3 = st.tabs(["📝 Yeni Satış", "📊 Satış Geçmişi", "📈 Satış Analizi"])
+    tab1, tab2, tab3, tab4 = st.tabs(["📝 Yeni Satış", "📊 Satış Geçmişi", "📈 Satış Analizi", "📥 Toplu İçe Aktarım"])
     
     with tab1:
-        show_new_sale_tab(df, sales_df)
+        show_new_sale_tab(df)
     
     with tab2:
-        show_sales_history_tab(df, sales_df)
+        show_sales_history_tab(df)
     
     with tab3:
-        show_sales_analytics_tab(df, sales_df)
+        show_sales_analytics_tab(df)
+    
+    with tab4:
+        show_pos_import_tab()
 
-def show_new_sale_tab(df, sales_df):
+def show_new_sale_tab(df):
     """Yeni satış ekleme sekmesi"""
     st.write("### 📝 Yeni Satış Ekle")
     
@@ -57,8 +62,8 @@ def show_new_sale_tab(df, sales_df):
                     st.metric("Kar Marjı", f"%{kar_marji:.1f}")
         
         with col2:
-            with st.form("Satış Ekle"):
-                adet = st.number_input("Satılan Adet", min_value=1, max_value=int(urun_row["stok"]) if 'urun_row' in locals() else 1, step=1)
+            with st.form("Sepete Ekle"):
+                adet = st.number_input("Satılan Adet", min_value=1, max_value=max(int(urun_row["stok"]), 1) if 'urun_row' in locals() else 1, step=1)
                 fiyat = st.number_input("Satış Fiyatı (₺)", min_value=0.0, step=0.01, format="%.2f", 
                                       value=float(urun_row["satis_fiyati"]) if 'urun_row' in locals() else 0.0)
                 
@@ -72,45 +77,87 @@ def show_new_sale_tab(df, sales_df):
                 st.metric("Kar Tutarı", f"{kar_tutari:.2f} ₺")
                 st.metric("Kar Yüzdesi", f"%{kar_yuzdesi:.1f}")
                 
-                submitted = st.form_submit_button("✅ Satışı Kaydet")
+                submitted = st.form_submit_button("🛒 Sepete Ekle")
                 
                 if submitted and 'urun_row' in locals():
-                    if adet > urun_row["stok"]:
-                        st.error("❌ Stokta yeterli ürün yok!")
-                    else:
-                        yeni_id = sales_df["id"].astype(float).max() + 1 if not sales_df.empty else 1
-                        yeni_satis = pd.DataFrame([{
-                            "id": yeni_id,
-                            "urun_id": urun_row["id"],
-                            "tarih": get_today(),
-                            "adet": adet,
-                            "fiyat": fiyat
-                        }])
-                        sales_df = pd.concat([sales_df, yeni_satis], ignore_index=True)
-                        save_sales(sales_df)
-                        
-                        # Stok azalt
-                        df.loc[df["id"] == urun_row["id"], "stok"] -= adet
-                        save_data(df)
-                        
-                        st.success(f"✅ {adet} adet {urun_sec} satışı kaydedildi!")
-                        st.info(f"💰 Toplam Tutar: {toplam_tutar:.2f} ₺")
-                        st.info(f"📈 Kar: {kar_tutari:.2f} ₺ (%{kar_yuzdesi:.1f})")
-                        st.rerun()
+                    # Satır sadece oturumdaki sepete eklenir; dosyalara fiş tamamlanınca yazılır
+                    st.session_state.setdefault("sepet", []).append({
+                        "urun_id": urun_row["id"],
+                        "adet": adet,
+                        "fiyat": fiyat,
+                        "versiyon": urun_row.get("versiyon"),
+                    })
+        
+        show_basket(df)
+
+def show_basket(df):
+    """Sepetteki satırları göster ve fişi tek işlemde kaydet"""
+    sepet = st.session_state.get("sepet", [])
+    if not sepet:
+        return
+    
+    st.markdown("---")
+    st.write("### 🧾 Sepet")
+    basket = build_basket(pd.DataFrame(sepet), df)
+    display_df = basket[['isim', 'adet', 'fiyat', 'toplam_tutar', 'kar_tutari', 'stok_yeterli']].copy()
+    display_df.columns = ['Ürün', 'Adet', 'Satış Fiyatı (₺)', 'Toplam Tutar (₺)', 'Kar Tutarı (₺)', 'Stok Yeterli']
+    st.dataframe(display_df, use_container_width=True, hide_index=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Fiş Toplamı", f"{basket['toplam_tutar'].sum():.2f} ₺")
+    with col2:
+        st.metric("Fiş Karı", f"{basket['kar_tutari'].sum():.2f} ₺")
+    
+    if not basket['stok_yeterli'].all():
+        st.error("❌ Stokta yeterli ürün yok: " + ", ".join(basket.loc[~basket['stok_yeterli'], 'isim'].dropna().unique()))
+    
+    musteri_id = select_customer()
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("✅ Satışı Tamamla", type="primary", disabled=not basket['stok_yeterli'].all()):
+            try:
+                # Tüm satırlar ve stok düşüşleri kilit altında tek işlemde yazılır
+                record_sales(pd.DataFrame(sepet).assign(musteri_id=musteri_id))
+            except InsufficientStockError:
+                st.error("❌ Stokta yeterli ürün yok!")
+            except ConcurrentUpdateError:
+                st.error("❌ Sepetteki bir ürün başka bir oturumda güncellendi. Sepeti temizleyip tekrar deneyin.")
+            else:
+                st.session_state["sepet"] = []
+                st.success(f"✅ {len(basket)} satırlık satış kaydedildi! Toplam: {basket['toplam_tutar'].sum():.2f} ₺")
+                st.rerun()
+    with col2:
+        if st.button("🗑️ Sepeti Temizle"):
+            st.session_state["sepet"] = []
+            st.rerun()
+
+def select_customer():
+    """Fişin müşterisini ara ve seç; müşterisiz satışta None döndür"""
+    customers = load_customers()
+    arama = st.text_input("Müşteri Ara", placeholder="Müşteri adı")
+    # Seçim listesi büyük müşteri tablolarında da küçük kalsın diye ilk eşleşmelerle sınırlanır
+    eslesen = customers[customers['musteri_adi'].astype(str).str.contains(arama, case=False, regex=False)] if arama else customers
+    eslesen = eslesen.head(50)
+    secenekler = [None] + eslesen['id'].tolist()
+    adlar = dict(zip(eslesen['id'], eslesen['musteri_adi']))
+    return st.selectbox("Müşteri", secenekler, format_func=lambda i: "Müşterisiz satış" if i is None else f"{adlar[i]} (#{i})")
 
-def show_sales_history_tab(df, sales_df):
+def show_sales_history_tab(df):
     """Satış geçmişi sekmesi"""
     st.write("### 📊 Satış Geçmişi")
     
-    if not sales_df.empty:
-        # Veri birleştirme
-        merged = sales_df.merge(df, left_on="urun_id", right_on="id", suffixes=("_satis", "_urun"))
-        
+    # Birleştirme ve sıralama indeksi satışlar değişene kadar tüm oturumlarca paylaşılır
+    index = get_sales_history_index()
+    tablo = index['tablo']
+    
+    if not tablo.empty:
         # Filtreleme seçenekleri
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            kategoriler = ["Tümü"] + merged['kategori'].unique().tolist()
+            kategoriler = ["Tümü"] + df['kategori'].unique().tolist()
             kategori_filter = st.selectbox("Kategori Filtresi", kategoriler)
         
         with col2:
@@ -119,111 +166,133 @@ def show_sales_history_tab(df, sales_df):
         with col3:
             siralama = st.selectbox("Sıralama", ["Tarih", "Tutar", "Adet", "Ürün"])
         
-        # Filtreleme uygula
-        if kategori_filter != "Tümü":
-            merged = merged[merged['kategori'] == kategori_filter]
-        
-        # Sıralama uygula
-        if tarih_sirasi == "En Yeni":
-            merged = merged.sort_values(by="tarih", ascending=False)
-        else:
-            merged = merged.sort_values(by="tarih", ascending=True)
-        
-        if siralama == "Tutar":
-            merged = merged.sort_values(by="fiyat", ascending=False)
-        elif siralama == "Adet":
-            merged = merged.sort_values(by="adet", ascending=False)
-        elif siralama == "Ürün":
-            merged = merged.sort_values(by="isim")
-        
-        # Görüntülenecek sütunlar
-        display_columns = ["tarih", "isim", "kategori", "adet", "fiyat", "alis_fiyati"]
-        display_df = merged[display_columns].copy()
-        
-        # Toplam tutar ve kar hesaplama
-        display_df['toplam_tutar'] = display_df['adet'] * display_df['fiyat']
-        display_df['kar_tutari'] = display_df['adet'] * (display_df['fiyat'] - display_df['alis_fiyati'])
-        display_df['kar_yuzdesi'] = ((display_df['fiyat'] - display_df['alis_fiyati']) / display_df['alis_fiyati'] * 100)
-        
-        # Sütun isimlerini düzenle
-        display_df.columns = ['Tarih', 'Ürün', 'Kategori', 'Adet', 'Satış Fiyatı (₺)', 'Alış Fiyatı (₺)', 
-                            'Toplam Tutar (₺)', 'Kar Tutarı (₺)', 'Kar Yüzdesi (%)']
-        
-        # Özet istatistikler
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            ilk_tarih, son_tarih = tablo['tarih'].iloc[0].date(), tablo['tarih'].iloc[-1].date()
+            tarih_araligi = st.date_input("Tarih Aralığı", value=(ilk_tarih, son_tarih),
+                                          min_value=ilk_tarih, max_value=son_tarih)
+            # Aralığın sadece başlangıcı seçiliyken bitiş açık bırakılır
+            baslangic = tarih_araligi[0] if len(tarih_araligi) > 0 else None
+            bitis = tarih_araligi[1] if len(tarih_araligi) > 1 else None
+        
+        with col2:
+            sayfa_boyutu = st.selectbox("Sayfa Boyutu", [25, 50, 100, 250], index=1, key="satis_sayfa_boyutu")
+        
+        sonuc = query_sales_history(index, kategori_filter, baslangic, bitis, tarih_sirasi, siralama,
+                                    sayfa=1, sayfa_boyutu=sayfa_boyutu)
+        with col3:
+            sayfa = st.number_input("Sayfa", min_value=1, max_value=sonuc['sayfa_sayisi'], value=1, step=1, key="satis_sayfa")
+        if sayfa > 1:
+            sonuc = query_sales_history(index, kategori_filter, baslangic, bitis, tarih_sirasi, siralama,
+                                        sayfa=sayfa, sayfa_boyutu=sayfa_boyutu)
+        
+        # Özet istatistikler (filtrelenmiş tüm satışlar için)
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            toplam_satis = len(display_df)
-            st.metric("Toplam Satış", toplam_satis)
+            st.metric("Toplam Satış", sonuc['toplam_satis'])
         
         with col2:
-            toplam_tutar = display_df['Toplam Tutar (₺)'].sum()
-            st.metric("Toplam Tutar", f"{toplam_tutar:.2f} ₺")
+            st.metric("Toplam Tutar", f"{sonuc['toplam_tutar']:.2f} ₺")
         
         with col3:
-            toplam_kar = display_df['Kar Tutarı (₺)'].sum()
-            st.metric("Toplam Kar", f"{toplam_kar:.2f} ₺")
+            st.metric("Toplam Kar", f"{sonuc['toplam_kar']:.2f} ₺")
         
         with col4:
-            ortalama_kar = display_df['Kar Yüzdesi (%)'].mean()
-            st.metric("Ortalama Kar %", f"%{ortalama_kar:.1f}")
+            st.metric("Ortalama Kar %", f"%{sonuc['ortalama_kar_yuzdesi']:.1f}")
         
         st.markdown("---")
         
-        # Tablo gösterimi
-        st.dataframe(display_df, use_container_width=True, height=400)
+        # Tablo gösterimi: sadece istenen sayfa
+        st.dataframe(sonuc['sayfa'], use_container_width=True, height=400, hide_index=True,
+                     column_config={'Tarih': st.column_config.DateColumn('Tarih', format='YYYY-MM-DD')})
+        st.caption(f"Sayfa {sayfa}/{sonuc['sayfa_sayisi']} - Toplam {sonuc['toplam_satis']} satış")
         
     else:
         st.info("Henüz satış kaydı yok.")
 
-def show_sales_analytics_tab(df, sales_df):
-    """Satış analizi sekmesi"""
+def show_sales_analytics_tab(df):
+    """Satış analizi sekmesi (önceden hesaplanmış satış özet küpünden)"""
     st.write("### 📈 Satış Analizi")
     
-    if not sales_df.empty:
-        merged = sales_df.merge(df, left_on="urun_id", right_on="id", suffixes=("_satis", "_urun"))
+    index = get_rollup_index()
+    if index:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            donem_turleri = {"Tümü": "tumu", "Ay": "ay", "Hafta": "hafta"}
+            donem_secimi = st.selectbox("Dönem", list(donem_turleri))
+            donem_turu = donem_turleri[donem_secimi]
+        
+        with col2:
+            donemler = rollup_periods(index, donem_turu)
+            donem = st.selectbox("Dönem Başlangıcı", donemler, disabled=donem_turu == "tumu")
+        
+        analiz = rollup_analytics(index, df, donem_turu, donem)
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.write("**Kategori Bazında Satışlar:**")
-            kategori_satislari = merged.groupby('kategori').agg({
-                'adet': 'sum',
-                'fiyat': lambda x: (x * merged.loc[x.index, 'adet']).sum()
-            }).reset_index()
-            kategori_satislari.columns = ['Kategori', 'Toplam Adet', 'Toplam Tutar']
-            st.dataframe(kategori_satislari, use_container_width=True)
+            st.dataframe(analiz['kategori_satislari'], use_container_width=True)
         
         with col2:
             st.write("**En Çok Satan Ürünler:**")
-            urun_satislari = merged.groupby('isim').agg({
-                'adet': 'sum',
-                'fiyat': lambda x: (x * merged.loc[x.index, 'adet']).sum()
-            }).reset_index()
-            urun_satislari.columns = ['Ürün', 'Toplam Adet', 'Toplam Tutar']
-            urun_satislari = urun_satislari.sort_values('Toplam Adet', ascending=False).head(10)
-            st.dataframe(urun_satislari, use_container_width=True)
+            st.dataframe(analiz['urun_satislari'], use_container_width=True)
         
         st.markdown("---")
         
         # Kar analizi
         st.write("**Kar Analizi:**")
-        merged['kar_tutari'] = merged['adet'] * (merged['fiyat'] - merged['alis_fiyati'])
-        merged['kar_yuzdesi'] = ((merged['fiyat'] - merged['alis_fiyati']) / merged['alis_fiyati'] * 100)
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            toplam_kar = merged['kar_tutari'].sum()
-            st.metric("Toplam Kar", f"{toplam_kar:.2f} ₺")
+            st.metric("Toplam Kar", f"{analiz['toplam_kar']:.2f} ₺")
         
         with col2:
-            ortalama_kar_yuzdesi = merged['kar_yuzdesi'].mean()
-            st.metric("Ortalama Kar %", f"%{ortalama_kar_yuzdesi:.1f}")
+            st.metric("Ortalama Kar %", f"%{analiz['ortalama_kar_yuzdesi']:.1f}")
         
         with col3:
-            en_karli_urun = merged.loc[merged['kar_tutari'].idxmax(), 'isim']
-            st.metric("En Karlı Ürün", en_karli_urun)
+            st.metric("En Karlı Ürün", analiz['en_karli_urun'])
+        
+        st.markdown("---")
+        
+        # Günlük kategori cirosu
+        seri = daily_category_revenue(index)
+        fig = px.line(seri, x='tarih', y='ciro', color='kategori', title="Kategori Bazında Günlük Ciro")
+        fig.update_layout(xaxis_title="Tarih", yaxis_title="Ciro (₺)")
+        st.plotly_chart(fig, use_container_width=True)
         
     else:
-        st.info("Analiz için satış verisi yok.") 
\ No newline at end of file
+        st.info("Analiz için satış verisi yok.")
+
+def show_pos_import_tab():
+    """POS satış dosyasını toplu içe aktarma sekmesi"""
+    st.write("### 📥 POS Satışlarını İçe Aktar")
+    st.caption("CSV sütunları: urun_id veya urun (ürün adı), adet, isteğe bağlı fiyat ve tarih.")
+    
+    dosya = st.file_uploader("POS Dışa Aktarım Dosyası (CSV)", type=["csv"])
+    parca_boyutu = st.number_input("Parça Boyutu (satır)", min_value=1000, value=POS_CHUNK_SIZE, step=1000)
+    
+    if dosya is not None and st.button("📥 İçe Aktar", type="primary"):
+        try:
+            with st.spinner("Satışlar içe aktarılıyor..."):
+                rapor = import_pos_sales(dosya, chunksize=int(parca_boyutu))
+        except InsufficientStockError as e:
+            st.error(f"❌ {e}. Hiçbir satış kaydedilmedi.")
+            return
+        
+        st.success(f"✅ {rapor['kaydedilen']} satış satırı kaydedildi!")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Okunan Satır", rapor['satir'])
+        with col2:
+            st.metric("Reddedilen Satır", rapor['reddedilen'])
+        with col3:
+            st.metric("Toplam Adet", rapor['toplam_adet'])
+        with col4:
+            st.metric("Hız", f"{rapor['satir_per_sn']:,.0f} satır/sn")
+        if rapor['reddedilen']:
+            st.warning("⚠️ Ürünü bulunamayan veya adedi/fiyatı geçersiz satırlar atlandı.")
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
-from utils import load_data, save_data, check_low_stock
+from utils import load_data, apply_changes, check_low_stock, ConcurrentUpdateError
+from core.stock import stock_status, diff_frames
 
 def show_stock_management():
     """Stok yönetimi sayfasını göster"""
@@ -30,13 +31,12 @@ def show_stock_management():
         
         submitted = st.form_submit_button("Ürün Ekle")
         if submitted and isim:
-            yeni_id = df["id"].max() + 1 if not df.empty else 1
             yeni_urun = pd.DataFrame([{
-                "id": yeni_id, "isim": isim, "kategori": kategori, "stok": stok,
+                "id": None, "isim": isim, "kategori": kategori, "stok": stok,
                 "alis_fiyati": alis_fiyati, "satis_fiyati": satis_fiyati, "minimum_stok": minimum_stok
             }])
-            df = pd.concat([df, yeni_urun], ignore_index=True)
-            save_data(df)
+            # Kimlik kilit altında atanır, mevcut ürünler yeniden yazılmaz
+            apply_changes("products", yeni_urun, yeni_urun.iloc[0:0], [])
             st.success(f"✅ {isim} eklendi!")
             st.rerun()
 
@@ -44,11 +44,9 @@ def show_stock_management():
     st.write("### Ürün Listesi")
     df = load_data()
     if not df.empty:
-        df['stok_durumu'] = df.apply(
-            lambda row: '🔴 DÜŞÜK STOK' if row['stok'] <= row['minimum_stok'] else '🟢 Normal',
-            axis=1
-        )
-        display_df = df[['isim', 'kategori', 'stok', 'minimum_stok', 'alis_fiyati', 'satis_fiyati', 'stok_durumu']].copy()
+        # Stok durumu sadece gösterim için hesaplanır, dosyaya yazılmaz
+        display_df = df[['isim', 'kategori', 'stok', 'minimum_stok', 'alis_fiyati', 'satis_fiyati']].copy()
+        display_df['stok_durumu'] = stock_status(display_df)
         display_df.columns = ['Ürün', 'Kategori', 'Stok', 'Min. Stok', 'Alış Fiyatı', 'Satış Fiyatı', 'Durum']
         
         # CSS ile tablo stilini düzenle
@@ -87,70 +85,64 @@ def show_stock_management():
 
     st.markdown("---")
     st.write("### Ürünleri Sil veya Güncelle")
-    if not df.empty:
-        for i, row in df.iterrows():
-            col1, col2, col3, col4, col5, col6, col7, col8 = st.columns([3, 2, 2, 2, 2, 2, 2, 2])
-            
-            with col1:
-                st.markdown(f"**{row['isim']}**")
-            
-            with col2:
-                st.markdown(f"{row['kategori']}")
-            
-            with col3:
-                st.markdown(f"{row['stok']}")
-            
-            with col4:
-                st.markdown(f"{row['alis_fiyati']} ₺")
-            
-            with col5:
-                st.markdown(f"{row['satis_fiyati']} ₺")
-            
-            with col6:
-                if row['stok'] <= row['minimum_stok']:
-                    st.markdown("🔴 **DÜŞÜK**")
-                else:
-                    st.markdown("🟢 **Normal**")
-            
-            with col7:
-                if st.button("✏️ Güncelle", key=f"guncelle_{row['id']}", type="secondary"):
-                    st.session_state.guncellenecek_id = row['id']
-                    st.rerun()
-            
-            with col8:
-                if st.button("🗑️ Sil", key=f"sil_{row['id']}", type="secondary"):
-                    df = df.drop(i)
-                    df = df.reset_index(drop=True)
-                    save_data(df)
-                    st.success(f"✅ {row['isim']} silindi!")
-                    st.rerun()
-    else:
-        st.info("Hiç ürün yok.")
+    st.caption("Hücreleri düzenleyin, satır ekleyin veya silin; tüm değişiklikler tek seferde kaydedilir.")
+    show_product_editor(df)
 
-    if "guncellenecek_id" in st.session_state:
-        guncellenecek_urun = df[df['id'] == st.session_state.guncellenecek_id].iloc[0]
-        st.markdown("---")
-        st.write("### Ürün Güncelle")
-        with st.form("Ürün Güncelle"):
-            col1, col2 = st.columns(2)
-            with col1:
-                yeni_isim = st.text_input("Ürün Adı", value=guncellenecek_urun['isim'])
-                yeni_stok = st.number_input("Stok Miktarı", min_value=0, value=int(guncellenecek_urun['stok']))
-                yeni_alis_fiyati = st.number_input("Alış Fiyatı (₺)", min_value=0.0, step=0.01, format="%.2f", value=float(guncellenecek_urun['alis_fiyati']))
-            with col2:
-                yeni_kategori = st.text_input("Kategori", value=guncellenecek_urun['kategori'])
-                yeni_minimum_stok = st.number_input("Minimum Stok", min_value=0, value=int(guncellenecek_urun['minimum_stok']))
-                yeni_satis_fiyati = st.number_input("Satış Fiyatı (₺)", min_value=0.0, step=0.01, format="%.2f", value=float(guncellenecek_urun['satis_fiyati']))
-            
-            submitted = st.form_submit_button("Güncelle")
-            if submitted:
-                df.loc[df['id'] == st.session_state.guncellenecek_id, 'isim'] = yeni_isim
-                df.loc[df['id'] == st.session_state.guncellenecek_id, 'kategori'] = yeni_kategori
-                df.loc[df['id'] == st.session_state.guncellenecek_id, 'stok'] = yeni_stok
-                df.loc[df['id'] == st.session_state.guncellenecek_id, 'alis_fiyati'] = yeni_alis_fiyati
-                df.loc[df['id'] == st.session_state.guncellenecek_id, 'satis_fiyati'] = yeni_satis_fiyati
-                df.loc[df['id'] == st.session_state.guncellenecek_id, 'minimum_stok'] = yeni_minimum_stok
-                save_data(df)
-                st.success(f"✅ {yeni_isim} güncellendi!")
-                del st.session_state.guncellenecek_id
-                st.rerun() 
\ No newline at end of file
+# Düzenleme tablosunda gösterilen sütunlar
+# versiyon gizli tutulur; kayıtta başka oturumun değişikliklerini ezmemek için kullanılır
+EDITOR_COLUMNS = ['id', 'isim', 'kategori', 'stok', 'minimum_stok', 'alis_fiyati', 'satis_fiyati', 'versiyon']
+
+def show_product_editor(df):
+    """Sayfalı, toplu düzenlenebilir ürün tablosu"""
+    col1, col2 = st.columns(2)
+    with col1:
+        sayfa_boyutu = st.selectbox("Sayfa Boyutu", [25, 50, 100, 250], index=1)
+    toplam_sayfa = max((len(df) - 1) // sayfa_boyutu + 1, 1)
+    with col2:
+        sayfa = st.number_input("Sayfa", min_value=1, max_value=toplam_sayfa, value=1, step=1)
+    
+    # Sadece görünen sayfa düzenleyiciye gönderilir
+    sayfa_df = df[EDITOR_COLUMNS].iloc[(sayfa - 1) * sayfa_boyutu:sayfa * sayfa_boyutu].reset_index(drop=True)
+    # Kategorik sütun düzenleyicide seçim kutusuna dönüşmesin, yeni kategori yazılabilsin
+    sayfa_df['kategori'] = sayfa_df['kategori'].astype(object)
+    editor_key = f"urun_duzenleyici_{sayfa}_{sayfa_boyutu}"
+    duzenlenen = st.data_editor(
+        sayfa_df,
+        key=editor_key,
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "id": st.column_config.NumberColumn("ID", disabled=True),
+            "isim": st.column_config.TextColumn("Ürün", required=True),
+            "kategori": st.column_config.TextColumn("Kategori"),
+            "stok": st.column_config.NumberColumn("Stok", min_value=0, step=1),
+            "minimum_stok": st.column_config.NumberColumn("Min. Stok", min_value=0, step=1, default=5),
+            "alis_fiyati": st.column_config.NumberColumn("Alış Fiyatı (₺)", min_value=0.0, format="%.2f"),
+            "satis_fiyati": st.column_config.NumberColumn("Satış Fiyatı (₺)", min_value=0.0, format="%.2f"),
+            "versiyon": None,
+        },
+    )
+    st.caption(f"Sayfa {sayfa}/{toplam_sayfa} - Toplam {len(df)} ürün")
+    
+    eklenen, guncellenen, silinen = diff_frames(sayfa_df, duzenlenen)
+    eklenen = eklenen[eklenen['isim'].notna() & (eklenen['isim'].astype(str).str.strip() != "")]
+    
+    if len(eklenen) or len(guncellenen) or len(silinen):
+        st.info(f"📝 Bekleyen değişiklikler: {len(eklenen)} yeni, {len(guncellenen)} güncelleme, {len(silinen)} silme")
+    
+    if st.button("💾 Değişiklikleri Kaydet", type="primary"):
+        if not (len(eklenen) or len(guncellenen) or len(silinen)):
+            st.info("Kaydedilecek değişiklik yok.")
+        else:
+            eklenen = eklenen.fillna({"stok": 0, "minimum_stok": 5, "alis_fiyati": 0.0, "satis_fiyati": 0.0})
+            try:
+                apply_changes("products", eklenen.drop(columns="versiyon"), guncellenen, silinen)
+            except ConcurrentUpdateError as e:
+                st.error(f"❌ {e}. Sayfayı yenileyip tekrar deneyin.")
+                del st.session_state[editor_key]
+                return
+            st.success(f"✅ {len(eklenen)} ürün eklendi, {len(guncellenen)} ürün güncellendi, {len(silinen)} ürün silindi!")
+            # Kaydedilen düzenlemeler yeni verinin üzerine tekrar uygulanmasın
+            del st.session_state[editor_key]
+            st.rerun()
@@ -3,7 +3,11 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from utils import load_suppliers, save_suppliers, load_orders, save_orders, load_data, get_today
+from utils import load_suppliers, delete_rows, load_orders, insert_rows, allocate_ids, load_data, load_sales_daily, get_today, ConcurrentUpdateError
+from core.replenishment import (suggest_order_quantity, get_supplier_index, find_category_suppliers, select_best_supplier, build_auto_order,
+                                 plan_replenishment, replenishment_summary, commit_replenishment,
+                                 inventory_policy, apply_inventory_policy, DEFAULT_SERVICE_LEVEL, DEFAULT_ORDER_COST, DEFAULT_HOLDING_RATE, POLICY_WINDOW_DAYS)
+from core.suppliers import supplier_stats, supplier_summary, orders_with_suppliers
 
 def show_supplier_management():
     """Tedarikçi yönetimi sayfasını göster"""
@@ -17,7 +21,7 @@ def show_supplier_management():
     products_df = load_data()
     
     # Tab menüsü
-    tab1, tab2, tab3, tab4 = st.tabs(["🏢 Tedarikçiler", "📋 Siparişler", "🚨 Otomatik Sipariş", "📊 Analiz"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["🏢 Tedarikçiler", "📋 Siparişler", "🚨 Otomatik Sipariş", "📐 Stok Politikası", "📊 Analiz"])
     
     with tab1:
         show_suppliers_tab(suppliers_df)
@@ -29,6 +33,9 @@ def show_supplier_management():
         show_auto_order_tab(products_df, suppliers_df, orders_df)
     
     with tab4:
+        show_inventory_policy_tab(products_df)
+    
+    with tab5:
         show_supplier_analytics(suppliers_df, orders_df)
 
 def show_suppliers_tab(suppliers_df):
@@ -51,15 +58,13 @@ def show_suppliers_tab(suppliers_df):
             
             submitted = st.form_submit_button("Tedarikçi Ekle")
             if submitted and tedarikci_adi:
-                yeni_id = suppliers_df["id"].max() + 1 if not suppliers_df.empty else 1
                 yeni_tedarikci = pd.DataFrame([{
-                    "id": yeni_id, "tedarikci_adi": tedarikci_adi, "telefon": telefon,
+                    "id": allocate_ids("suppliers")[0], "tedarikci_adi": tedarikci_adi, "telefon": telefon,
                     "email": email, "adres": adres, "urun_kategorileri": urun_kategorileri,
                     "teslimat_suresi": teslimat_suresi, "performans_puani": performans_puani,
                     "son_siparis_tarihi": get_today(), "aktif_durum": True  # Varsayılan olarak aktif
                 }])
-                suppliers_df = pd.concat([suppliers_df, yeni_tedarikci], ignore_index=True)
-                save_suppliers(suppliers_df)
+                insert_rows("suppliers", yeni_tedarikci)
                 st.success(f"✅ {tedarikci_adi} eklendi!")
                 st.rerun()
     
@@ -68,7 +73,7 @@ def show_suppliers_tab(suppliers_df):
         st.write("### Tedarikçi Özet Tablosu")
         
         # Her tedarikçi için satır
-        for i, row in suppliers_df.iterrows():
+        for _, row in suppliers_df.iterrows():
             col1, col2, col3, col4, col5, col6, col7 = st.columns([3, 2, 2, 2, 2, 2, 2])
             
             with col1:
@@ -92,27 +97,23 @@ def show_suppliers_tab(suppliers_df):
             with col7:
                 # Silme butonu
                 if st.button("🗑️ Sil", key=f"sil_{row['id']}", type="secondary"):
-                    suppliers_df = suppliers_df.drop(i)
-                    suppliers_df = suppliers_df.reset_index(drop=True)
-                    save_suppliers(suppliers_df)
+                    delete_rows("suppliers", [row['id']])
                     st.success(f"✅ {row['tedarikci_adi']} silindi!")
                     st.rerun()
         
         st.markdown("---")
         
         # İstatistikler
+        istatistikler = supplier_stats(suppliers_df)
         col1, col2, col3 = st.columns(3)
         with col1:
-            toplam_tedarikci = len(suppliers_df)
-            st.metric("Toplam Tedarikçi", toplam_tedarikci)
+            st.metric("Toplam Tedarikçi", istatistikler['toplam_tedarikci'])
         
         with col2:
-            ortalama_performans = suppliers_df['performans_puani'].mean()
-            st.metric("Ortalama Performans", f"{ortalama_performans:.1f}")
+            st.metric("Ortalama Performans", f"{istatistikler['ortalama_performans']:.1f}")
         
         with col3:
-            ortalama_teslimat = suppliers_df['teslimat_suresi'].mean()
-            st.metric("Ortalama Teslimat (Gün)", f"{ortalama_teslimat:.1f}")
+            st.metric("Ortalama Teslimat (Gün)", f"{istatistikler['ortalama_teslimat']:.1f}")
             
     else:
         st.info("Henüz tedarikçi yok.")
@@ -141,27 +142,26 @@ def show_orders_tab(orders_df, suppliers_df):
             
             if submitted and tedarikci_sec and urun_adi:
                 tedarikci_id = suppliers_df[suppliers_df['tedarikci_adi'] == tedarikci_sec]['id'].iloc[0]
-                yeni_id = orders_df["id"].max() + 1 if not orders_df.empty else 1
                 toplam_fiyat = miktar * birim_fiyat
                 
+                siparis_id = allocate_ids("orders")[0]
                 yeni_siparis = pd.DataFrame([{
-                    "id": yeni_id, "tedarikci_id": tedarikci_id, "urun_adi": urun_adi,
+                    "id": siparis_id, "tedarikci_id": tedarikci_id, "urun_adi": urun_adi,
                     "miktar": miktar, "birim_fiyat": birim_fiyat, "toplam_fiyat": toplam_fiyat,
                     "siparis_tarihi": get_today(), "teslimat_tarihi": teslimat_tarihi.isoformat(),
-                    "durum": durum, "notlar": notlar
+                    "durum": durum, "notlar": notlar, "siparis_no": siparis_id
                 }])
-                orders_df = pd.concat([orders_df, yeni_siparis], ignore_index=True)
-                save_orders(orders_df)
+                insert_rows("orders", yeni_siparis)
                 st.success(f"✅ {urun_adi} siparişi eklendi!")
                 st.rerun()
     
     # Sipariş listesi
     if not orders_df.empty:
         # Tedarikçi adlarını ekle
-        merged_df = orders_df.merge(suppliers_df[['id', 'tedarikci_adi']], left_on='tedarikci_id', right_on='id', suffixes=('', '_tedarikci'))
-        display_df = merged_df[['tedarikci_adi', 'urun_adi', 'miktar', 'birim_fiyat', 'toplam_fiyat', 'siparis_tarihi', 'teslimat_tarihi', 'durum', 'notlar']].copy()
-        display_df.columns = ['Tedarikçi', 'Ürün', 'Miktar', 'Birim Fiyat (₺)', 'Toplam (₺)', 'Sipariş Tarihi', 'Teslimat Tarihi', 'Durum', 'Notlar']
-        st.dataframe(display_df, use_container_width=True)
+        st.dataframe(orders_with_suppliers(orders_df, suppliers_df), use_container_width=True, column_config={
+            'Sipariş Tarihi': st.column_config.DateColumn('Sipariş Tarihi', format='YYYY-MM-DD'),
+            'Teslimat Tarihi': st.column_config.DateColumn('Teslimat Tarihi', format='YYYY-MM-DD'),
+        })
     else:
         st.info("Henüz sipariş yok.")
 
@@ -187,6 +187,12 @@ def show_auto_order_tab(products_df, suppliers_df, orders_df):
     if not low_stock_items.empty:
         st.warning("⚠️ **DÜŞÜK STOK UYARISI!** Aşağıdaki ürünler için otomatik sipariş önerisi:")
         
+        # Kategori -> aktif tedarikçi ters indeksi (puana göre sıralı), tedarikçiler değişene kadar önbellekte
+        supplier_index = get_supplier_index()
+        
+        show_bulk_replenishment(products_df, orders_df, supplier_index)
+        
+        st.write("#### Ürün Bazında Sipariş")
         for _, urun in low_stock_items.iterrows():
             with st.expander(f"📦 {urun['isim']} - Kategori: {urun['kategori']} - Stok: {urun['stok']}, Minimum: {urun['minimum_stok']}"):
                 col1, col2 = st.columns(2)
@@ -199,15 +205,13 @@ def show_auto_order_tab(products_df, suppliers_df, orders_df):
                 
                 with col2:
                     # Otomatik sipariş önerisi
-                    onerilen_miktar = (urun['minimum_stok'] - urun['stok']) * 2  # 2 katı sipariş
+                    onerilen_miktar = suggest_order_quantity(urun['stok'], urun['minimum_stok'])
                     st.write(f"**Önerilen Sipariş:** {onerilen_miktar} adet")
                     st.write(f"**Tahmini Maliyet:** {onerilen_miktar * urun['alis_fiyati']} ₺")
                     
                     # Kategori bazında tedarikçi eşleştirme
                     urun_kategorisi = urun['kategori']
-                    kategori_tedarikcileri = suppliers_df[
-                        suppliers_df['urun_kategorileri'].str.contains(urun_kategorisi, case=False, na=False)
-                    ]
+                    kategori_tedarikcileri = find_category_suppliers(supplier_index, urun_kategorisi)
                     
                     if not kategori_tedarikcileri.empty:
                         st.write(f"**📋 {urun_kategorisi} Kategorisindeki Tedarikçiler:**")
@@ -222,29 +226,22 @@ def show_auto_order_tab(products_df, suppliers_df, orders_df):
                     if st.button(f"📧 {urun['isim']} için Otomatik Sipariş Gönder", key=f"auto_order_{urun['id']}"):
                         try:
                             # Önce kategori bazında tedarikçi ara
-                            if not kategori_tedarikcileri.empty:
-                                best_supplier = kategori_tedarikcileri.sort_values('performans_puani', ascending=False).iloc[0]
+                            best_supplier, kategori_eslesti = select_best_supplier(supplier_index, urun_kategorisi)
+                            if best_supplier is None:
+                                st.error("❌ Aktif tedarikçi bulunamadı! Sipariş için en az bir tedarikçiyi aktif yapın.")
+                                return
+                            if kategori_eslesti:
                                 st.info(f"🏆 {urun_kategorisi} kategorisinden en iyi tedarikçi seçildi: {best_supplier['tedarikci_adi']} (⭐{best_supplier['performans_puani']})")
                             else:
-                                # Kategori eşleşmesi yoksa tüm tedarikçiler arasından en iyisini seç
-                                best_supplier = suppliers_df.sort_values('performans_puani', ascending=False).iloc[0]
                                 st.info(f"🏆 Genel tedarikçi seçildi: {best_supplier['tedarikci_adi']} (⭐{best_supplier['performans_puani']})")
                             
                             # Otomatik sipariş oluştur
-                            yeni_id = orders_df["id"].max() + 1 if not orders_df.empty else 1
-                            teslimat_tarihi = datetime.now().date() + timedelta(days=int(best_supplier['teslimat_suresi']))
-                            
-                            otomatik_siparis = pd.DataFrame([{
-                                "id": yeni_id, "tedarikci_id": best_supplier['id'], "urun_adi": urun['isim'],
-                                "miktar": onerilen_miktar, "birim_fiyat": urun['alis_fiyati'], 
-                                "toplam_fiyat": onerilen_miktar * urun['alis_fiyati'],
-                                "siparis_tarihi": get_today(), "teslimat_tarihi": teslimat_tarihi.isoformat(),
-                                "durum": "Beklemede", "notlar": f"Otomatik sipariş - {urun_kategorisi} kategorisi - Düşük stok uyarısı"
-                            }])
+                            siparis = build_auto_order(urun, best_supplier, allocate_ids("orders")[0], get_today())
+                            teslimat_tarihi = datetime.fromisoformat(siparis["teslimat_tarihi"])
+                            otomatik_siparis = pd.DataFrame([siparis])
                             
                             # Siparişi kaydet
-                            orders_df = pd.concat([orders_df, otomatik_siparis], ignore_index=True)
-                            save_orders(orders_df)
+                            insert_rows("orders", otomatik_siparis)
                             
                             st.success(f"✅ {urun['isim']} için otomatik sipariş gönderildi!")
                             st.info(f"📧 E-posta {best_supplier['email']} adresine gönderildi")
@@ -270,6 +267,102 @@ def show_auto_order_tab(products_df, suppliers_df, orders_df):
         st.success("✅ Tüm ürünlerin stok seviyeleri yeterli!")
         st.info("💡 **Bilgi:** Düşük stok uyarısı için ürünlerin stok miktarı minimum stok seviyesinin altına düşmeli.")
 
+def show_bulk_replenishment(products_df, orders_df, supplier_index):
+    """Tüm düşük stoklu ürünler için tedarikçi başına tek sipariş önizlemesi ve toplu kayıt"""
+    st.write("#### 📦 Toplu Yenileme")
+    acik_dahil = st.checkbox("Açık siparişi olan ürünleri de dahil et", value=False)
+    eoq_kullan = st.checkbox("Sipariş miktarında EOQ kullan", value=False,
+                             help="Miktar, ekonomik sipariş miktarı ile eksik miktarın büyüğü olur (varsayılan politika ayarlarıyla).")
+    
+    if st.button("🔍 Toplu Sipariş Önizlemesi Oluştur"):
+        politika = inventory_policy(products_df, load_sales_daily(), supplier_index) if eoq_kullan else None
+        st.session_state["yenileme_plani"] = plan_replenishment(products_df, orders_df, supplier_index, get_today(), acik_dahil, politika)
+    
+    if "yenileme_plani" not in st.session_state:
+        return
+    plan, atlanan = st.session_state["yenileme_plani"]
+    
+    if plan.empty:
+        st.info("Sipariş verilecek ürün yok.")
+    else:
+        ozet = replenishment_summary(plan)
+        # Önizleme: kaydedilecek siparişler ve sipariş listesindeki değişiklik
+        st.write(f"**{len(ozet)} satın alma siparişi, {len(plan)} satır** — sipariş satırları {len(orders_df)} → {len(orders_df) + len(plan)}")
+        ozet_df = ozet[['tedarikci_adi', 'satir', 'toplam_adet', 'toplam_tutar', 'teslimat_tarihi']].copy()
+        ozet_df.columns = ['Tedarikçi', 'Satır', 'Toplam Adet', 'Toplam Tutar (₺)', 'Teslimat Tarihi']
+        st.dataframe(ozet_df, use_container_width=True, hide_index=True)
+        with st.expander(f"➕ Eklenecek {len(plan)} sipariş satırı"):
+            satirlar = plan[['tedarikci_adi', 'urun_adi', 'miktar', 'birim_fiyat', 'toplam_fiyat', 'teslimat_tarihi', 'kategori_eslesti']].copy()
+            satirlar.columns = ['Tedarikçi', 'Ürün', 'Miktar', 'Birim Fiyat (₺)', 'Toplam (₺)', 'Teslimat Tarihi', 'Kategori Eşleşti']
+            st.dataframe(satirlar, use_container_width=True, hide_index=True)
+    
+    if not atlanan.empty:
+        with st.expander(f"⏭️ Atlanan {len(atlanan)} ürün"):
+            atlanan_df = atlanan.copy()
+            atlanan_df.columns = ['Ürün', 'Neden']
+            st.dataframe(atlanan_df, use_container_width=True, hide_index=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("✅ Siparişleri Onayla ve Kaydet", type="primary", disabled=plan.empty):
+            # Tüm satırlar tek yazımda kaydedilir
+            kaydedilen = commit_replenishment(plan)
+            del st.session_state["yenileme_plani"]
+            st.success(f"✅ {kaydedilen['siparis_no'].nunique()} satın alma siparişi ({len(kaydedilen)} satır) kaydedildi!")
+            st.rerun()
+    with col2:
+        if st.button("✖️ Önizlemeyi Kapat"):
+            del st.session_state["yenileme_plani"]
+            st.rerun()
+
+def show_inventory_policy_tab(products_df):
+    """Talep ve tedarikçi teslim süresinden yeniden sipariş noktası, güvenlik stoğu ve EOQ hesapla"""
+    st.write("### 📐 Stok Politikası")
+    st.markdown("Minimum stok, yeniden sipariş noktasına (teslim süresi boyunca beklenen talep + güvenlik stoğu) göre önerilir.")
+    
+    if products_df.empty:
+        st.info("Ürün bulunamadı.")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        hizmet_seviyesi = st.select_slider("Hizmet Düzeyi", options=[0.90, 0.95, 0.98, 0.99], value=DEFAULT_SERVICE_LEVEL,
+                                           format_func=lambda x: f"%{x * 100:.0f}")
+    with col2:
+        siparis_maliyeti = st.number_input("Sipariş Başına Maliyet (₺)", min_value=0.0, value=DEFAULT_ORDER_COST, step=50.0)
+    with col3:
+        elde_tutma_orani = st.number_input("Yıllık Elde Tutma Oranı", min_value=0.01, max_value=1.0, value=DEFAULT_HOLDING_RATE, step=0.05)
+    with col4:
+        pencere = st.selectbox("Talep Penceresi (gün)", [30, 60, 90, 180, 365], index=[30, 60, 90, 180, 365].index(POLICY_WINDOW_DAYS))
+    
+    politika = inventory_policy(products_df, load_sales_daily(), get_supplier_index(), hizmet_seviyesi,
+                                siparis_maliyeti, elde_tutma_orani, pencere)
+    degisen = politika[politika['onerilen_minimum_stok'] != politika['minimum_stok']]
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Değişecek Minimum Stok", len(degisen))
+    with col2:
+        st.metric("Yeniden Sipariş Noktasının Altında", int((politika['stok'] <= politika['yeniden_siparis_noktasi']).sum()))
+    with col3:
+        st.metric("Toplam Güvenlik Stoğu", f"{int(politika['guvenlik_stogu'].sum())} adet")
+    
+    display_df = politika[['isim', 'kategori', 'tedarikci_adi', 'teslimat_suresi', 'stok', 'gunluk_talep', 'talep_std',
+                           'guvenlik_stogu', 'yeniden_siparis_noktasi', 'eoq', 'minimum_stok', 'onerilen_minimum_stok']].copy()
+    display_df.columns = ['Ürün', 'Kategori', 'Tedarikçi', 'Teslim Süresi (gün)', 'Stok', 'Günlük Talep', 'Talep Std',
+                          'Güvenlik Stoğu', 'Yeniden Sipariş Noktası', 'EOQ', 'Mevcut Min. Stok', 'Önerilen Min. Stok']
+    st.dataframe(display_df, use_container_width=True, hide_index=True)
+    st.caption("Penceresinde satışı olmayan ürünlerin minimum stoğu korunur. Tedarikçisi olmayan ürünlerde teslim süresi varsayılan kabul edilir.")
+    
+    if st.button("💾 Önerilen Minimum Stokları Uygula", type="primary", disabled=degisen.empty):
+        try:
+            guncellenen = apply_inventory_policy(politika)
+        except ConcurrentUpdateError as e:
+            st.error(f"❌ {e}. Sayfayı yenileyip tekrar deneyin.")
+            return
+        st.success(f"✅ {guncellenen} ürünün minimum stoğu güncellendi!")
+        st.rerun()
+
 def show_supplier_analytics(suppliers_df, orders_df):
     """Tedarikçi analizi sekmesi"""
     st.write("### 📊 Tedarikçi Analizi")
@@ -301,9 +394,6 @@ def show_supplier_analytics(suppliers_df, orders_df):
         
         # Tedarikçi özeti
         st.write("### Tedarikçi Özeti")
-        summary_df = suppliers_df[['tedarikci_adi', 'urun_kategorileri', 'performans_puani', 'teslimat_suresi', 'aktif_durum']].copy()
-        summary_df.columns = ['Tedarikçi Adı', 'Kategoriler', 'Performans', 'Teslimat (Gün)', 'Durum']
-        summary_df['Durum'] = summary_df['Durum'].map({True: '✅ Aktif', False: '❌ Pasif'})
-        st.dataframe(summary_df, use_container_width=True)
+        st.dataframe(supplier_summary(suppliers_df), use_container_width=True)
     else:
         st.info("Analiz için tedarikçi verisi yok.") 
\ No newline at end of file
@@ -0,0 +1,52 @@
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils
+
+SEED_PRODUCTS = pd.DataFrame({
+    "id": [1, 2, 3],
+    "isim": ["pantolon", "gömlek", "ayakkabı"],
+    "kategori": ["Tekstil", "Tekstil", "Ayakkabı"],
+    "stok": [50, 40, 30],
+    "alis_fiyati": [100.0, 80.0, 300.0],
+    "satis_fiyati": [150.0, 120.0, 450.0],
+    "minimum_stok": [5, 5, 5],
+})
+
+SEED_SALES = pd.DataFrame({
+    "id": [1, 2, 3],
+    "urun_id": [1, 2, 1],
+    "tarih": ["2025-01-01", "2025-01-01", "2025-01-02"],
+    "adet": [2, 1, 3],
+    "fiyat": [150.0, 120.0, 150.0],
+})
+
+def reset_state():
+    """Süreç içi önbellekleri ve şema denetimini sıfırla (yeniden başlatmayı taklit eder)"""
+    utils._schema_ready.clear()
+    utils.invalidate_cache()
+
+@pytest.fixture(params=["csv", "sqlite"])
+def store(request, tmp_path, monkeypatch):
+    """Geçici dizinde örnek ürün ve satışlarla kurulmuş depo; arka uç adını döndürür"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(utils, "STORAGE_BACKEND", request.param)
+    os.makedirs("data")
+    SEED_PRODUCTS.to_csv(utils.DATA_PATH, index=False)
+    SEED_SALES.to_csv(utils.SALES_PATH, index=False)
+    if request.param == "sqlite":
+        utils.import_csv_to_sqlite()
+    reset_state()
+    utils.migrate_schema()
+    yield request.param
+    reset_state()
+
+@pytest.fixture
+def csv_store(store):
+    if store != "csv":
+        pytest.skip("sadece CSV arka ucu")
+    return store
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from core.clustering import cluster_features, fit_cluster_model, predict_clusters
+
+def make_customers(n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "son_satin_alma_tarihi": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D"),
+        "toplam_satin_alma_sayisi": rng.integers(1, 10, n),
+        "toplam_harcama": rng.integers(1, 40, n) * 25.0,
+        "yas": rng.integers(18, 70, n),
+        "bolge": rng.choice(["İstanbul", "Ankara"], n),
+        "cinsiyet": rng.choice(["Kadın", "Erkek"], n),
+    })
+
+def test_recency_is_measured_from_training_date():
+    customers = make_customers()
+    model = fit_cluster_model(lambda: iter([customers]), n_clusters=3, today="2025-03-15 17:30")
+    assert model["egitim_tarihi"] == "2025-03-15"
+
+    recency = (pd.Timestamp("2025-03-15") - customers["son_satin_alma_tarihi"]).dt.days.to_numpy(dtype=float)
+    scaler = model["scaler"]
+    np.testing.assert_allclose(cluster_features(customers, model)[:, 0], (recency - scaler.mean_[0]) / scaler.scale_[0])
+    # Eğitimdeki müşteriler tahminde de eğitimdeki kümelerine düşer
+    expected = model["sira"][model["kmeans"].predict(cluster_features(customers, model))]
+    assert predict_clusters(model, customers).tolist() == expected.tolist()
@@ -0,0 +1,43 @@
+import pandas as pd
+
+from core.forecast import forecast_stock_depletion
+
+PRODUCTS = pd.DataFrame({
+    "id": [1, 2, 3, 4, 5],
+    "isim": ["pantolon", "gömlek", "ayakkabı", "çanta", "kemer"],
+    "kategori": ["Tekstil", "Tekstil", "Ayakkabı", "Aksesuar", "Aksesuar"],
+    "stok": [20, 50, 14, 100, 5],
+    "minimum_stok": [5, 5, 5, 5, 5],
+})
+
+# Pencere 2025-01-01..10 (10 gün); pantolonun 2024-12-31 satışı pencere dışında kalır
+SALES = pd.DataFrame({
+    "urun_id": [1, 1, 1, 2, 3, 4],
+    "tarih": ["2024-12-31", "2025-01-01", "2025-01-10", "2025-01-05", "2025-01-03", "2025-01-08"],
+    "adet": [100, 5, 5, 50, 20, 10],
+})
+
+def test_forecast_averages_over_window_including_zero_sale_days():
+    forecast = forecast_stock_depletion(PRODUCTS, SALES, window_days=10, as_of="2025-01-10").set_index("urun")
+    # Satışsız günler sıfır sayılır: pantolon 2 günde 10 adet sattı, ortalama 10 / 10
+    assert forecast["gunluk_ortalama"].tolist() == [1.0, 5.0, 2.0, 1.0, 0.0]
+    assert forecast["tahmini_gun"].tolist()[:4] == [20, 10, 7, 100]
+    assert forecast.loc["kemer", "tahmini_gun"] is pd.NA
+    # Sınırlar: ≤7 acil, ≤14 dikkat, ≤30 normal, üstü güvenli; satışı yoksa veri yok
+    assert forecast["durum"].astype(str).tolist() == ["🟢 Normal", "🟡 Dikkat", "🔴 Acil", "🟢 Güvenli", "🟡 Veri Yok"]
+
+def test_forecast_window_bounds():
+    # as_of verilmezse pencere son satış gününde biter
+    assert forecast_stock_depletion(PRODUCTS, SALES, window_days=10)["gunluk_ortalama"].tolist() == [1.0, 5.0, 2.0, 1.0, 0.0]
+    # window_days=None tüm geçmişi kullanır: 2024-12-31..2025-01-10, 11 gün
+    tum = forecast_stock_depletion(PRODUCTS, SALES, window_days=None).set_index("urun")
+    assert tum.loc["pantolon", "gunluk_ortalama"] == 10.0
+    assert tum.loc["pantolon", "tahmini_gun"] == 2
+    # Pencere geçmişe kaydırılırsa sonraki satışlar sayılmaz
+    eski = forecast_stock_depletion(PRODUCTS, SALES, window_days=2, as_of="2025-01-01").set_index("urun")
+    assert eski["gunluk_ortalama"].tolist() == [52.5, 0.0, 0.0, 0.0, 0.0]
+
+def test_forecast_without_sales():
+    forecast = forecast_stock_depletion(PRODUCTS, SALES.iloc[0:0])
+    assert (forecast["durum"].astype(str) == "🟡 Veri Yok").all()
+    assert forecast["tahmini_gun"].isna().all()
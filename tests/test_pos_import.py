@@ -0,0 +1,53 @@
+import io
+import pandas as pd
+import pytest
+
+import utils
+from core.pos_import import build_product_index, import_pos_sales, map_pos_chunk
+
+POS_CSV = """urun_id,urun,adet,fiyat,tarih,musteri_id
+1,,2,140,2025-01-05,7
+99,,1,10,2025-01-05,
+,GÖMLEK,1,,2025-01-06,
+,çorap,1,20,2025-01-06,
+3,,0.5,450,2025-01-06,
+3,,2.7,450,2025-01-06,8
+,AYAKKABI,1,,,8
+2,,0,120,2025-01-07,
+3,,1,,2025-01-07,8
+"""
+
+def test_map_pos_chunk_rejects_invalid_rows(store):
+    products = utils.load_data()
+    lines, rejected = map_pos_chunk(pd.read_csv(io.StringIO(POS_CSV)), products, build_product_index(products))
+    # Bilinmeyen kimlik (99) ve isim (çorap), kesirli (0.5, 2.7) ve sıfır adet reddedilir
+    assert rejected == 5
+    assert lines["urun_id"].tolist() == [1, 2, 3, 3]
+    assert lines["adet"].tolist() == [2, 1, 1, 1]
+    # Fiyatı olmayan satırlar ürünün satış fiyatını, tarihi olmayanlar bugünü alır
+    assert lines["fiyat"].tolist() == [140.0, 120.0, 450.0, 450.0]
+    assert lines["tarih"].tolist() == ["2025-01-05", "2025-01-06", utils.get_today(), "2025-01-07"]
+    assert lines["musteri_id"].tolist()[2:] == [8, 8]
+
+def test_import_pos_sales_records_valid_rows_once(store):
+    stock_before = utils.load_data().set_index("id")["stok"].to_dict()
+    sales_before = len(utils.load_sales())
+    result = import_pos_sales(io.StringIO(POS_CSV), chunksize=3)
+    assert (result["satir"], result["kaydedilen"], result["reddedilen"]) == (9, 4, 5)
+    assert result["toplam_adet"] == 5
+
+    sales = utils.load_sales()
+    assert len(sales) == sales_before + 4
+    assert sales["id"].is_unique
+    assert sales.tail(4)["adet"].tolist() == [2, 1, 1, 1]
+    stock = utils.load_data().set_index("id")["stok"]
+    assert stock.to_dict() == {1: stock_before[1] - 2, 2: stock_before[2] - 1, 3: stock_before[3] - 2}
+    assert utils.load_customer_rfm().set_index("musteri_id").loc[8, "toplam_harcama"] == 900.0
+
+def test_import_pos_sales_insufficient_stock_writes_nothing(store):
+    stock_before = utils.load_data().set_index("id")["stok"].to_dict()
+    sales_before = len(utils.load_sales())
+    with pytest.raises(utils.InsufficientStockError):
+        import_pos_sales(io.StringIO("urun_id,adet\n1,10\n1,45\n"))
+    assert len(utils.load_sales()) == sales_before
+    assert utils.load_data().set_index("id")["stok"].to_dict() == stock_before
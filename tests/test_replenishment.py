@@ -0,0 +1,193 @@
+import math
+import re
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils
+from core.replenishment import (CATEGORY_SEPARATORS, DEFAULT_LEAD_TIME_DAYS, apply_inventory_policy, build_supplier_index,
+                                commit_replenishment, demand_statistics, inventory_policy, plan_replenishment,
+                                select_best_supplier)
+
+SIPARIS_TARIHI = "2025-02-01"
+
+def seed_suppliers():
+    utils.insert_rows("suppliers", pd.DataFrame({
+        "id": [1, 2, 3],
+        "tedarikci_adi": ["A", "B", "C"],
+        "urun_kategorileri": ["Tekstil, Aksesuar", "Ayakkabı", "Tekstil"],
+        "teslimat_suresi": [3, 5, 1],
+        "performans_puani": [4.5, 4.0, 5.0],
+        "aktif_durum": [True, True, False],
+    }))
+    return build_supplier_index(utils.load_suppliers())
+
+def low_stock_products():
+    """pantolon ve şapka (Tekstil), ayakkabı düşük stokta; gömlek tam minimumda, ceketin açık siparişi var"""
+    products = utils.load_data()
+    products.loc[products["id"] == 1, "stok"] = 2
+    products.loc[products["id"] == 2, ["stok", "minimum_stok"]] = [5, 5]
+    products.loc[products["id"] == 3, "stok"] = 1
+    extra = pd.DataFrame({"id": [4, 5], "isim": ["ceket", "şapka"], "kategori": ["Tekstil", "Tekstil"], "stok": [0, 1],
+                          "alis_fiyati": [400.0, 50.0], "satis_fiyati": [600.0, 80.0], "minimum_stok": [3, 4]})
+    return pd.concat([products, extra], ignore_index=True)
+
+def open_orders():
+    return pd.DataFrame({"urun_adi": ["ceket", "pantolon"], "durum": ["Beklemede", "Teslim Edildi"]})
+
+def test_plan_assigns_best_active_supplier_and_reports_skips(store):
+    index = seed_suppliers()
+    plan, atlanan = plan_replenishment(low_stock_products(), open_orders(), index, SIPARIS_TARIHI)
+
+    # Pasif C en yüksek puanlı olsa da seçilmez; satırlar tedarikçi ve ürüne göre sıralı
+    assert plan[["tedarikci_adi", "urun_adi", "miktar"]].values.tolist() == [
+        ["A", "pantolon", 6], ["A", "şapka", 6], ["B", "ayakkabı", 8]]
+    assert plan["teslimat_tarihi"].tolist() == ["2025-02-04", "2025-02-04", "2025-02-06"]
+    assert plan["toplam_fiyat"].tolist() == [600.0, 300.0, 2400.0]
+    assert dict(zip(atlanan["urun_adi"], atlanan["neden"])) == {
+        "gömlek": "Stok minimum seviyede, eksik yok",
+        "ceket": "Açık siparişi var",
+    }
+
+    # Açık siparişler dahil edilirse ceket de planlanır
+    plan, atlanan = plan_replenishment(low_stock_products(), open_orders(), index, SIPARIS_TARIHI, acik_siparisleri_dahil=True)
+    assert "ceket" in plan["urun_adi"].tolist()
+    assert atlanan["urun_adi"].tolist() == ["gömlek"]
+
+def test_plan_skips_products_without_active_supplier(store):
+    index = build_supplier_index(pd.DataFrame({
+        "id": [1], "tedarikci_adi": ["C"], "urun_kategorileri": ["Tekstil"], "teslimat_suresi": [1],
+        "performans_puani": [5.0], "aktif_durum": [False]}))
+    plan, atlanan = plan_replenishment(low_stock_products(), pd.DataFrame(columns=["urun_adi", "durum"]), index, SIPARIS_TARIHI)
+    assert plan.empty
+    assert set(atlanan.loc[atlanan["neden"] == "Aktif tedarikçi yok", "urun_adi"]) == {"pantolon", "ayakkabı", "ceket", "şapka"}
+
+def test_commit_writes_one_order_per_supplier(store):
+    index = seed_suppliers()
+    plan, _ = plan_replenishment(low_stock_products(), open_orders(), index, SIPARIS_TARIHI)
+    orders_before = len(utils.load_orders())
+    saved = commit_replenishment(plan)
+
+    orders = utils.load_orders()
+    assert len(orders) == orders_before + len(plan)
+    yeni = orders[orders["id"].isin(saved["id"])]
+    assert yeni["id"].is_unique
+    # Her tedarikçinin satırları tek siparişte toplanır; sipariş numarası ilk satırın kimliğidir
+    per_supplier = yeni.groupby("tedarikci_id")["siparis_no"].agg(["nunique", "first"])
+    assert per_supplier["nunique"].tolist() == [1, 1]
+    assert per_supplier["first"].tolist() == yeni.groupby("tedarikci_id")["id"].min().tolist()
+    assert yeni["siparis_no"].nunique() == 2
+    assert (yeni["durum"].astype(str) == "Beklemede").all()
+
+    assert commit_replenishment(plan.iloc[0:0]).empty
+    assert len(utils.load_orders()) == orders_before + len(plan)
+
+def policy_daily():
+    # Pencere 2025-01-01..05: pantolon için günlük talep [2, 0, 4, 0, 0]; pencere dışındaki satış sayılmaz
+    return pd.DataFrame({"urun_id": [1, 1, 1], "tarih": ["2024-12-31", "2025-01-01", "2025-01-03"], "adet": [10, 2, 4]})
+
+def test_demand_statistics_counts_zero_sale_days():
+    ortalama, std, talep_var = demand_statistics([1, 2], policy_daily(), window_days=5, as_of="2025-01-05")
+    # Ortalama 6 / 5; örneklem varyansı (0.8² + 3·1.2² + 2.8²) / 4 = 12.8 / 4
+    assert ortalama.tolist() == pytest.approx([1.2, 0.0])
+    assert std.tolist() == pytest.approx([math.sqrt(3.2), 0.0])
+    assert talep_var.tolist() == [True, False]
+
+def test_inventory_policy_formulas(store):
+    index = build_supplier_index(pd.DataFrame({
+        "id": [1], "tedarikci_adi": ["A"], "urun_kategorileri": ["Tekstil"], "teslimat_suresi": [4],
+        "performans_puani": [4.0], "aktif_durum": [True]}))
+    politika = inventory_policy(utils.load_data(), policy_daily(), index, window_days=5, as_of="2025-01-05").set_index("id")
+
+    z = NormalDist().inv_cdf(0.95)
+    guvenlik = z * math.sqrt(3.2) * math.sqrt(4)                 # z·σ·√L ≈ 5.88
+    assert politika.loc[1, "guvenlik_stogu"] == math.ceil(guvenlik) == 6
+    assert politika.loc[1, "yeniden_siparis_noktasi"] == math.ceil(1.2 * 4 + guvenlik) == 11
+    # √(2·D·S / H): D = 1.2·365, S = 250, H = 100·0.25
+    assert politika.loc[1, "eoq"] == math.ceil(math.sqrt(2 * 1.2 * 365 * 250 / 25)) == 94
+    assert politika.loc[1, "onerilen_minimum_stok"] == 11
+    # Satışı olmayan ürün mevcut minimumunu korur
+    assert politika.loc[2, ["guvenlik_stogu", "eoq", "onerilen_minimum_stok"]].tolist() == [0, 0, 5]
+
+    # Aktif tedarikçi yoksa varsayılan teslim süresi kullanılır
+    bos = build_supplier_index(pd.DataFrame(columns=["id", "tedarikci_adi", "urun_kategorileri", "teslimat_suresi",
+                                                     "performans_puani", "aktif_durum"]))
+    politika = inventory_policy(utils.load_data(), policy_daily(), bos, window_days=5, as_of="2025-01-05").set_index("id")
+    assert politika.loc[1, "teslimat_suresi"] == DEFAULT_LEAD_TIME_DAYS
+    assert politika.loc[1, "guvenlik_stogu"] == math.ceil(z * math.sqrt(3.2) * math.sqrt(DEFAULT_LEAD_TIME_DAYS))
+
+def test_apply_inventory_policy_writes_changed_minimums(store):
+    politika = inventory_policy(utils.load_data(), policy_daily(), seed_suppliers(), window_days=5, as_of="2025-01-05")
+    assert apply_inventory_policy(politika) == 1
+    products = utils.load_data().set_index("id")
+    assert products.loc[1, "minimum_stok"] == politika.set_index("id").loc[1, "onerilen_minimum_stok"]
+    assert products.loc[1, "versiyon"] == politika.set_index("id").loc[1, "versiyon"] + 1
+    assert products.loc[2, "minimum_stok"] == 5
+
+def test_apply_inventory_policy_rejects_stale_version(store):
+    politika = inventory_policy(utils.load_data(), policy_daily(), seed_suppliers(), window_days=5, as_of="2025-01-05")
+    # Politika hesaplandıktan sonra ürün başka bir oturumda satıldı
+    utils.record_sale(1, 1, 150.0)
+    with pytest.raises(utils.ConcurrentUpdateError):
+        apply_inventory_policy(politika)
+    assert utils.load_data().set_index("id").loc[1, "minimum_stok"] == 5
+
+def linear_best_supplier(suppliers, kategori):
+    """Eski doğrusal tarama: aktif tedarikçileri puana göre gezip ilk kategori eşleşmesini al"""
+    def key(metin):
+        return " ".join(str(metin).split()).replace("İ", "i").replace("ı", "i").casefold()
+    aktif = sorted((r for r in suppliers.to_dict("records") if r["aktif_durum"]),
+                   key=lambda r: (-r["performans_puani"], r["id"]))
+    for row in aktif:
+        if pd.notna(row["urun_kategorileri"]) and key(kategori) in {
+                key(t) for t in re.split(CATEGORY_SEPARATORS, row["urun_kategorileri"]) if t.strip()}:
+            return row, True
+    return (aktif[0], False) if aktif else (None, False)
+
+def test_supplier_index_tokenizes_and_casefolds_categories():
+    index = build_supplier_index(pd.DataFrame({
+        "id": [1, 2, 3, 4],
+        "tedarikci_adi": ["A", "B", "C", "D"],
+        "urun_kategorileri": ["Tekstil,Aksesuar", "İÇ GİYİM ; Takı", "ayakkabı/ Çanta |Kemer", "Tekstil"],
+        "teslimat_suresi": [3, 5, 2, 1],
+        "performans_puani": [3.0, 4.0, 2.0, 5.0],
+        "aktif_durum": [True, True, True, False],
+    }))
+    # Her ayraç bir kategori sınırıdır; boşluklar ve Türkçe İ/ı farkı eşleşmeyi bozmaz
+    for kategori, beklenen in [("aksesuar", "A"), ("iç giyim", "B"), ("TAKI", "B"), ("Ayakkabi", "C"),
+                               ("çanta", "C"), ("KEMER", "C"), ("  tekstil ", "A")]:
+        tedarikci, eslesti = select_best_supplier(index, kategori)
+        assert (tedarikci["tedarikci_adi"], eslesti) == (beklenen, True), kategori
+    # Pasif D indekste yer almaz; eşleşme yoksa genel en iyi aktif tedarikçi (B) döner
+    assert 4 not in index["satirlar"]
+    tedarikci, eslesti = select_best_supplier(index, "Elektronik")
+    assert (tedarikci["tedarikci_adi"], eslesti) == ("B", False)
+
+def test_select_best_supplier_without_active_suppliers():
+    index = build_supplier_index(pd.DataFrame({
+        "id": [1], "tedarikci_adi": ["C"], "urun_kategorileri": ["Tekstil"], "teslimat_suresi": [1],
+        "performans_puani": [5.0], "aktif_durum": [False]}))
+    assert select_best_supplier(index, "Tekstil") == (None, False)
+
+def test_select_best_supplier_matches_linear_scan():
+    rng = np.random.default_rng(7)
+    havuz = ["Tekstil", "TEKSTİL", "Ayakkabı", "AYAKKABI", "İç Giyim", "ıç gıyım", "Aksesuar", "Spor Giyim"]
+    kategoriler = []
+    for _ in range(60):
+        secim = rng.choice(havuz, size=rng.integers(1, 4), replace=False)
+        ayraclar = rng.choice([",", ";", "/", "|", " , ", " / "], size=len(secim) - 1)
+        kategoriler.append(secim[0] + "".join(a + s for a, s in zip(ayraclar, secim[1:])))
+    suppliers = pd.DataFrame({
+        "id": np.arange(1, 61),
+        "tedarikci_adi": [f"T{i}" for i in range(1, 61)],
+        "urun_kategorileri": [None if i % 17 == 0 else k for i, k in enumerate(kategoriler)],
+        "teslimat_suresi": rng.integers(1, 10, 60),
+        "performans_puani": rng.choice([3.0, 3.5, 4.0, 4.5], 60),   # eşit puanlarda kimlik sırası geçerli
+        "aktif_durum": rng.random(60) > 0.3,
+    })
+    index = build_supplier_index(suppliers)
+    for kategori in havuz + ["iç giyim", "spor  giyim", "Elektronik", ""]:
+        tedarikci, eslesti = select_best_supplier(index, kategori)
+        beklenen, beklenen_eslesti = linear_best_supplier(suppliers, kategori)
+        assert (tedarikci["id"], eslesti) == (beklenen["id"], beklenen_eslesti), kategori
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+import utils
+from core.reports import build_pnl, get_pnl_report
+
+def january(rapor):
+    """Ocak 2025 dönemi satırları, kategoriye göre"""
+    return rapor[rapor["donem"] == pd.Timestamp("2025-01-01")].set_index("kategori")
+
+def test_cache_hit_returns_same_report(store):
+    rapor = get_pnl_report("M", "kategori")
+    expected = build_pnl(utils.load_sales_daily(), utils.load_data(), "M", "kategori")
+    pd.testing.assert_frame_equal(rapor, expected)
+    assert january(rapor).loc["Tekstil", "ciro"] == pytest.approx(5 * 150.0 + 120.0)
+    assert get_pnl_report("M", "kategori") is rapor
+    # Diğer sıklık ve seviyeler ayrı anahtarlarda tutulur
+    assert len(get_pnl_report("D", "urun")) == 3
+
+@pytest.mark.parametrize("degisiklik", ["geriye_donuk_satis", "satir_duzeltme", "kategori_adi"])
+def test_editing_closed_period_invalidates_cache(store, degisiklik):
+    eski = get_pnl_report("M", "kategori")
+    if degisiklik == "geriye_donuk_satis":
+        utils.record_sales(pd.DataFrame({"urun_id": [3], "adet": [1], "fiyat": [450.0], "tarih": ["2025-01-15"]}))
+    elif degisiklik == "satir_duzeltme":
+        sales = utils.load_sales()
+        sales.loc[sales["id"] == 1, "adet"] = 4
+        utils.save_sales(sales)
+        utils.rebuild_sales_daily()
+    else:
+        utils.update_rows("products", pd.DataFrame({"id": [2], "kategori": ["Gömlek"]}))
+
+    yeni = get_pnl_report("M", "kategori")
+    assert yeni is not eski
+    pd.testing.assert_frame_equal(yeni, build_pnl(utils.load_sales_daily(), utils.load_data(), "M", "kategori"))
+    if degisiklik == "geriye_donuk_satis":
+        assert january(yeni).loc["Ayakkabı", "ciro"] == pytest.approx(450.0)
+    elif degisiklik == "satir_duzeltme":
+        assert january(yeni).loc["Tekstil", "adet"] == 8
+    else:
+        assert january(yeni).loc["Gömlek", "ciro"] == pytest.approx(120.0)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.sales import build_sales_history, build_sales_history_index, query_sales_history
+
+def make_data(n=30, seed=3):
+    """Her satışın tarihi, fiyatı, adedi ve ürünü farklı: eski sıralama eşitliklere bağlı kalmaz"""
+    rng = np.random.default_rng(seed)
+    products = pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "isim": [f"ürün {i:02d}" for i in rng.permutation(n)],
+        "kategori": pd.Categorical(np.array(["Tekstil", "Ayakkabı", "Aksesuar"])[np.arange(n) % 3]),
+        "alis_fiyati": 50.0 + np.arange(n),
+    })
+    sales = pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "urun_id": rng.permutation(n) + 1,
+        "tarih": (pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.permutation(n) * 2, unit="D")).strftime("%Y-%m-%d"),
+        "adet": rng.permutation(n) + 1,
+        "fiyat": 100.0 + 7 * rng.permutation(n),
+    })
+    return products, sales
+
+def old_history(products, sales, kategori, baslangic, bitis, tarih_sirasi, siralama):
+    """Eski yol: tarih aralığı elle süzülür, sonra tüm geçmiş birleştirilip sıralanır"""
+    tarih = pd.to_datetime(sales["tarih"])
+    if baslangic is not None:
+        sales = sales[tarih >= pd.Timestamp(baslangic)]
+    if bitis is not None:
+        sales = sales[pd.to_datetime(sales["tarih"]) <= pd.Timestamp(bitis)]
+    old = build_sales_history(products, sales, kategori, tarih_sirasi, siralama)
+    return old.assign(Tarih=pd.to_datetime(old["Tarih"]), Kategori=old["Kategori"].astype(str)).reset_index(drop=True)
+
+@pytest.mark.parametrize("siralama", ["Tarih", "Tutar", "Adet", "Ürün"])
+@pytest.mark.parametrize("tarih_sirasi", ["En Yeni", "En Eski"])
+@pytest.mark.parametrize("kategori, baslangic, bitis", [
+    ("Tümü", None, None),
+    ("Ayakkabı", None, None),
+    ("Tümü", "2025-01-11", "2025-02-04"),   # sınır günleri dahil
+    ("Tekstil", "2025-01-20", None),
+    ("Aksesuar", None, "2025-01-15"),
+    ("Elektronik", None, None),             # satışı olmayan kategori
+])
+def test_query_matches_old_history(kategori, baslangic, bitis, tarih_sirasi, siralama):
+    products, sales = make_data()
+    index = build_sales_history_index(products, sales)
+    expected = old_history(products, sales, kategori, baslangic, bitis, tarih_sirasi, siralama)
+
+    sayfa_boyutu = 4
+    ilk = query_sales_history(index, kategori, baslangic, bitis, tarih_sirasi, siralama, 1, sayfa_boyutu)
+    assert ilk["toplam_satis"] == len(expected)
+    assert ilk["sayfa_sayisi"] == max(-(-len(expected) // sayfa_boyutu), 1)
+    assert ilk["toplam_tutar"] == pytest.approx(expected["Toplam Tutar (₺)"].sum())
+    assert ilk["toplam_kar"] == pytest.approx(expected["Kar Tutarı (₺)"].sum())
+    assert ilk["ortalama_kar_yuzdesi"] == pytest.approx(expected["Kar Yüzdesi (%)"].mean() if len(expected) else 0.0)
+
+    # Sayfalar sırayla birleştirilince eski tablonun tamamı elde edilir; son sayfa kısa, sonrası boş
+    sayfalar = [query_sales_history(index, kategori, baslangic, bitis, tarih_sirasi, siralama, s, sayfa_boyutu)["sayfa"]
+                for s in range(1, ilk["sayfa_sayisi"] + 2)]
+    assert sayfalar[-1].empty
+    assert all(len(s) == sayfa_boyutu for s in sayfalar[:-2])
+    actual = pd.concat(sayfalar, ignore_index=True)
+    actual = actual.assign(Kategori=actual["Kategori"].astype(str))
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
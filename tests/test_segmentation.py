@@ -0,0 +1,102 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.segmentation import (SNAPSHOT_SCORES, build_rfm_reference, calculate_rfm_scores, edge_drift, quintile_edges,
+                               rank_edges, rank_quintiles, rank_with_edges, refresh_segments, score_rfm,
+                               segment_customers)
+
+@pytest.mark.parametrize("values, expected", [
+    # Skor ⌈5·(k+1)/n⌉; qcut bu girdilerde [1, 1, 2, 3, 4, 5, 5] ve
+    # [1, 1, 1, 2, 2, 3, 3, 3, 4, 4, 5, 5, 5] verir
+    (np.arange(1, 8), [1, 2, 3, 3, 4, 5, 5]),
+    (np.arange(1, 14), [1, 1, 2, 2, 2, 3, 3, 4, 4, 4, 5, 5, 5]),
+    # Dilim sınırına tam düşen değerler: n=10'da k=1 → 1, k=2 → 2
+    (np.arange(1, 11), [1, 1, 2, 2, 3, 3, 4, 4, 5, 5]),
+])
+def test_rank_quintiles_boundaries(values, expected):
+    values = values.astype(float)
+    assert rank_quintiles(values, values).tolist() == expected
+
+def test_rank_quintiles_ties_take_lowest_rank():
+    reference = np.array([1, 2, 2, 2, 2, 2, 3, 4, 5, 6], dtype=float)
+    assert rank_quintiles(reference, reference).tolist() == [1, 1, 1, 1, 1, 1, 4, 4, 5, 5]
+
+def test_rank_quintiles_missing_and_outside_values():
+    reference = np.arange(1, 11, dtype=float)
+    values = np.array([np.nan, 0.0, 100.0, 2.5])
+    assert rank_quintiles(values, reference).tolist() == [1, 1, 5, 2]
+    assert rank_quintiles(values, np.array([])).tolist() == [1, 1, 1, 1]
+
+def make_customers(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D")
+    customers = pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "son_satin_alma_tarihi": pd.Series(dates).where(rng.random(n) > 0.05),
+        # Az sayıda farklı değer: sınırlarda bol eşitlik olur
+        "toplam_satin_alma_sayisi": rng.integers(1, 8, n),
+        "toplam_harcama": rng.integers(1, 20, n) * 50.0,
+    })
+    return customers
+
+def test_rank_with_edges_matches_rank_quintiles():
+    rng = np.random.default_rng(1)
+    for n in range(1, 40):
+        reference = np.sort(rng.integers(0, 6, n).astype(float))
+        values = np.append(rng.integers(-1, 8, 50).astype(float), np.nan)
+        # Belgelenen kural: ⌈5·(k+1)/n⌉, k referansta değerden küçük eleman sayısı
+        k = (reference[None, :] < values[:, None]).sum(axis=1)
+        expected = np.where(np.isnan(values), 1, np.clip(np.ceil(5 * (k + 1) / n), 1, 5))
+        assert rank_quintiles(values, reference).tolist() == expected.tolist()
+        assert rank_with_edges(values, rank_edges(reference)).tolist() == expected.tolist()
+
+def test_full_refresh_matches_calculate_rfm_scores():
+    customers = make_customers()
+    today = pd.Timestamp("2025-03-15")
+    scored, rows, removed, edges, tam = refresh_segments(customers, pd.DataFrame(columns=["musteri_id"]), None, today=today)
+    expected = segment_customers(calculate_rfm_scores(customers, today))
+    assert tam and not removed
+    for col in SNAPSHOT_SCORES + ["Segment"]:
+        assert scored[col].tolist() == expected[col].tolist()
+    assert len(rows) == len(customers)
+
+def test_incremental_refresh_matches_full_recompute_with_snapshot_reference():
+    customers = make_customers()
+    today = pd.Timestamp("2025-03-15")
+    _, rows, _, edges, _ = refresh_segments(customers, pd.DataFrame(columns=["musteri_id"]), None, today=today)
+    # Sınırlar anlık görüntüde JSON olarak saklanır
+    edges = json.loads(json.dumps(edges))
+
+    # Bazı müşteriler yeni alış yapar, biri eklenir; eşik sınırsız olduğu için artımlı yol kullanılır
+    changed = customers.copy()
+    idx = changed.index[::7]
+    changed.loc[idx, "son_satin_alma_tarihi"] = pd.Timestamp("2025-03-01")
+    changed.loc[idx, "toplam_satin_alma_sayisi"] += 1
+    changed.loc[idx, "toplam_harcama"] += 100.0
+    changed = pd.concat([changed, make_customers(1, seed=5).assign(id=len(customers) + 1)], ignore_index=True)
+    scored, new_rows, _, _, tam = refresh_segments(changed, rows, edges, threshold=float("inf"), today=today)
+    assert not tam
+    assert len(new_rows) == len(idx) + 1
+
+    # Tam hesaplama: tüm müşteriler anlık görüntünün referansıyla rank_quintiles üzerinden skorlanır
+    expected = segment_customers(score_rfm(changed, build_rfm_reference([customers]), today))
+    for col in SNAPSHOT_SCORES:
+        assert scored[col].tolist() == expected[col].tolist()
+    assert scored["Segment"].astype(str).tolist() == expected["Segment"].tolist()
+
+def test_identical_customers_get_identical_segments():
+    customers = make_customers()
+    twins = customers.iloc[:50].assign(id=lambda d: d["id"] + 1000)
+    scored = segment_customers(calculate_rfm_scores(pd.concat([customers, twins], ignore_index=True), "2025-03-15"))
+    pairs = scored.set_index("id")
+    for col in SNAPSHOT_SCORES + ["Segment"]:
+        assert pairs.loc[twins["id"], col].tolist() == pairs.loc[twins["id"] - 1000, col].tolist()
+
+def test_edge_drift_handles_open_lower_edges():
+    small = make_customers(3)
+    edges = quintile_edges(small)
+    assert None in edges["F"]
+    assert edge_drift(edges, json.loads(json.dumps(edges))) == 0.0
+    assert edge_drift(edges, quintile_edges(make_customers(50))) == float("inf")
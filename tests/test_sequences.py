@@ -0,0 +1,29 @@
+import pandas as pd
+
+import utils
+
+def seed_suppliers():
+    utils.insert_rows("suppliers", pd.DataFrame({"id": utils.allocate_ids("suppliers", 3), "tedarikci_adi": ["A", "B", "C"]}))
+
+def test_deleted_max_id_is_not_reused(store):
+    seed_suppliers()
+    max_id = int(utils.load_suppliers()["id"].max())
+    utils.delete_rows("suppliers", [max_id])
+    assert utils.allocate_ids("suppliers")[0] == max_id + 1
+
+def test_full_write_never_moves_sequence_back(store):
+    seed_suppliers()
+    suppliers = utils.load_suppliers()
+    max_id = int(suppliers["id"].max())
+    utils.save_suppliers(suppliers[suppliers["id"] != max_id])
+    assert utils.allocate_ids("suppliers")[0] == max_id + 1
+
+def test_delete_before_first_allocation_is_not_reused(store):
+    # Sıra hiç başlatılmamışken silinen en büyük kimlik de yeniden verilmez
+    max_id = int(utils.load_sales()["id"].max())
+    utils.delete_rows("sales", [max_id])
+    assert utils.allocate_ids("sales")[0] == max_id + 1
+
+def test_full_write_with_higher_ids_advances_sequence(store):
+    utils.save_suppliers(pd.DataFrame({"id": [10, 20], "tedarikci_adi": ["A", "B"]}))
+    assert utils.allocate_ids("suppliers")[0] == 21
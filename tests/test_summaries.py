@@ -0,0 +1,78 @@
+import pandas as pd
+
+import utils
+
+def record_some_sales():
+    """Farklı günlere ve yeni ürün×gün anahtarlarına düşen birkaç fiş kaydet"""
+    utils.record_sales(pd.DataFrame({"urun_id": [1, 2], "adet": [1, 2], "fiyat": [150.0, 120.0], "tarih": ["2025-01-02", "2025-01-02"]}))
+    utils.record_sales(pd.DataFrame({"urun_id": [3], "adet": [1], "fiyat": [450.0], "tarih": ["2025-01-05"]}))
+    utils.record_sales(pd.DataFrame({"urun_id": [1, 1], "adet": [2, 1], "fiyat": [150.0, 140.0], "tarih": ["2025-01-01", "2025-01-05"]}))
+
+def sorted_frame(df, keys):
+    return df.sort_values(keys).reset_index(drop=True)
+
+def test_sales_daily_journal_matches_rebuild(store):
+    record_some_sales()
+    expected = utils.build_sales_daily(utils.load_sales(), utils.load_data())
+    keys = ["urun_id", "tarih"]
+    folded = utils.load_sales_daily().assign(tarih=lambda d: d["tarih"].dt.strftime("%Y-%m-%d"))
+    pd.testing.assert_frame_equal(sorted_frame(folded, keys)[expected.columns], sorted_frame(expected, keys),
+                                  check_dtype=False)
+
+    # Birleştirme sonrası tablo aynı kalır ve günlük boşalır
+    utils.compact_sales()
+    compacted = utils.load_sales_daily().assign(tarih=lambda d: d["tarih"].dt.strftime("%Y-%m-%d"))
+    pd.testing.assert_frame_equal(sorted_frame(compacted, keys)[expected.columns], sorted_frame(expected, keys),
+                                  check_dtype=False)
+
+def test_checkout_does_not_rewrite_summaries(csv_store, monkeypatch):
+    written = []
+    original = utils.CSVBackend.write
+    def write(self, entity, df):
+        written.append(entity)
+        return original(self, entity, df)
+    monkeypatch.setattr(utils.CSVBackend, "write", write)
+    utils.record_sales(pd.DataFrame({"urun_id": [1], "adet": [1], "fiyat": [150.0], "musteri_id": [7]}))
+    utils.record_sales(pd.DataFrame({"urun_id": [2], "adet": [1], "fiyat": [120.0], "musteri_id": [7]}))
+    assert not {"sales_daily", "sales_rollup", "customer_rfm"} & set(written)
+
+def test_sales_rollup_journal_matches_rebuild(store):
+    record_some_sales()
+    expected = utils.build_sales_rollup(utils.build_sales_daily(utils.load_sales(), utils.load_data()), utils.load_data())
+    keys = utils.ROLLUP_KEYS
+    for _ in range(2):
+        cube = utils.load_sales_rollup().astype({c: str for c in ("seviye", "donem_turu", "donem", "kategori")})
+        pd.testing.assert_frame_equal(sorted_frame(cube, keys)[expected.columns], sorted_frame(expected.astype({"donem": str}), keys),
+                                      check_dtype=False)
+        # Birleştirme sonrası küp (sıra numaraları dahil) aynı kalır
+        utils.compact_sales()
+
+def test_customer_rfm_journal_matches_rebuild(store):
+    utils.record_sales(pd.DataFrame({"urun_id": [1, 2], "adet": [1, 1], "fiyat": [150.0, 120.0],
+                                     "tarih": ["2025-01-02", "2025-01-02"], "musteri_id": [7, 8]}))
+    utils.record_sales(pd.DataFrame({"urun_id": [1], "adet": [1], "fiyat": [150.0], "tarih": ["2025-01-02"], "musteri_id": [7]}))
+    utils.record_sales(pd.DataFrame({"urun_id": [3, 2], "adet": [1, 2], "fiyat": [450.0, 120.0],
+                                     "tarih": ["2025-01-04", "2025-01-06"], "musteri_id": [7, 9]}))
+    utils.record_sales(pd.DataFrame({"urun_id": [2], "adet": [1], "fiyat": [120.0], "tarih": ["2025-01-05"]}))
+    expected = utils.build_customer_rfm(utils.load_sales())
+    for _ in range(2):
+        rfm = utils.load_customer_rfm().assign(son_satin_alma_tarihi=lambda d: d["son_satin_alma_tarihi"].dt.strftime("%Y-%m-%d"))
+        pd.testing.assert_frame_equal(sorted_frame(rfm, ["musteri_id"])[expected.columns], sorted_frame(expected, ["musteri_id"]),
+                                      check_dtype=False)
+        utils.compact_sales()
+
+def test_rebuild_keeps_cost_at_sale_time(store):
+    utils.record_sales(pd.DataFrame({"urun_id": [1, 3], "adet": [1, 1], "fiyat": [150.0, 450.0], "tarih": ["2025-01-02", "2025-01-02"]}))
+    # Alış fiyatı değişir; önceki satışların (geçişle sabitlenen eski satırlar dahil) maliyeti değişmez
+    product = utils.load_data().set_index("id").loc[1]
+    utils.update_rows("products", pd.DataFrame({"id": [1], "alis_fiyati": [130.0], "versiyon": [product["versiyon"]]}))
+    utils.record_sales(pd.DataFrame({"urun_id": [1], "adet": [2], "fiyat": [160.0], "tarih": ["2025-01-03"]}))
+
+    keys = ["urun_id", "tarih"]
+    maintained = sorted_frame(utils.load_sales_daily(), keys)
+    utils.rebuild_sales_daily()
+    rebuilt = sorted_frame(utils.load_sales_daily(), keys)
+    pd.testing.assert_frame_equal(rebuilt[maintained.columns], maintained, check_dtype=False)
+    maliyet = rebuilt[rebuilt["urun_id"] == 1].set_index(rebuilt.loc[rebuilt["urun_id"] == 1, "tarih"].dt.strftime("%Y-%m-%d"))["maliyet"]
+    # Tohum: 01-01'de 2, 01-02'de 3+1 adet 100'den; yeni satış 2 adet 130'dan
+    assert maliyet.to_dict() == {"2025-01-01": 200.0, "2025-01-02": 400.0, "2025-01-03": 260.0}
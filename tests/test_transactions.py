@@ -0,0 +1,209 @@
+import os
+import subprocess
+import sys
+import textwrap
+import pandas as pd
+import pytest
+
+import utils
+from conftest import reset_state
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class SimulatedCrash(Exception):
+    """İşlemin ortasında sürecin ölmesini taklit eder"""
+
+def crash_on(monkeypatch, method, entity, after=False):
+    """CSVBackend.method verilen varlık için çağrıldığında (after ise çağrıdan sonra) çök"""
+    original = getattr(utils.CSVBackend, method)
+    def wrapper(self, name, *args, **kwargs):
+        if name == entity:
+            if after:
+                original(self, name, *args, **kwargs)
+            raise SimulatedCrash(f"{method}({entity})")
+        return original(self, name, *args, **kwargs)
+    monkeypatch.setattr(utils.CSVBackend, method, wrapper)
+
+def basket():
+    return pd.DataFrame({"urun_id": [1, 3], "adet": [4, 2], "fiyat": [150.0, 450.0]})
+
+def assert_consistent(sales_before, stock_before, sold):
+    """Her satış kimliği bir kez yazılmış ve stok satılan adet kadar düşmüş olmalı"""
+    sales = utils.load_sales()
+    products = utils.load_data().set_index("id")
+    assert sales["id"].is_unique
+    assert len(sales) == sales_before + len(sold)
+    for urun_id, adet in sold.groupby("urun_id")["adet"].sum().items():
+        assert products.loc[urun_id, "stok"] == stock_before[urun_id] - adet
+    assert not os.path.exists(utils.PENDING_TXN_PATH)
+
+@pytest.mark.parametrize("method, entity, after", [
+    ("write", "products", False),   # işlem kaydı yazıldı, hiçbir şey uygulanmadı
+    ("insert", "sales", False),     # stok düştü, satışlar yazılmadı
+    ("insert", "sales", True),      # her şey yazıldı, işlem kaydı silinmedi
+])
+def test_crash_mid_commit_is_replayed_once(csv_store, monkeypatch, method, entity, after):
+    sales_before = len(utils.load_sales())
+    stock_before = utils.load_data().set_index("id")["stok"].to_dict()
+
+    with monkeypatch.context() as m:
+        crash_on(m, method, entity, after)
+        with pytest.raises(SimulatedCrash):
+            utils.record_sales(basket())
+    assert os.path.exists(utils.PENDING_TXN_PATH)
+
+    # Yeniden başlatma: bekleyen işlem bir kez uygulanır, ikinci başlatma bir şey yapmaz
+    reset_state()
+    utils.migrate_schema()
+    assert_consistent(sales_before, stock_before, basket())
+    reset_state()
+    utils.migrate_schema()
+    assert_consistent(sales_before, stock_before, basket())
+    assert utils.load_sales_daily()["adet"].sum() == utils.load_sales()["adet"].sum()
+
+def test_killed_process_mid_commit_is_recovered(csv_store, tmp_path):
+    # Stok yazıldıktan sonra, satışlar deftere eklenirken süreç öldürülür
+    script = textwrap.dedent(f"""
+        import os, sys
+        sys.path.insert(0, {ROOT!r})
+        import pandas as pd
+        import utils
+        original = utils.CSVBackend.insert
+        def insert(self, entity, rows):
+            if entity == "sales":
+                os._exit(9)
+            return original(self, entity, rows)
+        utils.CSVBackend.insert = insert
+        utils.record_sales(pd.DataFrame({{"urun_id": [1, 3], "adet": [4, 2], "fiyat": [150.0, 450.0]}}))
+    """)
+    sales_before = len(utils.load_sales())
+    stock_before = utils.load_data().set_index("id")["stok"].to_dict()
+    result = subprocess.run([sys.executable, "-c", script], cwd=tmp_path)
+    assert result.returncode == 9
+    assert os.path.exists(utils.PENDING_TXN_PATH)
+
+    reset_state()
+    utils.migrate_schema()
+    assert_consistent(sales_before, stock_before, basket())
+
+def test_sqlite_commit_rolls_back_on_failure(store, monkeypatch):
+    if store != "sqlite":
+        pytest.skip("sadece SQLite arka ucu")
+    sales_before = len(utils.load_sales())
+    stock_before = utils.load_data().set_index("id")["stok"].to_dict()
+    original = utils.SQLiteBackend._insert
+    def insert(self, conn, entity, rows):
+        if entity == "sales":
+            raise SimulatedCrash("sales")
+        return original(self, conn, entity, rows)
+    monkeypatch.setattr(utils.SQLiteBackend, "_insert", insert)
+    with pytest.raises(SimulatedCrash):
+        utils.record_sales(basket())
+    utils.invalidate_cache()
+    assert len(utils.load_sales()) == sales_before
+    assert utils.load_data().set_index("id")["stok"].to_dict() == stock_before
+
+def test_stale_version_is_rejected_without_writes(store):
+    products = utils.load_data().set_index("id")
+    sales_before = len(utils.load_sales())
+    utils.record_sale(1, 1, 150.0, expected_version=int(products.loc[1, "versiyon"]))
+
+    # İlk satış versiyonu artırdı; eski versiyonla yapılan satış reddedilir
+    with pytest.raises(utils.ConcurrentUpdateError):
+        utils.record_sale(1, 1, 150.0, expected_version=int(products.loc[1, "versiyon"]))
+    assert len(utils.load_sales()) == sales_before + 1
+    assert utils.load_data().set_index("id").loc[1, "stok"] == products.loc[1, "stok"] - 1
+
+def test_insufficient_stock_writes_nothing(store):
+    stock_before = utils.load_data().set_index("id")["stok"].to_dict()
+    sales_before = len(utils.load_sales())
+    with pytest.raises(utils.InsufficientStockError):
+        utils.record_sales(pd.DataFrame({"urun_id": [1, 2], "adet": [1, 1000], "fiyat": [150.0, 120.0]}))
+    assert len(utils.load_sales()) == sales_before
+    assert utils.load_data().set_index("id")["stok"].to_dict() == stock_before
+
+def stream_chunks(fail_after=None):
+    """İki parçalık satış akışı; fail_after verilirse o kadar parçadan sonra çöker"""
+    for i, chunk in enumerate([
+        pd.DataFrame({"urun_id": [1, 2], "tarih": ["2025-01-03", "2025-01-03"], "adet": [1, 2], "fiyat": [150.0, 120.0], "musteri_id": [7, None]}),
+        pd.DataFrame({"urun_id": [3, 1], "tarih": ["2025-01-04", "2025-01-04"], "adet": [1, 3], "fiyat": [450.0, 150.0], "musteri_id": [8, 7]}),
+    ]):
+        if i == fail_after:
+            raise SimulatedCrash("akış")
+        yield chunk
+
+def stream_totals():
+    return pd.DataFrame({"id": [1, 2, 3], "adet": [4, 2, 1]})
+
+def stream_sold():
+    return pd.concat(list(stream_chunks()), ignore_index=True)
+
+def test_interrupted_stream_writes_nothing(store):
+    sales_before = len(utils.load_sales())
+    stock_before = utils.load_data().set_index("id")["stok"].to_dict()
+    with pytest.raises(SimulatedCrash):
+        utils.record_sales_stream(stream_chunks(fail_after=1), stream_totals())
+    reset_state()
+    utils.migrate_schema()
+    assert len(utils.load_sales()) == sales_before
+    assert utils.load_data().set_index("id")["stok"].to_dict() == stock_before
+    assert not os.path.exists(utils.PENDING_SALES_PATH)
+
+    # Yeniden deneme satışları bir kez yazar
+    assert utils.record_sales_stream(stream_chunks(), stream_totals()) == 4
+    assert_consistent(sales_before, stock_before, stream_sold())
+    assert utils.load_sales_daily()["adet"].sum() == utils.load_sales()["adet"].sum()
+
+def test_crash_mid_stream_commit_is_replayed_once(csv_store, monkeypatch):
+    sales_before = len(utils.load_sales())
+    stock_before = utils.load_data().set_index("id")["stok"].to_dict()
+    with monkeypatch.context() as m:
+        crash_on(m, "insert", "sales", after=True)
+        with pytest.raises(SimulatedCrash):
+            utils.record_sales_stream(stream_chunks(), stream_totals())
+    assert os.path.exists(utils.PENDING_TXN_PATH)
+
+    for _ in range(2):
+        reset_state()
+        utils.migrate_schema()
+        assert_consistent(sales_before, stock_before, stream_sold())
+    assert not os.path.exists(utils.PENDING_SALES_PATH)
+    assert utils.load_customer_rfm().set_index("musteri_id").loc[7, "toplam_harcama"] == 150.0 + 450.0
+
+def fail_once_on_sales_insert(monkeypatch):
+    """Satış eklemesi bir kez G/Ç hatası versin (ör. disk dolu); sonraki çağrılar çalışır"""
+    original = utils.CSVBackend.insert
+    state = {"failed": False}
+    def insert(self, entity, rows):
+        if entity == "sales" and not state["failed"]:
+            state["failed"] = True
+            raise OSError("disk dolu")
+        return original(self, entity, rows)
+    monkeypatch.setattr(utils.CSVBackend, "insert", insert)
+
+def test_failed_apply_is_finished_before_next_sale_in_same_process(csv_store, monkeypatch):
+    sales_before = len(utils.load_sales())
+    stock_before = utils.load_data().set_index("id")["stok"].to_dict()
+    fail_once_on_sales_insert(monkeypatch)
+    with pytest.raises(OSError):
+        utils.record_sales(basket())
+    assert os.path.exists(utils.PENDING_TXN_PATH)
+
+    # Yeniden başlatma olmadan ikinci satış: önceki işlem kaybolmaz, iki fiş de bir kez yazılır
+    utils.record_sales(basket())
+    assert_consistent(sales_before, stock_before, pd.concat([basket(), basket()], ignore_index=True))
+    assert utils.load_sales_daily()["adet"].sum() == utils.load_sales()["adet"].sum()
+
+def test_failed_stream_apply_is_finished_before_next_import(csv_store, monkeypatch):
+    sales_before = len(utils.load_sales())
+    stock_before = utils.load_data().set_index("id")["stok"].to_dict()
+    fail_once_on_sales_insert(monkeypatch)
+    with pytest.raises(OSError):
+        utils.record_sales_stream(stream_chunks(), stream_totals())
+    assert os.path.exists(utils.PENDING_SALES_PATH)
+
+    # İkinci aktarım ara dosyayı silmeden önce ilkini tamamlar
+    utils.record_sales_stream(stream_chunks(), stream_totals())
+    assert_consistent(sales_before, stock_before, pd.concat([stream_sold(), stream_sold()], ignore_index=True))
+    assert not os.path.exists(utils.PENDING_SALES_PATH)
+    assert utils.load_customer_rfm().set_index("musteri_id").loc[7, "toplam_harcama"] == 2 * (150.0 + 450.0)
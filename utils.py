@@ -1,92 +1,1606 @@
 import pandas as pd
+import numpy as np
 import os
 import datetime
-import random
+import sqlite3
+import json
+import threading
+import contextlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 DATA_PATH = "data/data.csv"
 SALES_PATH = "data/sales.csv"
 CUSTOMERS_PATH = "data/customers.csv"
 SUPPLIERS_PATH = "data/suppliers.csv"
 ORDERS_PATH = "data/orders.csv"
+DB_PATH = "data/stockly.db"
+SALES_JOURNAL_PATH = "data/sales_journal.csv"
+SALES_DAILY_PATH = "data/sales_daily.csv"
+SALES_DAILY_JOURNAL_PATH = "data/sales_daily_journal.csv"
+SALES_ROLLUP_PATH = "data/sales_rollup.csv"
+SALES_ROLLUP_JOURNAL_PATH = "data/sales_rollup_journal.csv"
+CUSTOMER_RFM_PATH = "data/customer_rfm.csv"
+CUSTOMER_RFM_JOURNAL_PATH = "data/customer_rfm_journal.csv"
+CUSTOMER_SEGMENTS_PATH = "data/customer_segments.csv"
+SEGMENT_SNAPSHOTS_PATH = "data/segment_snapshots.csv"
+SCHEMA_VERSION_PATH = "data/schema_version.json"
+LOCK_PATH = "data/.stockly.lock"
+PENDING_TXN_PATH = "data/pending_transaction.json"
+PENDING_SALES_PATH = "data/pending_sales.csv"
+SEQUENCES_PATH = "data/sequences.json"
+SEGMENT_MODEL_PATH = "data/segment_model.joblib"
 
-def load_data():
-    """Ürün verilerini yükle"""
-    os.makedirs("data", exist_ok=True)
-    if not os.path.exists(DATA_PATH):
-        df = pd.DataFrame(columns=["id", "isim", "kategori", "stok", "alis_fiyati", "satis_fiyati", "minimum_stok"])
-        df.to_csv(DATA_PATH, index=False)
+# Günlükler bu boyutu aşınca ana dosyayla birleştirilir
+JOURNAL_MAX_BYTES = 5 * 1024 * 1024
+# SQLite'ta özet fark tabloları bu satır sayısını aşınca ana tabloyla birleştirilir
+JOURNAL_MAX_ROWS = 100_000
+
+# Kurtarmada kimlik sütunu bu boyutta parçalarla taranır
+ID_SCAN_CHUNK_SIZE = 500_000
+
+# Depolama arka ucu: "csv" (varsayılan) veya "sqlite"
+STORAGE_BACKEND = os.environ.get("STOCKLY_STORAGE", "csv")
+
+# Önbellekteki çerçeveler sığ kopyalarla paylaşıldığı için kopyala-yaz (copy-on-write)
+# açık olmalı; pandas 3 ile bu davranış zaten varsayılan
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# Varlık tanımları: CSV yolu, varsayılan sütunlar, yüklemede uygulanan sütun tipleri ve SQLite indeksleri
+ENTITIES = {
+    "products": {
+        "path": DATA_PATH,
+        "columns": ["id", "isim", "kategori", "stok", "alis_fiyati", "satis_fiyati", "minimum_stok", "versiyon"],
+        "versioned": True,
+        "dtypes": {"id": "int64", "kategori": "category", "stok": "int32", "minimum_stok": "int32", "versiyon": "int32"},
+        "indexes": {"idx_products_id": ["id"]},
+    },
+    "sales": {
+        "path": SALES_PATH,
+        "columns": ["id", "urun_id", "tarih", "adet", "fiyat", "musteri_id", "birim_maliyet"],
+        "journal": SALES_JOURNAL_PATH,
+        "dtypes": {"id": "int64", "urun_id": "int64", "tarih": "datetime64[ns]", "adet": "int32", "musteri_id": "Int64"},
+        "indexes": {"idx_sales_urun_id": ["urun_id"], "idx_sales_tarih": ["tarih"], "idx_sales_musteri_id": ["musteri_id"]},
+    },
+    "sales_daily": {
+        "path": SALES_DAILY_PATH,
+        "columns": ["urun_id", "tarih", "adet", "ciro", "maliyet"],
+        "journal": SALES_DAILY_JOURNAL_PATH,
+        "dtypes": {"urun_id": "int64", "tarih": "datetime64[ns]", "adet": "int32"},
+        "indexes": {"idx_sales_daily_urun_id_tarih": ["urun_id", "tarih"]},
+    },
+    "sales_rollup": {
+        "path": SALES_ROLLUP_PATH,
+        "columns": ["seviye", "donem_turu", "donem", "kategori", "urun_id", "adet", "ciro", "maliyet", "kar", "sira"],
+        "journal": SALES_ROLLUP_JOURNAL_PATH,
+        "dtypes": {"seviye": "category", "donem_turu": "category", "kategori": "category", "urun_id": "int64",
+                   "adet": "int64", "sira": "int32"},
+        "indexes": {"idx_sales_rollup_hucre": ["seviye", "donem_turu", "donem"]},
+    },
+    "customers": {
+        "path": CUSTOMERS_PATH,
+        "columns": ["id", "musteri_adi", "yas", "cinsiyet", "bolge", "son_satin_alma_tarihi", "toplam_satin_alma_sayisi", "toplam_harcama"],
+        "dtypes": {"id": "int64", "yas": "int16", "cinsiyet": "category", "bolge": "category",
+                   "son_satin_alma_tarihi": "datetime64[ns]", "toplam_satin_alma_sayisi": "int32"},
+        "indexes": {"idx_customers_id": ["id"]},
+    },
+    "customer_rfm": {
+        "path": CUSTOMER_RFM_PATH,
+        "columns": ["musteri_id", "son_satin_alma_tarihi", "toplam_satin_alma_sayisi", "toplam_harcama"],
+        "journal": CUSTOMER_RFM_JOURNAL_PATH,
+        "dtypes": {"musteri_id": "int64", "son_satin_alma_tarihi": "datetime64[ns]", "toplam_satin_alma_sayisi": "int32"},
+        "indexes": {"idx_customer_rfm_musteri_id": ["musteri_id"]},
+    },
+    "customer_segments": {
+        "path": CUSTOMER_SEGMENTS_PATH,
+        "columns": ["musteri_id", "son_satin_alma_tarihi", "toplam_satin_alma_sayisi", "toplam_harcama",
+                    "R_score", "F_score", "M_score", "Segment"],
+        "dtypes": {"musteri_id": "int64", "son_satin_alma_tarihi": "datetime64[ns]", "toplam_satin_alma_sayisi": "int32",
+                   "R_score": "int8", "F_score": "int8", "M_score": "int8", "Segment": "category"},
+        "indexes": {"idx_customer_segments_musteri_id": ["musteri_id"]},
+    },
+    "segment_snapshots": {
+        "path": SEGMENT_SNAPSHOTS_PATH,
+        "columns": ["id", "zaman", "tur", "musteri_sayisi", "yeniden_skorlanan", "sinirlar"],
+        "dtypes": {"id": "int64"},
+        "indexes": {"idx_segment_snapshots_id": ["id"]},
+    },
+    "suppliers": {
+        "path": SUPPLIERS_PATH,
+        "columns": ["id", "tedarikci_adi", "telefon", "email", "adres", "urun_kategorileri", "teslimat_suresi", "performans_puani", "son_siparis_tarihi", "aktif_durum"],
+        "dtypes": {"id": "int64", "teslimat_suresi": "int16", "son_siparis_tarihi": "datetime64[ns]", "aktif_durum": "boolean"},
+        "indexes": {"idx_suppliers_id": ["id"]},
+    },
+    "orders": {
+        "path": ORDERS_PATH,
+        "columns": ["id", "tedarikci_id", "urun_adi", "miktar", "birim_fiyat", "toplam_fiyat", "siparis_tarihi", "teslimat_tarihi", "durum", "notlar", "siparis_no"],
+        "dtypes": {"id": "int64", "tedarikci_id": "int64", "miktar": "int32", "siparis_tarihi": "datetime64[ns]",
+                   "teslimat_tarihi": "datetime64[ns]", "durum": "category", "siparis_no": "int64"},
+        "indexes": {"idx_orders_id": ["id"], "idx_orders_tedarikci_id": ["tedarikci_id"], "idx_orders_siparis_no": ["siparis_no"]},
+    },
+}
+
+class InsufficientStockError(ValueError):
+    """Satılmak istenen adet mevcut stoktan fazla"""
+
+class ConcurrentUpdateError(RuntimeError):
+    """Kayıt okunduktan sonra başka bir oturumda değiştirildi"""
+
+# Aynı süreçteki oturumlar (thread) arası kilit; dosya kilidi süreçler arası koruma sağlar
+_process_lock = threading.RLock()
+_lock_state = threading.local()
+
+def _lock_file(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
     else:
-        df = pd.read_csv(DATA_PATH)
-        # Kategori sütunu yoksa ekle
-        if 'kategori' not in df.columns:
-            df['kategori'] = 'Tekstil'
-            df.to_csv(DATA_PATH, index=False)
-        else:
-            # Mevcut ürünlerin kategorilerini Tekstil olarak güncelle
-            df['kategori'] = 'Tekstil'
-            df.to_csv(DATA_PATH, index=False)
-        # Minimum stok sütunu yoksa ekle
-        if 'minimum_stok' not in df.columns:
-            df['minimum_stok'] = 5
-            df.to_csv(DATA_PATH, index=False)
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+
+def _unlock_file(handle):
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+@contextlib.contextmanager
+def data_lock(timeout=30):
+    """Tüm oturumlar ve süreçler arasında yazma işlemlerini sıraya koyan kilit (iç içe kullanılabilir)"""
+    if not _process_lock.acquire(timeout=timeout):
+        raise TimeoutError("Veri kilidi alınamadı")
+    try:
+        depth = getattr(_lock_state, "depth", 0)
+        if depth == 0:
+            os.makedirs("data", exist_ok=True)
+            _lock_state.handle = open(LOCK_PATH, "a+")
+            _lock_file(_lock_state.handle)
+        _lock_state.depth = depth + 1
+        try:
+            yield
+        finally:
+            _lock_state.depth -= 1
+            if _lock_state.depth == 0:
+                _unlock_file(_lock_state.handle)
+                _lock_state.handle.close()
+    finally:
+        _process_lock.release()
+
+def _atomic_replace(path, write_func):
+    """Geçici dosyaya yazıp yeniden adlandırarak yarım kalmış dosya oluşmasını önle"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write_func(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _atomic_to_csv(df, path):
+    _atomic_replace(path, lambda tmp: df.to_csv(tmp, index=False, date_format="%Y-%m-%d"))
+
+def _atomic_write_json(data, path):
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+    _atomic_replace(path, write)
+
+def _plan_stock_decrements(products, changes):
+    """Stok düşüşlerini doğrula ve ürünlerin yeni stok/versiyon değerlerini hesapla
+
+    changes: id, adet ve isteğe bağlı beklenen versiyon sütunları. Aynı ürün birden
+    fazla satırda geçebilir; adetler toplanır.
+    """
+    current = products.drop_duplicates("id").set_index("id")
+    versions = current["versiyon"].fillna(0) if "versiyon" in current.columns else pd.Series(0, index=current.index)
+    totals = changes.groupby("id")["adet"].sum()
+
+    unknown = totals.index.difference(current.index)
+    if len(unknown):
+        raise ValueError(f"Ürün bulunamadı: {', '.join(map(str, unknown))}")
+
+    if "versiyon" in changes.columns:
+        expected = changes.dropna(subset=["versiyon"]).groupby("id")["versiyon"].first()
+        conflicts = expected.index[expected.to_numpy() != versions.loc[expected.index].to_numpy()]
+        if len(conflicts):
+            raise ConcurrentUpdateError(f"Ürün başka bir oturumda güncellendi: {', '.join(map(str, conflicts))}")
+
+    stock = current.loc[totals.index, "stok"]
+    short = totals.index[totals.to_numpy() > stock.to_numpy()]
+    if len(short):
+        raise InsufficientStockError(f"Stokta yeterli ürün yok: {', '.join(map(str, short))}")
+
+    return pd.DataFrame({
+        "id": totals.index.to_numpy(),
+        "stok": (stock - totals).to_numpy(),
+        "versiyon": (versions.loc[totals.index] + 1).to_numpy().astype("int64"),
+    })
+
+def _convert_column(series, dtype):
+    """Sütunu beyan edilen tipe çevir; veri kaybı olacaksa None döndür"""
+    if dtype == "datetime64[ns]":
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        return pd.to_datetime(series, errors="coerce", format="ISO8601")
+    if dtype == "category":
+        return series.astype("category")
+    if dtype == "boolean":
+        if pd.api.types.is_bool_dtype(series):
+            return series.astype("boolean")
+        mapped = series.map({True: True, False: False, "True": True, "False": False})
+        return mapped.astype("boolean") if mapped.notna().sum() == series.notna().sum() else None
+    if dtype == "Int64":
+        # Boş bırakılabilen tam sayı: eksik değerler korunur, ondalıklı değer varsa dokunma
+        if series.isna().all():
+            return series.astype("Int64")
+        if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            return None
+        values = series.dropna().to_numpy()
+        return series.astype("Int64") if np.all(np.mod(values, 1) == 0) else None
+    # Tam sayı: eksik ya da ondalıklı değer varsa veya tipe sığmıyorsa dokunma
+    if series.isna().any() or not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return None
+    values = series.to_numpy()
+    info = np.iinfo(dtype)
+    if len(values) and (values.min() < info.min or values.max() > info.max or not np.all(np.mod(values, 1) == 0)):
+        return None
+    return series.astype(dtype)
+
+def _apply_schema(entity, df):
+    """Varlığın beyan edilmiş sütun tiplerini uygula (kategorik, dar tam sayı, tarih, boolean)"""
+    df = df.copy(deep=False)
+    for col, dtype in ENTITIES[entity].get("dtypes", {}).items():
+        if col in df.columns and str(df[col].dtype) != dtype:
+            converted = _convert_column(df[col], dtype)
+            if converted is not None:
+                df[col] = converted
     return df
 
+def _file_signature(path):
+    """Dosya kimliği ve değişiklik bilgisi (yoksa None)"""
+    if not path or not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return (path, st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+def _to_records(df):
+    """DataFrame satırlarını sqlite3'ün bağlayabileceği Python değerlerine çevir"""
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime("%Y-%m-%d")
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.itertuples(index=False, name=None))
+
+def _append_csv(path, rows):
+    """Sütunlar dosya başlığıyla uyumluysa satırları dosyanın sonuna ekle"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        rows.to_csv(path, index=False, date_format="%Y-%m-%d")
+        return True
+    header = pd.read_csv(path, nrows=0).columns.tolist()
+    if set(rows.columns) <= set(header):
+        rows.reindex(columns=header).to_csv(path, mode="a", header=False, index=False, date_format="%Y-%m-%d")
+        return True
+    return False
+
+def _read_staged_sales(path):
+    """Ara satış dosyasını değerleri metin olarak (deftere aynen yazılacak şekilde) parça parça oku"""
+    return pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=ID_SCAN_CHUNK_SIZE)
+
+def _apply_updates(df, rows, key):
+    """Anahtar sütununa göre verilen satırların değerlerini çerçeveye uygula"""
+    df = df.copy()
+    for col in rows.columns:
+        if col not in df.columns:
+            df[col] = None
+    indexed = df.set_index(key)
+    indexed.update(rows.set_index(key))
+    return indexed.reset_index()[df.columns]
+
+class CSVBackend:
+    """Her varlığı ayrı bir CSV dosyasında tutan depolama"""
+
+    def read(self, entity):
+        spec = ENTITIES[entity]
+        if not os.path.exists(spec["path"]):
+            df = pd.DataFrame(columns=spec["columns"])
+        else:
+            df = pd.read_csv(spec["path"])
+        # Günlüğü olan varlıklarda sıkıştırılmamış satırları da ekle; özet tablolarda
+        # günlük farklardan oluşur ve tabloya katlanır
+        journal = spec.get("journal")
+        if journal and os.path.exists(journal) and os.path.getsize(journal) > 0:
+            pending = pd.read_csv(journal)
+            if not pending.empty:
+                df = _fold_journal(entity, df, pending)
+        return df
+
+    def read_chunks(self, entity, chunksize):
+        """Varlığı (ve günlüğünü) tamamını belleğe almadan parça parça oku"""
+        if entity in JOURNAL_FOLDS:
+            # Özet farkları tabloya katlanmadan okunamaz
+            yield self.read(entity)
+            return
+        spec = ENTITIES[entity]
+        for path in (spec["path"], spec.get("journal")):
+            if path and os.path.exists(path) and os.path.getsize(path) > 0:
+                yield from pd.read_csv(path, chunksize=chunksize)
+
+    def write(self, entity, df):
+        os.makedirs("data", exist_ok=True)
+        spec = ENTITIES[entity]
+        _atomic_to_csv(df, spec["path"])
+        # Tam yazım günlükteki satırları da içerdiği için günlüğü temizle
+        if spec.get("journal") and os.path.exists(spec["journal"]):
+            os.remove(spec["journal"])
+
+    def insert(self, entity, rows):
+        os.makedirs("data", exist_ok=True)
+        spec = ENTITIES[entity]
+        journal = spec.get("journal")
+        if journal:
+            if not _append_csv(journal, rows):
+                # Yeni sütunlar geldiyse günlüğü birleştirip yeni başlıkla başla
+                self.compact(entity)
+                rows.to_csv(journal, index=False, date_format="%Y-%m-%d")
+            return
+        if os.path.exists(spec["path"]) and _append_csv(spec["path"], rows):
+            return
+        df = self.read(entity)
+        self.write(entity, pd.concat([df, rows], ignore_index=True) if not df.empty else rows)
+
+    def compact(self, entity):
+        """Günlükteki satırları ana dosyaya birleştir"""
+        journal = ENTITIES[entity].get("journal")
+        if journal and os.path.exists(journal):
+            self.write(entity, self.read(entity))
+
+    def needs_compaction(self, entity):
+        journal = ENTITIES[entity].get("journal")
+        return bool(journal) and os.path.exists(journal) and os.path.getsize(journal) > JOURNAL_MAX_BYTES
+
+    def signature(self, entity):
+        spec = ENTITIES[entity]
+        return (_file_signature(spec["path"]), _file_signature(spec.get("journal")))
+
+    def get_schema_version(self):
+        if not os.path.exists(SCHEMA_VERSION_PATH):
+            return 0
+        with open(SCHEMA_VERSION_PATH, encoding="utf-8") as f:
+            return json.load(f).get("version", 0)
+
+    def set_schema_version(self, version):
+        os.makedirs("data", exist_ok=True)
+        with open(SCHEMA_VERSION_PATH, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "guncelleme": datetime.datetime.now().isoformat()}, f)
+
+    def max_id(self, entity):
+        spec = ENTITIES[entity]
+        max_ids = []
+        for path in (spec["path"], spec.get("journal")):
+            if path and os.path.exists(path) and os.path.getsize(path) > 0:
+                ids = pd.read_csv(path, usecols=["id"])["id"]
+                if not ids.empty:
+                    max_ids.append(ids.max())
+        return max(max_ids) if max_ids else 0
+
+    def _read_sequences(self):
+        if not os.path.exists(SEQUENCES_PATH):
+            return {}
+        with open(SEQUENCES_PATH, encoding="utf-8") as f:
+            return json.load(f)
+
+    def next_ids(self, entity, count):
+        """Kalıcı sıradan count adet ardışık kimlik ayır, ilk kimliği döndür"""
+        sequences = self._read_sequences()
+        # Sıra ilk kullanımda (veya tam yazımdan sonra) mevcut en büyük kimlikten başlatılır
+        last = sequences[entity] if entity in sequences else int(self.max_id(entity))
+        sequences[entity] = last + count
+        _atomic_write_json(sequences, SEQUENCES_PATH)
+        return last + 1
+
+    def advance_sequence(self, entity, last_id):
+        """Sırayı en az last_id'ye ilerlet; sıra asla geri gitmez"""
+        sequences = self._read_sequences()
+        current = sequences[entity] if entity in sequences else int(self.max_id(entity))
+        sequences[entity] = max(int(current), int(last_id))
+        _atomic_write_json(sequences, SEQUENCES_PATH)
+
+    def update(self, entity, rows, key="id"):
+        self.write(entity, _apply_updates(self.read(entity), rows, key))
+
+    def delete(self, entity, ids, key="id"):
+        df = self.read(entity)
+        self.write(entity, df[~df[key].isin(list(ids))])
+
+    def apply_changes(self, entity, inserted, updated, deleted_ids, key="id"):
+        """Silme, güncelleme ve eklemeleri tek bir dosya yazımıyla uygula"""
+        df = self.read(entity)
+        if len(deleted_ids):
+            df = df[~df[key].isin(list(deleted_ids))]
+        if not updated.empty:
+            df = _apply_updates(df, updated, key)
+        if not inserted.empty:
+            df = pd.concat([df, inserted], ignore_index=True) if not df.empty else inserted
+        self.write(entity, df)
+
+    def commit_sale(self, sales_rows, stock_changes):
+        """Satış ekleme ve stok düşüşünü yeniden yürütme (redo) kaydıyla birlikte uygula
+
+        Önce işlem kaydı atomik olarak yazılır; yarıda kesilen bir işlem
+        recover_pending_transaction ile tamamlanır.
+        """
+        products = self.read("products")
+        stock_updates = _plan_stock_decrements(products, stock_changes)
+        _atomic_write_json({
+            "sales": json.loads(sales_rows.to_json(orient="records")),
+            "products": json.loads(stock_updates.to_json(orient="records")),
+        }, PENDING_TXN_PATH)
+        # Satış kimlikleri kilit altında yeni ayrıldığı için defterde olamaz; tekrar
+        # denetimi sadece yarıda kalmış bir işlem kurtarılırken yapılır
+        self.write("products", _apply_updates(products, stock_updates, "id"))
+        self.insert("sales", sales_rows)
+        os.remove(PENDING_TXN_PATH)
+
+    def commit_sale_chunks(self, chunks, stock_changes):
+        """Parça parça gelen satışları kimlik ayırarak stok düşüşüyle tek bir işlem olarak uygula
+
+        Parçalar önce geçici bir dosyada toplanır ve işlem kaydı ancak tümü yazıldıktan
+        sonra oluşturulur: kayıttan önce kesilen bir aktarım hiçbir şey bırakmaz, sonra
+        kesilen bir aktarım replay_transaction ile tamamlanır. Eklenen satır sayısını döndürür.
+        """
+        os.makedirs("data", exist_ok=True)
+        products = self.read("products")
+        stock_updates = _plan_stock_decrements(products, stock_changes)
+        inserted = 0
+        try:
+            for rows in chunks:
+                if rows.empty:
+                    continue
+                start = self.next_ids("sales", len(rows))
+                rows = rows.copy()
+                rows.insert(0, "id", np.arange(start, start + len(rows), dtype="int64"))
+                rows.to_csv(PENDING_SALES_PATH, mode="a" if inserted else "w", header=not inserted,
+                            index=False, date_format="%Y-%m-%d")
+                inserted += len(rows)
+        except BaseException:
+            if os.path.exists(PENDING_SALES_PATH):
+                os.remove(PENDING_SALES_PATH)
+            raise
+        _atomic_write_json({
+            "sales": [],
+            "sales_file": PENDING_SALES_PATH if inserted else None,
+            "products": json.loads(stock_updates.to_json(orient="records")),
+        }, PENDING_TXN_PATH)
+        self.write("products", _apply_updates(products, stock_updates, "id"))
+        if inserted:
+            for rows in _read_staged_sales(PENDING_SALES_PATH):
+                self.insert("sales", rows)
+        os.remove(PENDING_TXN_PATH)
+        if inserted:
+            os.remove(PENDING_SALES_PATH)
+        return inserted
+
+    def _ids_from(self, entity, first_id):
+        """Varlıkta first_id ve üstündeki kimlikleri sadece id sütununu parça parça okuyarak topla"""
+        spec = ENTITIES[entity]
+        ids = []
+        for path in (spec["path"], spec.get("journal")):
+            if path and os.path.exists(path) and os.path.getsize(path) > 0:
+                for chunk in pd.read_csv(path, usecols=["id"], chunksize=ID_SCAN_CHUNK_SIZE):
+                    ids.append(chunk.loc[chunk["id"] >= first_id, "id"])
+        return pd.concat(ids, ignore_index=True) if ids else pd.Series(dtype="int64")
+
+    def replay_transaction(self):
+        """Başlangıçta yarıda kalmış işlem kaydını (varsa) idempotent olarak uygula ve sil"""
+        if not os.path.exists(PENDING_TXN_PATH):
+            # İşlem kaydı yazılmadan kesilen bir aktarımın ara dosyası uygulanmaz
+            if os.path.exists(PENDING_SALES_PATH):
+                os.remove(PENDING_SALES_PATH)
+            return False
+        with open(PENDING_TXN_PATH, encoding="utf-8") as f:
+            txn = json.load(f)
+        # Stok: sadece henüz bu versiyona ulaşmamış ürünleri güncelle
+        stock_updates = pd.DataFrame(txn["products"])
+        if not stock_updates.empty:
+            products = self.read("products")
+            if "versiyon" not in products.columns:
+                products["versiyon"] = 0
+            current = products.drop_duplicates("id").set_index("id")["versiyon"].fillna(0)
+            pending = stock_updates[stock_updates["versiyon"].to_numpy() > current.reindex(stock_updates["id"]).fillna(0).to_numpy()]
+            if not pending.empty:
+                self.write("products", _apply_updates(products, pending, "id"))
+        # Satışlar: işlemin kimlikleri ardışık ayrıldığı için sadece ilk kimlik ve üstü
+        # karşılaştırılır; deftere henüz yazılmamış olanlar eklenir
+        sales_rows = pd.DataFrame(txn["sales"])
+        if not sales_rows.empty:
+            existing = self._ids_from("sales", sales_rows["id"].min())
+            missing = sales_rows[~sales_rows["id"].isin(existing)]
+            if not missing.empty:
+                self.insert("sales", missing)
+        # Parçalı aktarımlarda satışlar ara dosyadadır; kimlikler artan sırada yazıldığı
+        # için ilk satırın kimliği aralığın başıdır
+        sales_file = txn.get("sales_file")
+        if sales_file and os.path.exists(sales_file):
+            first_id = pd.read_csv(sales_file, usecols=["id"], nrows=1)["id"].iloc[0]
+            existing = self._ids_from("sales", first_id)
+            for rows in _read_staged_sales(sales_file):
+                missing = rows[~pd.to_numeric(rows["id"]).isin(existing)]
+                if not missing.empty:
+                    self.insert("sales", missing)
+        os.remove(PENDING_TXN_PATH)
+        if sales_file and os.path.exists(sales_file):
+            os.remove(sales_file)
+        return True
+
+class SQLiteBackend:
+    """Tüm varlıkları indeksli tablolarla tek bir SQLite dosyasında tutan depolama"""
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _columns(self, conn, entity):
+        return [row[1] for row in conn.execute(f'PRAGMA table_info("{entity}")')]
+
+    def _ensure_table(self, conn, entity, columns=()):
+        """Tabloyu, indeksleri ve eksik sütunları oluştur"""
+        spec = ENTITIES[entity]
+        existing = self._columns(conn, entity)
+        if not existing:
+            cols = ", ".join(f'"{c}"' for c in spec["columns"])
+            conn.execute(f'CREATE TABLE "{entity}" ({cols})')
+            for name, index_cols in spec["indexes"].items():
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{entity}" ({", ".join(index_cols)})')
+            existing = list(spec["columns"])
+        for col in columns:
+            if col not in existing:
+                conn.execute(f'ALTER TABLE "{entity}" ADD COLUMN "{col}"')
+                existing.append(col)
+
+    def _insert(self, conn, entity, rows):
+        if rows.empty:
+            return
+        cols = ", ".join(f'"{c}"' for c in rows.columns)
+        placeholders = ", ".join("?" for _ in rows.columns)
+        conn.executemany(f'INSERT INTO "{entity}" ({cols}) VALUES ({placeholders})', _to_records(rows))
+
+    def _ensure_journal(self, conn, entity):
+        """Özet tablosunun fark (günlük) tablosunu oluştur, adını döndür"""
+        table = f"{entity}_journal"
+        cols = ", ".join(f'"{c}"' for c in ENTITIES[entity]["columns"])
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({cols})')
+        return table
+
+    def read(self, entity):
+        conn = self._connect()
+        try:
+            with conn:
+                self._ensure_table(conn, entity)
+                journal = self._ensure_journal(conn, entity) if entity in JOURNAL_FOLDS else None
+            df = pd.read_sql_query(f'SELECT * FROM "{entity}" ORDER BY rowid', conn)
+            if journal:
+                pending = pd.read_sql_query(f'SELECT * FROM "{journal}" ORDER BY rowid', conn)
+                if not pending.empty:
+                    df = _fold_journal(entity, df, pending)
+            return df
+        finally:
+            conn.close()
+
+    def read_chunks(self, entity, chunksize):
+        """Tabloyu tamamını belleğe almadan parça parça oku"""
+        if entity in JOURNAL_FOLDS:
+            # Özet farkları tabloya katlanmadan okunamaz
+            yield self.read(entity)
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                self._ensure_table(conn, entity)
+            yield from pd.read_sql_query(f'SELECT * FROM "{entity}" ORDER BY rowid', conn, chunksize=chunksize)
+        finally:
+            conn.close()
+
+    def write(self, entity, df):
+        conn = self._connect()
+        try:
+            with conn:
+                # Tam yazım tabloyu baştan kurar; çerçeveden kaldırılan sütunlar tabloda kalmaz.
+                # Özet tablolarında fark tablosu da tam yazıma dahil olduğu için silinir
+                conn.execute(f'DROP TABLE IF EXISTS "{entity}"')
+                conn.execute(f'DROP TABLE IF EXISTS "{entity}_journal"')
+                self._ensure_table(conn, entity, df.columns)
+                self._insert(conn, entity, df)
+        finally:
+            conn.close()
+
+    def insert(self, entity, rows):
+        conn = self._connect()
+        try:
+            with conn:
+                if entity in JOURNAL_FOLDS:
+                    # Özet farkları tabloyu güncellemeden fark tablosuna eklenir
+                    self._insert(conn, self._ensure_journal(conn, entity), rows[ENTITIES[entity]["columns"]])
+                    return
+                self._ensure_table(conn, entity, rows.columns)
+                self._insert(conn, entity, rows)
+        finally:
+            conn.close()
+
+    def _update(self, conn, entity, rows, key):
+        value_cols = [c for c in rows.columns if c != key]
+        if rows.empty or not value_cols:
+            return
+        assignments = ", ".join(f'"{c}" = ?' for c in value_cols)
+        conn.executemany(
+            f'UPDATE "{entity}" SET {assignments} WHERE "{key}" = ?',
+            _to_records(rows[value_cols + [key]])
+        )
+
+    def _delete(self, conn, entity, ids, key):
+        conn.executemany(f'DELETE FROM "{entity}" WHERE "{key}" = ?', _to_records(pd.DataFrame({key: list(ids)})))
+
+    def update(self, entity, rows, key="id"):
+        conn = self._connect()
+        try:
+            with conn:
+                self._ensure_table(conn, entity, rows.columns)
+                self._update(conn, entity, rows, key)
+        finally:
+            conn.close()
+
+    def apply_changes(self, entity, inserted, updated, deleted_ids, key="id"):
+        """Silme, güncelleme ve eklemeleri tek bir işlemde (transaction) uygula"""
+        conn = self._connect()
+        try:
+            with conn:
+                self._ensure_table(conn, entity, list(inserted.columns) + list(updated.columns))
+                self._delete(conn, entity, deleted_ids, key)
+                self._update(conn, entity, updated, key)
+                self._insert(conn, entity, inserted)
+        finally:
+            conn.close()
+
+    def commit_sale(self, sales_rows, stock_changes):
+        """Satış ekleme ve stok düşüşünü tek bir SQLite işleminde uygula"""
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            self._ensure_table(conn, "products", ["versiyon"])
+            self._ensure_table(conn, "sales", sales_rows.columns)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._decrement_stock(conn, stock_changes)
+                self._insert(conn, "sales", sales_rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def _decrement_stock(self, conn, stock_changes):
+        """Açık işlem içinde ürün stoklarını doğrulayıp düşür"""
+        ids = _to_records(stock_changes[["id"]].drop_duplicates())
+        placeholders = ", ".join("?" for _ in ids)
+        products = pd.read_sql_query(
+            f'SELECT "id", "stok", "versiyon" FROM "products" WHERE "id" IN ({placeholders})',
+            conn, params=[i[0] for i in ids]
+        )
+        stock_updates = _plan_stock_decrements(products, stock_changes)
+        conn.executemany(
+            'UPDATE "products" SET "stok" = ?, "versiyon" = ? WHERE "id" = ? AND COALESCE("versiyon", 0) = ?',
+            [(stok, versiyon, urun_id, versiyon - 1) for urun_id, stok, versiyon in _to_records(stock_updates)]
+        )
+
+    def commit_sale_chunks(self, chunks, stock_changes):
+        """Parça parça gelen satışları kimlik ayırarak stok düşüşüyle tek bir SQLite işleminde ekle
+
+        Eklenen satır sayısını döndürür.
+        """
+        conn = self._connect()
+        conn.isolation_level = None
+        try:
+            self._ensure_table(conn, "products", ["versiyon"])
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._decrement_stock(conn, stock_changes)
+                inserted = 0
+                for rows in chunks:
+                    if rows.empty:
+                        continue
+                    # Kimlikler aynı işlemde ayrılır; işlem geri alınırsa sıra da geri alınır
+                    start = self._next_ids(conn, "sales", len(rows))
+                    rows = rows.copy()
+                    rows.insert(0, "id", np.arange(start, start + len(rows), dtype="int64"))
+                    self._ensure_table(conn, "sales", rows.columns)
+                    self._insert(conn, "sales", rows)
+                    inserted += len(rows)
+                conn.execute("COMMIT")
+                return inserted
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def replay_transaction(self):
+        """SQLite işlemleri atomik olduğu için bekleyen işlem kaydı tutulmaz"""
+        return False
+
+    def compact(self, entity):
+        """Özet tablolarının fark tablosunu ana tabloya katla; satış defteri satır bazında eklendiği için günlüğü yok"""
+        if entity in JOURNAL_FOLDS:
+            self.write(entity, self.read(entity))
+
+    def needs_compaction(self, entity):
+        if entity not in JOURNAL_FOLDS:
+            return False
+        conn = self._connect()
+        try:
+            with conn:
+                journal = self._ensure_journal(conn, entity)
+            return conn.execute(f'SELECT COUNT(*) FROM "{journal}"').fetchone()[0] > JOURNAL_MAX_ROWS
+        finally:
+            conn.close()
+
+    def signature(self, entity):
+        return (_file_signature(self.db_path), _file_signature(self.db_path + "-wal"))
+
+    def get_schema_version(self):
+        conn = self._connect()
+        try:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            conn.close()
+
+    def set_schema_version(self, version):
+        conn = self._connect()
+        try:
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+        finally:
+            conn.close()
+
+    def max_id(self, entity):
+        conn = self._connect()
+        try:
+            with conn:
+                self._ensure_table(conn, entity)
+            value = conn.execute(f'SELECT MAX("id") FROM "{entity}"').fetchone()[0]
+            return value if value is not None else 0
+        finally:
+            conn.close()
+
+    def _next_ids(self, conn, entity, count):
+        self._ensure_table(conn, entity)
+        conn.execute('CREATE TABLE IF NOT EXISTS "sequences" ("entity" TEXT PRIMARY KEY, "last_id" INTEGER)')
+        row = conn.execute('SELECT "last_id" FROM "sequences" WHERE "entity" = ?', (entity,)).fetchone()
+        if row is None:
+            # Sıra ilk kullanımda (veya tam yazımdan sonra) mevcut en büyük kimlikten başlatılır
+            row = conn.execute(f'SELECT COALESCE(MAX("id"), 0) FROM "{entity}"').fetchone()
+        last = int(row[0])
+        conn.execute('INSERT OR REPLACE INTO "sequences" ("entity", "last_id") VALUES (?, ?)', (entity, last + count))
+        return last + 1
+
+    def next_ids(self, entity, count):
+        """Kalıcı sıradan count adet ardışık kimlik ayır, ilk kimliği döndür"""
+        conn = self._connect()
+        try:
+            with conn:
+                return self._next_ids(conn, entity, count)
+        finally:
+            conn.close()
+
+    def advance_sequence(self, entity, last_id):
+        """Sırayı en az last_id'ye ilerlet; sıra asla geri gitmez"""
+        conn = self._connect()
+        try:
+            with conn:
+                current = self._next_ids(conn, entity, 0) - 1
+                conn.execute('UPDATE "sequences" SET "last_id" = ? WHERE "entity" = ?', (max(current, int(last_id)), entity))
+        finally:
+            conn.close()
+
+    def delete(self, entity, ids, key="id"):
+        conn = self._connect()
+        try:
+            with conn:
+                self._ensure_table(conn, entity)
+                self._delete(conn, entity, ids, key)
+        finally:
+            conn.close()
+
+def get_backend():
+    """Yapılandırılmış depolama arka ucunu döndür"""
+    if STORAGE_BACKEND == "sqlite":
+        return SQLiteBackend(DB_PATH)
+    return CSVBackend()
+
+# Süreç genelinde (tüm Streamlit oturumlarınca) paylaşılan okuma önbelleği:
+# (arka uç, varlık) -> (dosya imzası, çerçeve)
+_frame_cache = {}
+_cache_lock = threading.Lock()
+
+# Çerçevelerden türetilen yapılar (indeksler, özetler): (arka uç, ad) -> (varlıklar, imzalar, değer)
+_derived_cache = {}
+
+def invalidate_cache(entity=None):
+    """Verilen varlığın (veya tüm varlıkların) önbelleğini temizle"""
+    with _cache_lock:
+        if entity is None:
+            _frame_cache.clear()
+            _derived_cache.clear()
+        else:
+            _frame_cache.pop((STORAGE_BACKEND, entity), None)
+            for key in [k for k, v in _derived_cache.items() if entity in v[0]]:
+                del _derived_cache[key]
+
+def cached_derived(name, entities, build):
+    """Varlıklardan türetilen yapıyı, varlıkların dosya imzaları değişene kadar önbellekte tut
+
+    build parametresiz çağrılır ve sonucu tüm oturumlarca paylaşılır; döndürülen
+    değer değiştirilmemelidir.
+    """
+    backend = get_backend()
+    key = (STORAGE_BACKEND, name)
+    signature = tuple(backend.signature(entity) for entity in entities)
+    with _cache_lock:
+        hit = _derived_cache.get(key)
+    if hit is not None and hit[1] == signature:
+        return hit[2]
+    value = build()
+    with _cache_lock:
+        _derived_cache[key] = (tuple(entities), signature, value)
+    return value
+
+def _cached_read(entity):
+    """Dosya imzası değişmediyse önbellekteki çerçevenin kopyala-yaz kopyasını döndür"""
+    backend = get_backend()
+    key = (STORAGE_BACKEND, entity)
+    signature = backend.signature(entity)
+    with _cache_lock:
+        hit = _frame_cache.get(key)
+    if hit is not None and hit[0] == signature:
+        return hit[1].copy(deep=False)
+    df = _apply_schema(entity, backend.read(entity))
+    with _cache_lock:
+        _frame_cache[key] = (signature, df)
+    return df.copy(deep=False)
+
+def iter_chunks(entity, chunksize):
+    """Varlığı beyan edilen tipleri uygulanmış parçalar halinde oku (önbelleğe alınmaz)"""
+    migrate_schema()
+    for chunk in get_backend().read_chunks(entity, chunksize):
+        yield _apply_schema(entity, chunk)
+
+def _write(entity, df):
+    """Tam yazım yap ve önbelleği geçersiz kıl"""
+    with data_lock():
+        backend = get_backend()
+        if "id" in ENTITIES[entity]["columns"] and "id" in df.columns:
+            # Sıra, yazımdan önceki en büyük kimliği de kapsar: silinen kimlikler yeniden verilmez
+            ids = pd.to_numeric(df["id"], errors="coerce")
+            backend.advance_sequence(entity, ids.max() if ids.notna().any() else 0)
+        backend.write(entity, df)
+        invalidate_cache(entity)
+
+def allocate_ids(entity, count=1):
+    """Varlık için kalıcı sıradan count adet benzersiz tam sayı kimlik ayır
+
+    Toplu eklemeler için kimlikler tek seferde blok olarak ayrılır; kilit altında
+    çalıştığı için eşzamanlı oturumlar aynı kimliği alamaz.
+    """
+    if count <= 0:
+        return np.arange(0, dtype="int64")
+    with data_lock():
+        start = get_backend().next_ids(entity, int(count))
+    return np.arange(start, start + count, dtype="int64")
+
+def _bump_versions(backend, entity, rows, key):
+    """Versiyonlu varlıklarda güncellenen satırların versiyonunu artır
+
+    Satırlarda versiyon sütunu varsa okunduğu andaki versiyon kabul edilir ve
+    mevcut versiyonla uyuşmazsa ConcurrentUpdateError fırlatılır.
+    """
+    if not ENTITIES[entity].get("versioned") or rows.empty:
+        return rows
+    current = backend.read(entity)
+    if "versiyon" not in current.columns:
+        current["versiyon"] = 0
+    current_versions = current.drop_duplicates(key).set_index(key)["versiyon"].reindex(rows[key]).fillna(0).to_numpy()
+    if "versiyon" in rows.columns:
+        conflicts = rows.loc[rows["versiyon"].fillna(0).to_numpy() != current_versions, key]
+        if not conflicts.empty:
+            raise ConcurrentUpdateError(f"Kayıt başka bir oturumda güncellendi: {', '.join(map(str, conflicts))}")
+    rows = rows.copy()
+    rows["versiyon"] = (current_versions + 1).astype("int64")
+    return rows
+
+def insert_rows(entity, rows):
+    """Yeni satırları mevcut verilere yeniden yazmadan ekle"""
+    if ENTITIES[entity].get("versioned") and "versiyon" not in rows.columns:
+        rows = rows.assign(versiyon=0)
+    with data_lock():
+        get_backend().insert(entity, rows)
+        invalidate_cache(entity)
+
+def update_rows(entity, rows, key="id"):
+    """Anahtar sütununa göre sadece verilen satırları güncelle"""
+    with data_lock():
+        backend = get_backend()
+        backend.update(entity, _bump_versions(backend, entity, rows, key), key)
+        invalidate_cache(entity)
+
+def delete_rows(entity, ids, key="id"):
+    """Anahtar değerleri verilen satırları sil"""
+    with data_lock():
+        backend = get_backend()
+        if key == "id":
+            # Silinen en büyük kimlik sıranın altında kalır; yeniden verilmez
+            backend.advance_sequence(entity, 0)
+        backend.delete(entity, ids, key)
+        invalidate_cache(entity)
+
+def apply_changes(entity, inserted, updated, deleted_ids, key="id"):
+    """Eklenen, güncellenen ve silinen satırları tek bir yazımda depoya uygula
+
+    Kimliği olmayan yeni satırlara sıradaki kimlikler verilir; eklenen satırlar döndürülür.
+    """
+    inserted = inserted.copy()
+    if inserted.empty and updated.empty and not len(deleted_ids):
+        return inserted
+    if ENTITIES[entity].get("versioned") and not inserted.empty:
+        inserted["versiyon"] = 0
+    with data_lock():
+        backend = get_backend()
+        if not inserted.empty and key in inserted.columns and inserted[key].isna().any():
+            missing = inserted[key].isna()
+            inserted.loc[missing, key] = allocate_ids(entity, int(missing.sum()))
+            inserted[key] = inserted[key].astype("int64")
+        updated = _bump_versions(backend, entity, updated, key)
+        if key == "id" and len(deleted_ids):
+            backend.advance_sequence(entity, 0)
+        backend.apply_changes(entity, inserted, updated, deleted_ids, key)
+        invalidate_cache(entity)
+    return inserted
+
+def import_csv_to_sqlite(db_path=DB_PATH):
+    """Mevcut data/*.csv dosyalarını tek seferde SQLite veritabanına aktar"""
+    backend = SQLiteBackend(db_path)
+    source = CSVBackend()
+    imported = {}
+    for entity, spec in ENTITIES.items():
+        if os.path.exists(spec["path"]) or (spec.get("journal") and os.path.exists(spec["journal"])):
+            # Günlükteki satırlar ve özet farkları da aktarılır
+            df = source.read(entity)
+            backend.write(entity, df)
+            imported[entity] = len(df)
+    invalidate_cache()
+    return imported
+
+def _add_missing_columns(df, defaults):
+    """Eksik sütunları varsayılan değerleriyle ekle, eklenen var mı döndür"""
+    changed = False
+    for col, default in defaults.items():
+        if col not in df.columns:
+            df[col] = default
+            changed = True
+    return changed
+
+def _migration_1_default_columns(backend):
+    """Eksik sütunları ekle, türetilmiş sütunları kaldır, aktif durumlarını düzelt"""
+    products = backend.read("products")
+    changed = _add_missing_columns(products, {"kategori": "Tekstil", "minimum_stok": 5})
+    if "stok_durumu" in products.columns:
+        # Stok durumu her gösterimde hesaplanır, dosyada tutulmaz
+        products = products.drop(columns=["stok_durumu"])
+        changed = True
+    if changed:
+        backend.write("products", products)
+
+    suppliers = backend.read("suppliers")
+    changed = _add_missing_columns(suppliers, {"aktif_durum": True})
+    if not suppliers.empty and not pd.api.types.is_bool_dtype(suppliers["aktif_durum"]):
+        suppliers["aktif_durum"] = suppliers["aktif_durum"].astype(str).str.strip().str.lower().isin(["true", "1", "evet"])
+        changed = True
+    if changed:
+        backend.write("suppliers", suppliers)
+
+    for entity in ("customers", "orders"):
+        df = backend.read(entity)
+        if _add_missing_columns(df, {col: None for col in ENTITIES[entity]["columns"]}):
+            backend.write(entity, df)
+
+def _unit_costs(sales_df, products_df):
+    """Satışların birim maliyeti: satış anında kaydedilen maliyet, yoksa ürünün güncel alış fiyatı"""
+    costs = products_df.drop_duplicates("id").set_index("id")["alis_fiyati"] if not products_df.empty else pd.Series(dtype=float)
+    current = sales_df["urun_id"].map(costs).astype(float)
+    if "birim_maliyet" not in sales_df.columns:
+        return current
+    return pd.to_numeric(sales_df["birim_maliyet"], errors="coerce").astype(float).fillna(current)
+
+def build_sales_daily(sales_df, products_df):
+    """Satış defterini ürün×gün bazında adet, ciro ve maliyet olarak özetle
+
+    Maliyet her satışın kendi birim maliyetiyle hesaplanır; alış fiyatı sonradan
+    değişse de defterden yeniden oluşturulan özet, satış anında tutulan özetle aynıdır.
+    """
+    if sales_df.empty:
+        return pd.DataFrame(columns=ENTITIES["sales_daily"]["columns"])
+    daily = pd.DataFrame({
+        "urun_id": sales_df["urun_id"].to_numpy(),
+        "tarih": pd.to_datetime(sales_df["tarih"]).dt.normalize().to_numpy(),
+        "adet": sales_df["adet"].to_numpy(),
+        "ciro": (sales_df["adet"] * sales_df["fiyat"]).to_numpy(),
+        "maliyet": (sales_df["adet"] * _unit_costs(sales_df, products_df).fillna(0)).to_numpy(),
+    })
+    daily = daily.groupby(["urun_id", "tarih"], as_index=False).sum()
+    # Tarih metne gruplamadan sonra çevrilir; satır sayısı artık ürün×gün kadar
+    daily["tarih"] = daily["tarih"].dt.strftime("%Y-%m-%d")
+    return daily
+
+def _fold_sums(base, delta, keys, values):
+    """Anahtarları tekil tabloya farkları ekle; tabloda olmayan anahtarlar sona eklenir
+
+    Sadece farklar gruplanır; tablodaki satırlar anahtar indeksiyle bulunup yerinde toplanır.
+    """
+    delta = delta.groupby(keys, as_index=False, sort=False)[values].sum()
+    if base.empty:
+        return delta
+    pos = pd.MultiIndex.from_frame(base[keys]).get_indexer(pd.MultiIndex.from_frame(delta[keys]))
+    found = pos >= 0
+    base = base.copy()
+    for col in values:
+        column = base[col].to_numpy(copy=True)
+        if column.dtype.kind in "iu" and delta[col].dtype.kind == "f":
+            column = column.astype(float)
+        column[pos[found]] += delta[col].to_numpy()[found]
+        base[col] = column
+    return pd.concat([base, delta[~found]], ignore_index=True)
+
+def _fold_sales_daily(daily, delta):
+    """Ürün×gün özetine günlükteki satış farklarını ekle"""
+    return _fold_sums(daily, delta, ["urun_id", "tarih"], ["adet", "ciro", "maliyet"])
+
+# Özet küpünün dönem türleri; ürün×gün hücreleri zaten sales_daily'de olduğu için
+# ürün seviyesinde gün tutulmaz
+ROLLUP_PERIODS = ("gun", "hafta", "ay", "tumu")
+ROLLUP_PRODUCT_PERIODS = ("hafta", "ay", "tumu")
+ROLLUP_KEYS = ["seviye", "donem_turu", "donem", "kategori", "urun_id"]
+ROLLUP_CELL = ["seviye", "donem_turu", "donem"]
+
+def _period_starts(days, donem_turu):
+    """Tekil günler için dönem başlangıcını (ISO metin) hesapla"""
+    days = pd.DatetimeIndex(days)
+    if donem_turu == "hafta":
+        days = days - pd.to_timedelta(days.weekday, unit="D")
+    elif donem_turu == "ay":
+        days = days - pd.to_timedelta(days.day - 1, unit="D")
+    elif donem_turu == "tumu":
+        return np.full(len(days), "tumu", dtype=object)
+    return np.asarray(days.strftime("%Y-%m-%d"), dtype=object)
+
+def _rank_rollup(cube):
+    """Her hücre (seviye, dönem) içinde satırları adede göre sırala ve sıra numarası ver"""
+    cube = cube.sort_values(ROLLUP_CELL + ["adet", "ciro"], ascending=[True, True, True, False, False], kind="mergesort")
+    cube["sira"] = cube.groupby(ROLLUP_CELL, observed=True).cumcount().astype("int32") + 1
+    return cube.reset_index(drop=True)
+
+def build_sales_rollup(daily_df, products_df):
+    """Ürün×gün özetinden (kategori, ürün) × (gün, hafta, ay, tümü) özet küpünü oluştur"""
+    columns = ENTITIES["sales_rollup"]["columns"]
+    if daily_df.empty:
+        return pd.DataFrame(columns=columns)
+    kategoriler = products_df.drop_duplicates("id").set_index("id")["kategori"].astype(object) if not products_df.empty else pd.Series(dtype=object)
+    codes, days = pd.factorize(pd.to_datetime(daily_df["tarih"]))
+    base = pd.DataFrame({
+        "kategori": daily_df["urun_id"].map(kategoriler).fillna("Diğer").to_numpy(),
+        "urun_id": daily_df["urun_id"].to_numpy(),
+        "adet": daily_df["adet"].to_numpy(dtype="int64"),
+        "ciro": daily_df["ciro"].to_numpy(dtype=float),
+        "maliyet": daily_df["maliyet"].to_numpy(dtype=float),
+    })
+    parts = []
+    for donem_turu in ROLLUP_PERIODS:
+        # Dönem anahtarı tekil günler üzerinden hesaplanır, satırlara kodlarla dağıtılır
+        period = base.assign(donem=_period_starts(days, donem_turu)[codes])
+        kategori = period.groupby(["donem", "kategori"], as_index=False)[["adet", "ciro", "maliyet"]].sum()
+        parts.append(kategori.assign(seviye="kategori", donem_turu=donem_turu, urun_id=0))
+        if donem_turu in ROLLUP_PRODUCT_PERIODS:
+            urun = period.groupby(["donem", "kategori", "urun_id"], as_index=False)[["adet", "ciro", "maliyet"]].sum()
+            parts.append(urun.assign(seviye="urun", donem_turu=donem_turu))
+    cube = pd.concat(parts, ignore_index=True)
+    cube["kar"] = cube["ciro"] - cube["maliyet"]
+    return _rank_rollup(cube)[columns]
+
+def _fold_sales_rollup(cube, delta):
+    """Küpe günlükteki farkları ekle; sadece etkilenen hücreler yeniden toplanıp sıralanır"""
+    columns = ENTITIES["sales_rollup"]["columns"]
+    text_cols = ["seviye", "donem_turu", "donem", "kategori"]
+    delta = delta.astype({c: str for c in text_cols})
+    if cube.empty:
+        affected = np.zeros(0, dtype=bool)
+    else:
+        cube = cube.astype({c: str for c in text_cols})
+        cells = pd.MultiIndex.from_frame(delta[ROLLUP_CELL]).unique()
+        affected = pd.MultiIndex.from_frame(cube[ROLLUP_CELL]).isin(cells)
+    changed = pd.concat([cube[affected], delta], ignore_index=True) if affected.any() else delta
+    changed = changed.groupby(ROLLUP_KEYS, as_index=False)[["adet", "ciro", "maliyet"]].sum()
+    changed["kar"] = changed["ciro"] - changed["maliyet"]
+    if cube.empty:
+        return _rank_rollup(changed)[columns]
+    return pd.concat([cube[~affected], _rank_rollup(changed)[columns]], ignore_index=True)[columns]
+
+def build_customer_rfm(sales_df):
+    """Satış defterinden müşteri başına son alış tarihi, alış günü sayısı ve toplam harcamayı hesapla
+
+    Aynı gün yapılan alışlar tek alışveriş sayılır; müşterisiz satışlar atlanır.
+    """
+    columns = ENTITIES["customer_rfm"]["columns"]
+    if sales_df.empty or "musteri_id" not in sales_df.columns:
+        return pd.DataFrame(columns=columns)
+    sales = sales_df[sales_df["musteri_id"].notna()]
+    if sales.empty:
+        return pd.DataFrame(columns=columns)
+    rfm = pd.DataFrame({
+        "musteri_id": sales["musteri_id"].to_numpy(dtype="int64"),
+        "tarih": pd.to_datetime(sales["tarih"]).dt.normalize().to_numpy(),
+        "tutar": (sales["adet"] * sales["fiyat"]).to_numpy(dtype=float),
+    }).groupby("musteri_id", as_index=False).agg(
+        son_satin_alma_tarihi=("tarih", "max"),
+        toplam_satin_alma_sayisi=("tarih", "nunique"),
+        toplam_harcama=("tutar", "sum"),
+    )
+    rfm["son_satin_alma_tarihi"] = rfm["son_satin_alma_tarihi"].dt.strftime("%Y-%m-%d")
+    return rfm[columns]
+
+def _customer_rfm_delta(sales_df):
+    """Yeni satışları müşteri×gün harcamalarına indir (artımlı RFM güncellemesi için)"""
+    if sales_df.empty or "musteri_id" not in sales_df.columns:
+        return pd.DataFrame(columns=["musteri_id", "tarih", "tutar"])
+    sales = sales_df[sales_df["musteri_id"].notna()]
+    return pd.DataFrame({
+        "musteri_id": sales["musteri_id"].to_numpy(dtype="int64"),
+        "tarih": pd.to_datetime(sales["tarih"]).dt.normalize().to_numpy(),
+        "tutar": (sales["adet"] * sales["fiyat"]).to_numpy(dtype=float),
+    }).groupby(["musteri_id", "tarih"], as_index=False).sum()
+
+def _fold_customer_rfm(rfm, delta):
+    """Müşteri RFM tablosuna günlükteki müşteri×gün harcamalarını ekle
+
+    Günlük satırları RFM sütunlarını taşır: alış günü, 1 ve o günkü harcama. Alış sayısı,
+    müşterinin tablodaki son alış gününden sonraki tekil günler kadar artar; daha eski
+    günlere düşen satışlar sadece harcamaya eklenir, gün sayısı tam yeniden oluşturmada düzelir.
+    """
+    columns = ENTITIES["customer_rfm"]["columns"]
+    days = delta.groupby(["musteri_id", "son_satin_alma_tarihi"], as_index=False)["toplam_harcama"].sum()
+    gun = pd.to_datetime(days["son_satin_alma_tarihi"]).to_numpy()
+    rfm = rfm.drop_duplicates("musteri_id").reset_index(drop=True)
+    onceki = pd.to_datetime(rfm.set_index("musteri_id")["son_satin_alma_tarihi"]).reindex(days["musteri_id"]).to_numpy()
+    changes = pd.DataFrame({
+        "musteri_id": days["musteri_id"].to_numpy(dtype="int64"),
+        "son_satin_alma_tarihi": gun,
+        "toplam_satin_alma_sayisi": (pd.isna(onceki) | (gun > onceki)).astype("int64"),
+        "toplam_harcama": days["toplam_harcama"].to_numpy(dtype=float),
+    }).groupby("musteri_id", as_index=False).agg({"son_satin_alma_tarihi": "max", "toplam_satin_alma_sayisi": "sum", "toplam_harcama": "sum"})
+    changes["son_satin_alma_tarihi"] = changes["son_satin_alma_tarihi"].dt.strftime("%Y-%m-%d")
+    if rfm.empty:
+        return changes[columns]
+
+    pos = pd.Index(rfm["musteri_id"]).get_indexer(changes["musteri_id"])
+    found = pos >= 0
+    at, new = pos[found], changes[found]
+    son_tarih = rfm["son_satin_alma_tarihi"].astype(object).to_numpy(copy=True)
+    # ISO tarih metinleri sözlük sırasıyla karşılaştırılabilir
+    eski, yeni = son_tarih[at].astype(str), new["son_satin_alma_tarihi"].to_numpy(dtype=str)
+    son_tarih[at] = np.where(yeni > eski, yeni, eski)
+    sayi = rfm["toplam_satin_alma_sayisi"].to_numpy(dtype="int64", copy=True)
+    sayi[at] += new["toplam_satin_alma_sayisi"].to_numpy()
+    harcama = rfm["toplam_harcama"].to_numpy(dtype=float, copy=True)
+    harcama[at] += new["toplam_harcama"].to_numpy()
+    rfm = rfm.assign(son_satin_alma_tarihi=son_tarih, toplam_satin_alma_sayisi=sayi, toplam_harcama=harcama)
+    return pd.concat([rfm[columns], changes.loc[~found, columns]], ignore_index=True)
+
+def _migration_2_sales_daily(backend):
+    """Ürün×gün satış özet tablosunu satış defterinden oluştur"""
+    backend.write("sales_daily", build_sales_daily(backend.read("sales"), backend.read("products")))
+
+def _migration_3_product_versions(backend):
+    """İyimser eşzamanlılık denetimi için ürünlere satır versiyonu ekle"""
+    products = backend.read("products")
+    if _add_missing_columns(products, {"versiyon": 0}) or products["versiyon"].isna().any():
+        products["versiyon"] = products["versiyon"].fillna(0).astype("int64")
+        backend.write("products", products)
+
+def _migration_4_integer_ids(backend):
+    """Ondalık olarak saklanmış kimlik sütunlarını (ör. satışlarda 1.0) tam sayıya çevir"""
+    for entity in ("products", "sales", "customers", "suppliers", "orders"):
+        df = backend.read(entity)
+        id_cols = [c for c in ("id", "urun_id", "tedarikci_id")
+                   if c in df.columns and pd.api.types.is_float_dtype(df[c]) and df[c].notna().all()]
+        if id_cols:
+            df[id_cols] = df[id_cols].astype("int64")
+            backend.write(entity, df)
+
+def _migration_5_sales_rollup(backend):
+    """Satış özet küpünü ürün×gün özetinden oluştur"""
+    backend.write("sales_rollup", build_sales_rollup(backend.read("sales_daily"), backend.read("products")))
+
+def _migration_6_sales_customers(backend):
+    """Satışlara müşteri kimliği ekle ve müşteri RFM tablosunu satış defterinden oluştur"""
+    sales = backend.read("sales")
+    if _add_missing_columns(sales, {"musteri_id": None}):
+        backend.write("sales", sales)
+    backend.write("customer_rfm", build_customer_rfm(sales))
+
+def _migration_7_order_numbers(backend):
+    """Siparişlere satın alma siparişi numarası ekle; eski her satır kendi siparişidir"""
+    orders = backend.read("orders")
+    if "siparis_no" not in orders.columns or orders["siparis_no"].isna().any():
+        siparis_no = orders["siparis_no"].fillna(orders["id"]) if "siparis_no" in orders.columns else orders["id"]
+        orders["siparis_no"] = siparis_no.astype("int64")
+        backend.write("orders", orders)
+
+def _migration_8_sale_unit_costs(backend):
+    """Satışlara birim maliyet ekle; eski satırlar geçişteki alış fiyatıyla sabitlenir
+
+    Eski satışların satış anındaki maliyeti bilinmez. Sabitlenmezlerse her yeniden
+    oluşturmada o günkü alış fiyatıyla yeniden maliyetlendirilirlerdi.
+    """
+    sales = backend.read("sales")
+    if "birim_maliyet" not in sales.columns or sales["birim_maliyet"].isna().any():
+        sales["birim_maliyet"] = _unit_costs(sales, backend.read("products")).to_numpy()
+        backend.write("sales", sales)
+
+# Sıralı şema geçişleri: (sürüm, geçiş fonksiyonu)
+MIGRATIONS = [
+    (1, _migration_1_default_columns),
+    (2, _migration_2_sales_daily),
+    (3, _migration_3_product_versions),
+    (4, _migration_4_integer_ids),
+    (5, _migration_5_sales_rollup),
+    (6, _migration_6_sales_customers),
+    (7, _migration_7_order_numbers),
+    (8, _migration_8_sale_unit_costs),
+]
+
+# Günlüğü fark satırlarından oluşan özet tabloları ve farkları tabloya katlayan fonksiyonlar;
+# satışta sadece fark eklenir, tablo okunurken ya da birleştirmede katlanır
+JOURNAL_FOLDS = {
+    "sales_daily": _fold_sales_daily,
+    "sales_rollup": _fold_sales_rollup,
+    "customer_rfm": _fold_customer_rfm,
+}
+
+def _fold_journal(entity, df, pending):
+    """Günlük satırlarını tabloya ekle: özet tablolarında katla, diğerlerinde sona ekle"""
+    fold = JOURNAL_FOLDS.get(entity)
+    if fold is not None:
+        return fold(df, pending)
+    return pd.concat([df, pending], ignore_index=True) if not df.empty else pending
+
+# Bu süreçte şeması kontrol edilmiş depolama arka uçları
+_schema_ready = set()
+
+def migrate_schema():
+    """Bekleyen şema geçişlerini bir kez uygula ve şema sürümünü kaydet"""
+    if STORAGE_BACKEND in _schema_ready:
+        return []
+    with data_lock():
+        backend = get_backend()
+        current = backend.get_schema_version()
+        applied = []
+        for version, migration in MIGRATIONS:
+            if version > current:
+                migration(backend)
+                backend.set_schema_version(version)
+                applied.append(version)
+        # Önceki çalıştırmada yarıda kalan satış işlemini tamamla
+        recovered = backend.replay_transaction()
+    _schema_ready.add(STORAGE_BACKEND)
+    if applied or recovered:
+        invalidate_cache()
+    if recovered:
+        rebuild_sales_daily()
+    return applied
+
+def load_data():
+    """Ürün verilerini yükle"""
+    migrate_schema()
+    return _cached_read("products")
+
 def save_data(df):
     """Ürün verilerini kaydet"""
-    os.makedirs("data", exist_ok=True)
-    df.to_csv(DATA_PATH, index=False)
+    _write("products", df)
 
 def load_sales():
-    """Satış verilerini yükle"""
-    os.makedirs("data", exist_ok=True)
-    if not os.path.exists(SALES_PATH):
-        sales_df = pd.DataFrame(columns=["id", "urun_id", "tarih", "adet", "fiyat"])
-        sales_df.to_csv(SALES_PATH, index=False)
-    return pd.read_csv(SALES_PATH)
+    """Satış verilerini (ana dosya ve satış günlüğü birlikte) yükle"""
+    migrate_schema()
+    return _cached_read("sales")
 
 def save_sales(sales_df):
     """Satış verilerini kaydet"""
-    os.makedirs("data", exist_ok=True)
-    sales_df.to_csv(SALES_PATH, index=False)
+    _write("sales", sales_df)
+    rebuild_sales_daily()
+
+def append_sales(rows):
+    """Yeni satışları tüm satış dosyasını yeniden yazmadan satış günlüğüne ekle"""
+    rows = rows.copy()
+    if "id" not in rows.columns:
+        rows.insert(0, "id", None)
+    with data_lock():
+        backend = get_backend()
+        if rows["id"].isna().any():
+            rows["id"] = allocate_ids("sales", len(rows))
+        rows["birim_maliyet"] = _unit_costs(rows, load_data()).to_numpy()
+        backend.insert("sales", rows)
+        if backend.needs_compaction("sales"):
+            backend.compact("sales")
+        invalidate_cache("sales")
+        _update_sales_daily(rows)
+        _merge_customer_rfm(_customer_rfm_delta(rows))
+    return rows
+
+def append_sale(sale):
+    """Tek bir satış kaydını (sözlük) satış günlüğüne ekle"""
+    return append_sales(pd.DataFrame([sale])).iloc[0]
+
+def compact_sales():
+    """Satış günlüğünü ve özet tablolarının farklarını ana dosyalarla birleştir"""
+    with data_lock():
+        backend = get_backend()
+        for entity in ("sales",) + tuple(JOURNAL_FOLDS):
+            backend.compact(entity)
+            invalidate_cache(entity)
+
+def _append_journal(entity, delta):
+    """Özet farkını tabloyu yeniden yazmadan günlüğe ekle; günlük büyüdüyse tabloya katla"""
+    if delta.empty:
+        return
+    with data_lock():
+        backend = get_backend()
+        backend.insert(entity, delta)
+        if backend.needs_compaction(entity):
+            backend.compact(entity)
+        invalidate_cache(entity)
+
+def _finish_pending_transaction(backend):
+    """Bu süreçte yarıda kalmış bir satış işlemi varsa yenisi yazılmadan önce tamamla
+
+    Uygulama adımında hata alan (ör. disk dolu) bir işlemin kaydı diskte kalır; yeni
+    işlem kaydı onun üzerine yazılmadan önce yeniden yürütülür ve özet tablolar
+    defterden yeniden oluşturulur.
+    """
+    if backend.replay_transaction():
+        invalidate_cache()
+        rebuild_sales_daily()
+
+def record_sales(lines):
+    """Bir fişin tüm satış satırlarını ve stok düşüşlerini tek bir işlem olarak kaydet
+
+    lines: urun_id, adet, fiyat ve isteğe bağlı tarih, musteri_id ile versiyon (ürünün
+    okunduğu andaki versiyonu) sütunları. Stok yetersizse InsufficientStockError, ürün başka
+    bir oturumda değiştiyse ConcurrentUpdateError fırlatılır ve hiçbir şey yazılmaz.
+    """
+    migrate_schema()
+    if lines.empty:
+        return lines
+    if (lines["adet"] <= 0).any():
+        raise ValueError("Satış adedi pozitif olmalıdır")
+    sales_rows = pd.DataFrame({
+        "urun_id": lines["urun_id"].to_numpy(),
+        "tarih": lines["tarih"].to_numpy() if "tarih" in lines.columns else get_today(),
+        "adet": lines["adet"].to_numpy(),
+        "fiyat": lines["fiyat"].to_numpy(),
+        "musteri_id": lines["musteri_id"].to_numpy() if "musteri_id" in lines.columns else None,
+    })
+    stock_changes = pd.DataFrame({"id": lines["urun_id"].to_numpy(), "adet": lines["adet"].to_numpy()})
+    if "versiyon" in lines.columns:
+        stock_changes["versiyon"] = lines["versiyon"].to_numpy()
+    with data_lock():
+        backend = get_backend()
+        _finish_pending_transaction(backend)
+        sales_rows.insert(0, "id", allocate_ids("sales", len(sales_rows)))
+        # Maliyet satış anında sabitlenir; sonraki alış fiyatı değişiklikleri geçmişi değiştirmez
+        sales_rows["birim_maliyet"] = _unit_costs(sales_rows, load_data()).to_numpy()
+        backend.commit_sale(sales_rows, stock_changes)
+        if backend.needs_compaction("sales"):
+            backend.compact("sales")
+        invalidate_cache("products")
+        invalidate_cache("sales")
+        _update_sales_daily(sales_rows)
+        _merge_customer_rfm(_customer_rfm_delta(sales_rows))
+    return sales_rows
+
+def record_sales_stream(chunks, totals):
+    """Parça parça gelen satış satırlarını stok düşüşleriyle birlikte tek bir işlem olarak kaydet
+
+    chunks: urun_id, tarih, adet, fiyat (ve isteğe bağlı musteri_id) sütunlu çerçeveler
+    üreten yinelenebilir nesne. totals: ürün başına toplam adet (id, adet). Stok kilit
+    altında yeniden doğrulanır; aktarım yarıda kesilirse ya hiçbir satış ya da tümü
+    stokla birlikte yazılır. Parçalar bellekte birikmez, özet tablolar için sadece
+    ürün×gün ve müşteri×gün toplamları tutulur.
+    """
+    migrate_schema()
+    deltas = {"daily": None, "rfm": _customer_rfm_delta(pd.DataFrame())}
+
+    def prepared(products):
+        for rows in chunks:
+            if rows.empty:
+                continue
+            rows = rows.reindex(columns=["urun_id", "tarih", "adet", "fiyat", "musteri_id", "birim_maliyet"])
+            rows["birim_maliyet"] = _unit_costs(rows, products).to_numpy()
+            chunk_daily = build_sales_daily(rows, products)
+            daily = deltas["daily"]
+            deltas["daily"] = chunk_daily if daily is None else pd.concat([daily, chunk_daily], ignore_index=True).groupby(["urun_id", "tarih"], as_index=False).sum()
+            chunk_rfm = _customer_rfm_delta(rows)
+            if not chunk_rfm.empty:
+                deltas["rfm"] = pd.concat([deltas["rfm"], chunk_rfm], ignore_index=True).groupby(["musteri_id", "tarih"], as_index=False).sum()
+            yield rows
+
+    with data_lock():
+        backend = get_backend()
+        _finish_pending_transaction(backend)
+        inserted = backend.commit_sale_chunks(prepared(load_data()), totals)
+        if backend.needs_compaction("sales"):
+            backend.compact("sales")
+        invalidate_cache("products")
+        invalidate_cache("sales")
+        if deltas["daily"] is not None:
+            _merge_sales_daily(deltas["daily"])
+        _merge_customer_rfm(deltas["rfm"])
+    return inserted
+
+def record_sale(urun_id, adet, fiyat, expected_version=None):
+    """Tek bir ürün satışını stok düşüşüyle birlikte kaydet"""
+    line = {"urun_id": urun_id, "adet": adet, "fiyat": fiyat}
+    if expected_version is not None:
+        line["versiyon"] = expected_version
+    return record_sales(pd.DataFrame([line])).iloc[0]
+
+def load_sales_daily():
+    """Ürün×gün satış özet tablosunu yükle"""
+    migrate_schema()
+    return _cached_read("sales_daily")
+
+def rebuild_sales_daily():
+    """Ürün×gün satış özet tablosunu ve özet küpünü satış defterinden baştan oluştur"""
+    products = load_data()
+    daily = build_sales_daily(load_sales(), products)
+    _write("sales_daily", daily)
+    _write("sales_rollup", build_sales_rollup(daily, products))
+    _write("customer_rfm", build_customer_rfm(load_sales()))
+    return daily
+
+def load_sales_rollup():
+    """(kategori, ürün) × (gün, hafta, ay, tümü) satış özet küpünü yükle"""
+    migrate_schema()
+    return _cached_read("sales_rollup")
+
+def _update_sales_daily(new_sales):
+    """Yeni satışları ürün×gün özet tablosuna artımlı olarak ekle"""
+    _merge_sales_daily(build_sales_daily(new_sales, load_data()))
+
+def _merge_sales_daily(delta):
+    """Ürün×gün özet farkını özet tablonun günlüğüne ekle; tablo okunurken katlanır"""
+    with data_lock():
+        _append_journal("sales_daily", delta)
+        _merge_sales_rollup(build_sales_rollup(delta, load_data()))
+
+def _merge_sales_rollup(delta):
+    """Küp farkını küpün günlüğüne ekle; küp okunurken katlanır"""
+    _append_journal("sales_rollup", delta)
+
+def load_customer_rfm():
+    """Satış defterinden türetilen müşteri RFM tablosunu yükle"""
+    migrate_schema()
+    return _cached_read("customer_rfm")
+
+def _merge_customer_rfm(delta):
+    """Müşteri×gün harcama farkını RFM tablosunun günlüğüne ekle; tablo okunurken katlanır"""
+    if delta.empty:
+        return
+    _append_journal("customer_rfm", pd.DataFrame({
+        "musteri_id": delta["musteri_id"].to_numpy(dtype="int64"),
+        "son_satin_alma_tarihi": pd.to_datetime(delta["tarih"]).dt.strftime("%Y-%m-%d").to_numpy(),
+        "toplam_satin_alma_sayisi": 1,
+        "toplam_harcama": delta["tutar"].to_numpy(dtype=float),
+    }))
+
+def load_customer_segments():
+    """Son segmentasyon anlık görüntüsündeki müşteri skorlarını ve segmentlerini yükle"""
+    migrate_schema()
+    return _cached_read("customer_segments")
+
+def latest_segment_snapshot():
+    """En son segmentasyon anlık görüntüsünün bilgilerini (yoksa None) döndür"""
+    migrate_schema()
+    snapshots = _cached_read("segment_snapshots")
+    if snapshots.empty:
+        return None
+    snapshot = snapshots.sort_values("id").iloc[-1].to_dict()
+    snapshot["sinirlar"] = json.loads(snapshot["sinirlar"])
+    return snapshot
+
+def save_segment_snapshot(rows, removed_ids, sinirlar, tam):
+    """Segmentasyon sonucunu zaman damgalı anlık görüntü olarak kaydet
+
+    tam ise tüm tablo yeniden yazılır; değilse sadece yeniden skorlanan (rows) ve
+    silinen müşteriler tek yazımda güncellenir.
+    """
+    with data_lock():
+        if tam:
+            _write("customer_segments", rows)
+        else:
+            apply_changes("customer_segments", rows, rows.iloc[0:0], list(rows["musteri_id"]) + list(removed_ids), key="musteri_id")
+        musteri_sayisi = len(rows) if tam else len(load_customer_segments())
+        insert_rows("segment_snapshots", pd.DataFrame([{
+            "id": allocate_ids("segment_snapshots")[0],
+            "zaman": datetime.datetime.now().isoformat(timespec="seconds"),
+            "tur": "tam" if tam else "artimli",
+            "musteri_sayisi": musteri_sayisi,
+            "yeniden_skorlanan": len(rows),
+            "sinirlar": json.dumps(sinirlar),
+        }]))
 
 def load_customers():
     """Müşteri verilerini yükle"""
-    os.makedirs("data", exist_ok=True)
-    if not os.path.exists(CUSTOMERS_PATH):
-        customers_df = pd.DataFrame(columns=["id", "musteri_adi", "yas", "cinsiyet", "bolge", "son_satin_alma_tarihi", "toplam_satin_alma_sayisi", "toplam_harcama"])
-        customers_df.to_csv(CUSTOMERS_PATH, index=False)
-    return pd.read_csv(CUSTOMERS_PATH)
+    migrate_schema()
+    return _cached_read("customers")
 
 def save_customers(customers_df):
     """Müşteri verilerini kaydet"""
-    os.makedirs("data", exist_ok=True)
-    customers_df.to_csv(CUSTOMERS_PATH, index=False)
+    _write("customers", customers_df)
 
 def load_suppliers():
     """Tedarikçi verilerini yükle"""
-    os.makedirs("data", exist_ok=True)
-    if not os.path.exists(SUPPLIERS_PATH):
-        suppliers_df = pd.DataFrame(columns=["id", "tedarikci_adi", "telefon", "email", "adres", "urun_kategorileri", "teslimat_suresi", "performans_puani", "son_siparis_tarihi", "aktif_durum"])
-        suppliers_df.to_csv(SUPPLIERS_PATH, index=False)
-    return pd.read_csv(SUPPLIERS_PATH)
+    migrate_schema()
+    return _cached_read("suppliers")
 
 def save_suppliers(suppliers_df):
     """Tedarikçi verilerini kaydet"""
-    os.makedirs("data", exist_ok=True)
-    suppliers_df.to_csv(SUPPLIERS_PATH, index=False)
+    _write("suppliers", suppliers_df)
 
 def load_orders():
     """Sipariş verilerini yükle"""
-    os.makedirs("data", exist_ok=True)
-    if not os.path.exists(ORDERS_PATH):
-        orders_df = pd.DataFrame(columns=["id", "tedarikci_id", "urun_adi", "miktar", "birim_fiyat", "toplam_fiyat", "siparis_tarihi", "teslimat_tarihi", "durum", "notlar"])
-        orders_df.to_csv(ORDERS_PATH, index=False)
-    return pd.read_csv(ORDERS_PATH)
+    migrate_schema()
+    return _cached_read("orders")
 
 def save_orders(orders_df):
     """Sipariş verilerini kaydet"""
-    os.makedirs("data", exist_ok=True)
-    orders_df.to_csv(ORDERS_PATH, index=False)
+    _write("orders", orders_df)
+
+def memory_report(frames=None):
+    """Varlık başına bellek kullanımını (bayt) tip şeması uygulanmadan önce ve sonra ölç
+
+    frames verilmezse veriler depolamadan okunur; {varlık: çerçeve} sözlüğü ile
+    sentetik veriler de ölçülebilir.
+    """
+    if frames is None:
+        migrate_schema()
+        backend = get_backend()
+        frames = {entity: backend.read(entity) for entity in ENTITIES}
+    rows = []
+    for entity, raw in frames.items():
+        typed = _apply_schema(entity, raw)
+        once = int(raw.memory_usage(deep=True).sum())
+        sonra = int(typed.memory_usage(deep=True).sum())
+        rows.append({
+            "varlik": entity,
+            "satir": len(raw),
+            "once_bayt": once,
+            "sonra_bayt": sonra,
+            "tasarruf_orani": 1 - sonra / once if once else 0.0,
+        })
+    return pd.DataFrame(rows)
 
 def get_today():
     """Bugünün tarihini ISO formatında döndür"""
@@ -100,23 +1614,93 @@ def check_low_stock(df):
 def create_random_sales_history(num_days=90, min_adet=0, max_adet=3):
     """Her ürün için son num_days gün boyunca random satışlar oluşturur ve sales.csv'ye yazar."""
     df = load_data()
-    sales = []
-    today = datetime.date.today()
-    sale_id = 1
-    for _, urun in df.iterrows():
-        for day in range(num_days):
-            tarih = today - datetime.timedelta(days=(num_days - day - 1))
-            adet = random.randint(min_adet, max_adet)
-            if adet == 0:
-                continue  # O gün satış yok
-            fiyat = urun['satis_fiyati']
-            sales.append({
-                'id': sale_id,
-                'urun_id': urun['id'],
-                'tarih': tarih.isoformat(),
-                'adet': adet,
-                'fiyat': fiyat
-            })
-            sale_id += 1
-    sales_df = pd.DataFrame(sales)
-    sales_df.to_csv(SALES_PATH, index=False) 
\ No newline at end of file
+    rng = np.random.default_rng()
+    tarihler = pd.date_range(end=pd.Timestamp(datetime.date.today()), periods=num_days).strftime("%Y-%m-%d")
+    # Ürün×gün matrisi tek seferde üretilir; 0 adetli günlerde satış yok
+    adetler = rng.integers(min_adet, max_adet + 1, size=(len(df), num_days))
+    urun_idx, gun_idx = np.nonzero(adetler)
+    sales_df = pd.DataFrame({
+        'id': np.arange(1, len(urun_idx) + 1),
+        'urun_id': df['id'].to_numpy()[urun_idx],
+        'tarih': tarihler.to_numpy()[gun_idx],
+        'adet': adetler[urun_idx, gun_idx],
+        'fiyat': df['satis_fiyati'].to_numpy()[urun_idx],
+        'birim_maliyet': df['alis_fiyati'].to_numpy()[urun_idx],
+    })
+    save_sales(sales_df)
+
+SYNTHETIC_CATEGORIES = ["Tekstil", "Ayakkabı", "Aksesuar", "Elektronik", "Kozmetik", "Kırtasiye", "Oyuncak", "Ev"]
+SYNTHETIC_REGIONS = ["İstanbul", "Ankara", "İzmir", "Bursa", "Antalya", "Adana", "Konya"]
+
+def generate_synthetic_data(n_products=10_000, n_customers=100_000, n_suppliers=200,
+                            n_sales=2_000_000, num_days=365, seed=42):
+    """Performans testleri için mevsimsellik içeren büyük ölçekli sentetik veri üret
+
+    Diske yazmaz; {"products", "sales", "customers", "suppliers"} çerçevelerini döndürür.
+    """
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp(datetime.date.today())
+    categories = np.array(SYNTHETIC_CATEGORIES)
+    regions = np.array(SYNTHETIC_REGIONS)
+
+    # Ürünler
+    alis = rng.uniform(20, 2000, n_products).round(2)
+    products = pd.DataFrame({
+        "id": np.arange(1, n_products + 1),
+        "isim": pd.Series(np.arange(1, n_products + 1)).map("Ürün {:05d}".format),
+        "kategori": rng.choice(categories, n_products),
+        "stok": rng.integers(0, 500, n_products),
+        "alis_fiyati": alis,
+        "satis_fiyati": (alis * rng.uniform(1.1, 1.8, n_products)).round(2),
+        "minimum_stok": rng.integers(3, 30, n_products),
+    })
+
+    # Tedarikçiler (1-2 kategori)
+    first = rng.choice(categories, n_suppliers)
+    second = rng.choice(categories, n_suppliers)
+    has_second = (rng.random(n_suppliers) < 0.3) & (first != second)
+    supplier_ids = np.arange(1, n_suppliers + 1)
+    suppliers = pd.DataFrame({
+        "id": supplier_ids,
+        "tedarikci_adi": pd.Series(supplier_ids).map("Tedarikçi {}".format),
+        "telefon": pd.Series(supplier_ids).map("0212-555-{:04d}".format),
+        "email": pd.Series(supplier_ids).map("tedarikci{}@ornek.com".format),
+        "adres": rng.choice(regions, n_suppliers),
+        "urun_kategorileri": np.where(has_second, np.char.add(np.char.add(first, ", "), second), first),
+        "teslimat_suresi": rng.integers(1, 15, n_suppliers),
+        "performans_puani": rng.uniform(1, 5, n_suppliers).round(1),
+        "son_siparis_tarihi": (today - pd.to_timedelta(rng.integers(0, num_days, n_suppliers), unit="D")).strftime("%Y-%m-%d"),
+        "aktif_durum": rng.random(n_suppliers) < 0.9,
+    })
+
+    # Müşteriler
+    customer_ids = np.arange(1, n_customers + 1)
+    customers = pd.DataFrame({
+        "id": customer_ids,
+        "musteri_adi": pd.Series(customer_ids).map("Müşteri {}".format),
+        "yas": rng.integers(18, 76, n_customers),
+        "cinsiyet": rng.choice(np.array(["Erkek", "Kadın"]), n_customers),
+        "bolge": rng.choice(regions, n_customers),
+        "son_satin_alma_tarihi": (today - pd.to_timedelta(rng.integers(0, num_days, n_customers), unit="D")).strftime("%Y-%m-%d"),
+        "toplam_satin_alma_sayisi": rng.poisson(8, n_customers) + 1,
+        "toplam_harcama": rng.gamma(2.0, 2500.0, n_customers).round(2),
+    })
+
+    # Satışlar: popüler ürünler daha sık satılır, günler yıllık ve haftalık mevsimselliğe göre seçilir
+    popularity = 1.0 / np.arange(1, n_products + 1) ** 0.8
+    popularity = rng.permutation(popularity / popularity.sum())
+    days = pd.date_range(end=today, periods=num_days)
+    day_weights = (1 + 0.3 * np.sin(2 * np.pi * (days.dayofyear.to_numpy() - 80) / 365)) * np.where(days.dayofweek >= 5, 1.3, 1.0)
+    day_weights = day_weights / day_weights.sum()
+    product_idx = rng.choice(n_products, n_sales, p=popularity)
+    day_idx = np.sort(rng.choice(num_days, n_sales, p=day_weights))
+    sales = pd.DataFrame({
+        "id": np.arange(1, n_sales + 1),
+        "urun_id": products["id"].to_numpy()[product_idx],
+        "tarih": days.strftime("%Y-%m-%d").to_numpy()[day_idx],
+        "adet": rng.integers(1, 6, n_sales),
+        "fiyat": products["satis_fiyati"].to_numpy()[product_idx],
+        "birim_maliyet": products["alis_fiyati"].to_numpy()[product_idx],
+    })
+
+    return {"products": products, "sales": sales, "customers": customers, "suppliers": suppliers}